@@ -0,0 +1,352 @@
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import perf_trace
+from results_store import is_long_frame, student_starts, to_long_frame
+from roll_ranges import parse_p_ranges
+from student_records import StudentRecord
+
+# Vectorized result analysis behind the dashboard's prepare_analysis. Input is
+# normalized once into the long table from results_store and every figure is
+# then a grouped array operation: bucket with np.digitize, count and sum
+# with np.bincount over subject codes. AnalysisState keeps the same figures
+# as running totals that single students can be added to or removed from;
+# SubjectIndex answers the teacher-wise report's per-subject lookups.
+
+SCORE_BUCKETS = ['95+', '90-94', '85-89', '80-84', '75-79', '70-74', '60-69', '50-59', '40-49', '<40']
+# Lower edges of the buckets from '<40' upwards; np.digitize (bisect_right
+# for one score) gives 0 for <40 up to 9 for 95+, so SCORE_BUCKETS column =
+# 9 - digitize
+BUCKET_EDGES = [40, 50, 60, 70, 75, 80, 85, 90, 95]
+# A student without a status is counted as this, as the row loop did
+MISSING_STATUS = "RE-APPEAR"
+ANALYSIS_COLUMNS = ["Roll No", "Status", "Subject", "Total"]
+
+
+def analyze(data):
+    # data: scraped records, the DataFrame pd.read_json gives for an uploaded
+    # file, or a long frame already loaded from the Parquet store
+    with perf_trace.span("analysis"):
+        df = data if is_long_frame(data) else to_long_frame(data, columns=ANALYSIS_COLUMNS)
+        return analyze_frame(df)
+
+
+def _grouped(df):
+    # The per-subject grouping analyze_frame and AnalysisState share. Returns
+    # the first row of each student, the valid (subject, total) rows and
+    # their grouping by subject in first-seen subject order.
+    first_rows = student_starts(df)
+
+    subject_codes = df["Subject"].cat.codes.to_numpy()
+    totals = df["Total"]
+    valid = (subject_codes >= 0) & totals.notna().to_numpy()
+    codes = subject_codes[valid]
+    scores = totals.to_numpy(dtype=np.int64, na_value=0)[valid]
+    categories = df["Subject"].cat.categories
+    n_subjects = len(categories)
+    sizes = np.bincount(codes, minlength=n_subjects)
+
+    # A stable sort by subject (radix sort on the small integer codes) groups
+    # each subject's scores in row order; the first of each group is where
+    # the subject first appears, which gives the row loop's subject order
+    by_subject = np.argsort(codes.astype(np.int16), kind="stable")
+    starts = np.cumsum(sizes) - sizes
+    present = np.flatnonzero(sizes)
+    order = present[np.argsort(by_subject[starts[present]])]
+
+    codes = codes.astype(np.intp)
+    buckets = len(SCORE_BUCKETS) - 1 - np.digitize(scores, BUCKET_EDGES)
+    bucket_counts = np.bincount(codes * len(SCORE_BUCKETS) + buckets,
+                                minlength=n_subjects * len(SCORE_BUCKETS)).reshape(n_subjects, len(SCORE_BUCKETS))
+    sums = np.bincount(codes, weights=scores, minlength=n_subjects)
+    return {
+        "first_rows": first_rows, "valid": valid, "scores": scores, "by_subject": by_subject,
+        "starts": starts, "sizes": sizes, "order": order, "names": list(categories[order]),
+        "bucket_counts": bucket_counts, "sums": sums,
+    }
+
+
+def _student_statuses(df, first_rows):
+    # Each student's status as codes into the returned names; a blank or
+    # missing status is MISSING_STATUS (so names can repeat)
+    status = df["Status"]
+    names = [name or MISSING_STATUS for name in status.cat.categories] + [MISSING_STATUS]
+    codes = status.cat.codes.to_numpy()[first_rows].astype(np.intp)
+    codes[codes < 0] = len(names) - 1
+    return codes, names
+
+
+def analyze_frame(df):
+    # Returns (status_counts, df_buckets, df_avg, subject_scores) for a long
+    # frame, in the shapes page2 expects:
+    #   status_counts  {"PASS": n, "RE-APPEAR": n, ...} per student
+    #   df_buckets     subjects x SCORE_BUCKETS counts, subjects in first-seen order
+    #   df_avg         "Average" per subject, highest first
+    #   subject_scores {subject: [totals]} in row order
+    g = _grouped(df)
+    status_counts = {"PASS": 0, "RE-APPEAR": 0}
+    status_codes, names = _student_statuses(df, g["first_rows"])
+    counts = np.bincount(status_codes, minlength=len(names))
+    for name, n in zip(names, counts):
+        if n:
+            status_counts[name] = status_counts.get(name, 0) + int(n)
+
+    order, names, sizes, starts = g["order"], g["names"], g["sizes"], g["starts"]
+    df_buckets = pd.DataFrame(g["bucket_counts"][order], index=names, columns=SCORE_BUCKETS)
+    df_avg = pd.DataFrame({"Average": g["sums"][order] / sizes[order]}, index=names).sort_values(
+        "Average", ascending=False)
+
+    grouped = g["scores"][g["by_subject"]].tolist()
+    subject_scores = defaultdict(list)
+    for code, name in zip(order, names):
+        subject_scores[name] = grouped[starts[code]:starts[code] + sizes[code]]
+
+    return status_counts, df_buckets, df_avg, subject_scores
+
+
+def _score(value):
+    # A subject total as analyze reads it: a whole number, else None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return int(number) if number.is_integer() else None
+
+
+def _status(value):
+    return (value.strip().upper() if isinstance(value, str) else "") or MISSING_STATUS
+
+
+class _SubjectStats:
+    __slots__ = ("buckets", "total", "scores")
+
+    def __init__(self):
+        self.buckets = [0] * len(SCORE_BUCKETS)
+        self.total = 0
+        self.scores = {}  # student key (or (key, n) for a repeated subject) -> score
+
+
+class AnalysisState:
+    # The figures analyze returns, kept as running aggregates so students can
+    # be added or removed in O(subjects) instead of re-analyzing everything:
+    # status counts, and per subject the bucket counts, the sum for the
+    # average and the scores keyed by student.
+    #
+    #   state = AnalysisState.from_data(records)
+    #   state.add(record)        # a new or re-fetched student replaces any earlier copy
+    #   state.remove(roll)
+    #   status_counts, df_buckets, df_avg, subject_scores = state.result()
+    #
+    # Students are keyed by roll number; records without one (or a roll seen
+    # twice in a file) get negative keys.
+    def __init__(self):
+        self.status_counts = {"PASS": 0, "RE-APPEAR": 0}
+        self._students = {}   # key -> status
+        self._subjects = {}   # subject -> _SubjectStats, in first-seen order
+        self._anonymous = 0
+        self._result = None
+
+    @classmethod
+    def from_data(cls, data):
+        # Same inputs as analyze
+        with perf_trace.span("analysis"):
+            df = data if is_long_frame(data) else to_long_frame(data, columns=ANALYSIS_COLUMNS)
+            return cls.from_frame(df)
+
+    @classmethod
+    def from_frame(cls, df):
+        # Built with the same grouped array pass as analyze_frame
+        self = cls()
+        g = _grouped(df)
+        first_rows = g["first_rows"]
+        keys = df["Roll No"].to_numpy()[first_rows].astype(np.int64)
+        anonymous = (keys <= 0) | pd.Series(keys).duplicated().to_numpy()
+        self._anonymous = int(anonymous.sum())
+        keys[anonymous] = -np.arange(1, self._anonymous + 1)
+
+        status_codes, names = _student_statuses(df, first_rows)
+        statuses = np.asarray(names, dtype=object)[status_codes]
+        self._students = dict(zip(keys.tolist(), statuses.tolist()))
+        for status in self._students.values():
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+        row_keys = keys[np.cumsum(first_rows) - 1][g["valid"]][g["by_subject"]].tolist()
+        grouped = g["scores"][g["by_subject"]].tolist()
+        for code, name in zip(g["order"], g["names"]):
+            stats = _SubjectStats()
+            start, size = g["starts"][code], g["sizes"][code]
+            stats.buckets = g["bucket_counts"][code].tolist()
+            stats.total = int(g["sums"][code])
+            stats.scores = dict(zip(row_keys[start:start + size], grouped[start:start + size]))
+            if len(stats.scores) < size:
+                # A student with the subject twice
+                stats.scores = {}
+                for key, score in zip(row_keys[start:start + size], grouped[start:start + size]):
+                    stats.scores[_free_key(stats.scores, key)] = score
+            self._subjects[name] = stats
+        return self
+
+    def __len__(self):
+        return len(self._students)
+
+    def __contains__(self, key):
+        return key in self._students
+
+    def nbytes(self):
+        # Rough size, for cache accounting: the dicts and their int keys
+        return (sys.getsizeof(self._students) + 28 * len(self._students)
+                + sum(sys.getsizeof(s.scores) + 28 * len(s.scores) for s in self._subjects.values()))
+
+    def add(self, record):
+        # record: a result dict or StudentRecord. Returns its key.
+        if isinstance(record, StudentRecord):
+            roll = record.roll if record.roll > 0 else None
+            status = record.status
+            subjects = zip(record.subject_names(), record.totals())
+        else:
+            roll = _score(record.get("Roll No"))
+            status = record.get("Status")
+            subjects = ((s.get("Subject"), _score(s.get("Total"))) for s in record.get("Subjects", []))
+        if roll is None or roll <= 0:
+            self._anonymous += 1
+            key = -self._anonymous
+        else:
+            key = roll
+            self.remove(key)
+
+        status = _status(status)
+        self._students[key] = status
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        for name, score in subjects:
+            if name is None or score is None:
+                continue
+            stats = self._subjects.get(name)
+            if stats is None:
+                stats = self._subjects[name] = _SubjectStats()
+            stats.buckets[len(SCORE_BUCKETS) - 1 - bisect_right(BUCKET_EDGES, score)] += 1
+            stats.total += score
+            stats.scores[_free_key(stats.scores, key)] = score
+        self._result = None
+        return key
+
+    def remove(self, key):
+        # Takes a student out again; False if there's no such key
+        status = self._students.pop(key, None)
+        if status is None:
+            return False
+        self.status_counts[status] -= 1
+        if not self.status_counts[status] and status not in ("PASS", "RE-APPEAR"):
+            del self.status_counts[status]
+        for name in list(self._subjects):
+            stats = self._subjects[name]
+            n, score_key = 0, key
+            while score_key in stats.scores:
+                score = stats.scores.pop(score_key)
+                stats.buckets[len(SCORE_BUCKETS) - 1 - bisect_right(BUCKET_EDGES, score)] -= 1
+                stats.total -= score
+                n += 1
+                score_key = (key, n)
+            if not stats.scores:
+                del self._subjects[name]
+        self._result = None
+        return True
+
+    def result(self):
+        # (status_counts, df_buckets, df_avg, subject_scores) as analyze
+        # returns them; built once per change
+        if self._result is None:
+            names = list(self._subjects)
+            stats = list(self._subjects.values())
+            df_buckets = pd.DataFrame(np.array([s.buckets for s in stats], dtype=np.int64).reshape(
+                len(stats), len(SCORE_BUCKETS)), index=names, columns=SCORE_BUCKETS)
+            df_avg = pd.DataFrame({"Average": np.array([s.total / len(s.scores) for s in stats],
+                                                       dtype=np.float64)},
+                                  index=names).sort_values("Average", ascending=False)
+            subject_scores = defaultdict(list)
+            for name, s in zip(names, stats):
+                subject_scores[name] = list(s.scores.values())
+            self._result = (dict(self.status_counts), df_buckets, df_avg, subject_scores)
+        return self._result
+
+
+def _free_key(scores, key):
+    # key, or (key, n) for the n-th repeat of a subject for the same student
+    n = 0
+    score_key = key
+    while score_key in scores:
+        n += 1
+        score_key = (key, n)
+    return score_key
+
+
+class SubjectIndex:
+    # For the teacher-wise report: per subject, the students who took it
+    # with their total and whether they passed, as arrays sorted by roll. A
+    # teacher's figures are then a lookup of their roll numbers instead of
+    # a scan of every selected student's subject list.
+    def __init__(self, df):
+        rolls = df["Roll No"].to_numpy().astype(np.int64)
+        self.rolls = np.unique(rolls[rolls > 0])  # every student
+        codes = df["Subject"].cat.codes.to_numpy()
+        totals = df["Total"].to_numpy(dtype=np.float64, na_value=np.nan)
+        passed = (df["Status"] == "PASS").to_numpy()
+
+        keep = np.flatnonzero(codes >= 0)
+        keep = keep[np.lexsort((rolls[keep], codes[keep]))]
+        bounds = np.searchsorted(codes[keep], np.arange(len(df["Subject"].cat.categories) + 1))
+        self._subjects = {}
+        for i, name in enumerate(df["Subject"].cat.categories):
+            rows = keep[bounds[i]:bounds[i + 1]]
+            if len(rows):
+                self._subjects[name] = (rolls[rows], totals[rows], passed[rows])
+        self.subjects = sorted(self._subjects)
+
+    @classmethod
+    def from_data(cls, data):
+        with perf_trace.span("analysis: subject index"):
+            df = data if is_long_frame(data) else to_long_frame(data, columns=ANALYSIS_COLUMNS)
+            return cls(df)
+
+    def subject_rolls(self, subject):
+        # Everyone who took the subject
+        entry = self._subjects.get(subject)
+        return set() if entry is None else set(entry[0].tolist())
+
+    def lookup(self, subject, rolls):
+        # Returns (students, pass_count, scores) for the selected roll numbers:
+        # how many of them are in the data, how many passed with a mark in
+        # the subject, and their marks in it, in roll order
+        selected = np.fromiter(rolls, dtype=np.int64, count=len(rolls))
+        students = int(np.isin(selected, self.rolls).sum())
+        entry = self._subjects.get(subject)
+        if entry is None or not len(selected):
+            return students, 0, []
+        subject_rolls, totals, passed = entry
+        hit = np.isin(subject_rolls, selected) & ~np.isnan(totals)
+        return students, int((hit & passed).sum()), totals[hit].tolist()
+
+    def nbytes(self):
+        return self.rolls.nbytes + sum(a.nbytes for entry in self._subjects.values() for a in entry)
+
+
+def select_rolls(p_input, rolls):
+    # The roll numbers in `rolls` (a sorted array) picked by comma separated
+    # numbers and ranges as the scraper takes them, e.g. "100001-100040,
+    # 100052". Returns a set; raises ValueError for a malformed list.
+    selected = set()
+    if not p_input.strip():
+        return selected
+    for start, end in parse_p_ranges(p_input):
+        lo = np.searchsorted(rolls, start, side="left")
+        hi = np.searchsorted(rolls, end, side="right")
+        selected.update(rolls[lo:hi].tolist())
+    return selected
@@ -0,0 +1,234 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import queue
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from result_cache import ResultCache
+from results_warehouse import DEFAULT_WAREHOUSE_PATH, ResultsWarehouse
+from scrape_jobs import EMPTY, FAILED, ScrapeJob
+from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE
+from throttle import AdaptiveThrottle
+
+# Scrapes every institution in a directory of roll lists, e.g.
+#
+#   python batch_scrape.py rolls/ -o results/ --workers 4 --rate 20
+#
+# Each roll list is a text file in the MC Girls GKN.txt format: the
+# institution name on the first line, then the institution code followed by
+# its roll numbers. Institutions are spread over worker processes that share
+# one global request budget; each writes results/<code>.json and the run ends
+# with results/index.json. With --warehouse, results are also streamed into
+# the local results warehouse (see results_warehouse.py) as they arrive.
+
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines per institution
+
+
+def parse_roll_list(path):
+    # Returns (name, code, rolls) from a roll list file
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read()
+    first_line, _, rest = text.partition("\n")
+    numbers = re.findall(r"\b\d{6}\b", rest)
+    if not numbers:
+        raise ValueError(f"{path}: no institution code or roll numbers found")
+    name = first_line.strip() or os.path.splitext(os.path.basename(path))[0]
+    return name, numbers[0], [int(n) for n in numbers[1:]]
+
+
+class SharedBudget:
+    # Global requests-per-second budget shared by all worker processes: every
+    # request from any process takes the next 1/rate slot.
+    def __init__(self, rate):
+        self.rate = rate
+        self._next_slot = mp.Value("d", 0.0)
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Set in each worker by _init_worker
+_budget = None
+_progress = None
+
+
+def _init_worker(budget, progress):
+    global _budget, _progress
+    _budget = budget
+    _progress = progress
+
+
+def scrape_institution(path, output_dir, q, r, concurrency, rate, use_cache, url=None,
+                       warehouse_path=None):
+    name, code, rolls = parse_roll_list(path)
+    started = time.time()
+    job_id = f"batch-{code}-{q}-{r}"
+    meta = {"institution": code, "name": name}
+    try:
+        job = ScrapeJob.load(job_id)
+    except FileNotFoundError:
+        job = ScrapeJob.create(rolls, q=q, r=r, job_id=job_id, meta=meta)
+    else:
+        if job.p_list != rolls:
+            # The roll list was edited since the job started: the job takes
+            # the new list and keeps the journaled rolls that are still in it
+            ScrapeJob.create(rolls, q=q, r=r, job_id=job_id, meta=meta)
+            job = ScrapeJob.load(job_id)
+
+    cache = ResultCache() if use_cache else None
+    warehouse = ResultsWarehouse(warehouse_path) if warehouse_path else None
+    if warehouse is not None:
+        # Rolls finished by an earlier, interrupted run of this job
+        warehouse.add(job.results(as_records=True), q, r, code, name)
+    throttle = AdaptiveThrottle(rate=rate, concurrency=concurrency, budget=_budget)
+    last_report = [0.0]
+
+    def on_progress(done, total, p, result, error):
+        now = time.time()
+        if now - last_report[0] >= PROGRESS_INTERVAL or done == total:
+            last_report[0] = now
+            counts = job.counts()
+            _progress.put(("progress", code, name, len(job.p_list) - counts["pending"], len(job.p_list),
+                           counts[FAILED] + counts["error"], now - started))
+
+    _progress.put(("start", code, name, len(job.p_list) - len(job.pending()), len(job.p_list), 0, 0.0))
+    job.run(concurrency=concurrency, rate=rate, cache=cache, on_progress=on_progress,
+            throttle=throttle, url=url, warehouse=warehouse)
+
+    output = os.path.join(output_dir, f"{code}.json")
+    results = job.compact(output)
+    if cache is not None:
+        cache.close()
+    if warehouse is not None:
+        warehouse.close()
+
+    counts = job.counts()
+    elapsed = time.time() - started
+    statuses = [s.get("Status", "").strip().upper() for s in results]
+    return {
+        "institution": code,
+        "name": name,
+        "q": q,
+        "r": r,
+        "file": os.path.basename(output),
+        "rolls": len(job.p_list),
+        "students": len(results),
+        "pass": statuses.count("PASS"),
+        "reappear": statuses.count("RE-APPEAR"),
+        "empty": counts[EMPTY],
+        "failed": counts[FAILED] + counts["error"],
+        "complete": counts["pending"] == 0,
+        "job_id": job.job_id,
+        "seconds": round(elapsed, 1),
+        "requests": throttle.requests,
+        "blocks": throttle.blocks,
+    }
+
+
+def _print_progress(message):
+    kind, code, name, done, total, failed, elapsed = message
+    if kind == "start":
+        print(f"[{code}] {name}: starting, {done}/{total} rolls already done")
+        return
+    rate = done / elapsed if elapsed else 0.0
+    print(f"[{code}] {name}: {done}/{total} rolls, {rate:.1f} rolls/s, {failed} failed")
+
+
+def main(input_dir, output_dir="batch_results", workers=4, q=2, r=2025,
+         concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, use_cache=True, pattern="*.txt",
+         url=None, warehouse_path=None):
+    paths = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    if not paths:
+        raise SystemExit(f"No roll lists matching {pattern} in {input_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # `rate` is the budget for the whole run; each worker adapts within its
+    # share of it but never exceeds the global budget
+    budget = SharedBudget(rate)
+    progress = mp.Queue()
+    per_worker_rate = rate / min(workers, len(paths))
+    started = time.time()
+    index = []
+    failures = []
+
+    print(f"Scraping {len(paths)} institutions with {workers} workers, budget {rate} req/s")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(budget, progress)) as pool:
+        futures = {
+            pool.submit(scrape_institution, path, output_dir, q, r, concurrency, per_worker_rate,
+                        use_cache, url, warehouse_path): path
+            for path in paths
+        }
+        pending = set(futures)
+        while pending:
+            try:
+                while True:
+                    _print_progress(progress.get(timeout=0.5))
+            except queue.Empty:
+                pass
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                path = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    failures.append({"file": path, "error": str(e)})
+                    print(f"FAILED {path}: {e}")
+                    continue
+                index.append(summary)
+                print(f"[{summary['institution']}] {summary['name']}: done, {summary['students']} students, "
+                      f"{summary['failed']} failed, {summary['rolls'] / max(summary['seconds'], 0.1):.1f} rolls/s")
+
+    # Progress sent just before the last workers finished
+    while True:
+        try:
+            _print_progress(progress.get(timeout=0.1))
+        except queue.Empty:
+            break
+
+    elapsed = time.time() - started
+    index.sort(key=lambda s: s["institution"])
+    with open(os.path.join(output_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"q": q, "r": r, "seconds": round(elapsed, 1), "institutions": index,
+                   "failures": failures}, f, indent=2, ensure_ascii=False)
+
+    total_rolls = sum(s["rolls"] for s in index)
+    print(f"Finished {len(index)}/{len(paths)} institutions, {sum(s['students'] for s in index)} students, "
+          f"{total_rolls} rolls in {elapsed:.1f}s ({total_rolls / max(elapsed, 0.1):.1f} rolls/s)")
+    incomplete = [s["institution"] for s in index if not s["complete"]]
+    if incomplete:
+        print(f"Incomplete (rerun to resume): {', '.join(incomplete)}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape results for every institution in a directory of roll lists")
+    parser.add_argument("input_dir", help="directory of roll list files (institution name, code, rolls)")
+    parser.add_argument("-o", "--output-dir", default="batch_results")
+    parser.add_argument("--pattern", default="*.txt", help="glob for roll list files (default *.txt)")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    parser.add_argument("-q", type=int, default=2, help="session parameter (default 2)")
+    parser.add_argument("-r", type=int, default=2025, help="year parameter (default 2025)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="parallel requests per worker")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="global requests per second across all workers")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--url", help="alternative Result_Detail endpoint, e.g. a local test server")
+    parser.add_argument("--warehouse", nargs="?", const=DEFAULT_WAREHOUSE_PATH,
+                        help=f"also store results in the results warehouse (default {DEFAULT_WAREHOUSE_PATH})")
+    args = parser.parse_args()
+    main(args.input_dir, args.output_dir, workers=args.workers, q=args.q, r=args.r,
+         concurrency=args.concurrency, rate=args.rate, use_cache=not args.no_cache, pattern=args.pattern,
+         url=args.url, warehouse_path=args.warehouse)
@@ -0,0 +1,118 @@
+# Vectorized analysis engine (analysis.py) against the row-by-row
+# prepare_analysis it replaced.
+#
+#   python benchmarks/bench_analysis.py --students 300000
+#
+# Builds a board-sized dataset by repeating the sample results with shifted
+# roll numbers and times normalizing the records into the long table, the
+# analysis on that table (what a Parquet upload costs) and the old row loop,
+# plus building the incremental AnalysisState and updating it one student at
+# a time. That the implementations return the same structures is tested in
+# tests/test_analysis.py.
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from analysis import ANALYSIS_COLUMNS, AnalysisState, analyze_frame  # noqa: E402
+from bench_store import make_records  # noqa: E402
+from results_store import to_long_frame  # noqa: E402
+
+
+def legacy_prepare_analysis(data):
+    # prepare_analysis as it was for scraped records, kept as the reference
+    status_counts = {"PASS": 0, "RE-APPEAR": 0}
+    score_buckets = ['95+', '90-94', '85-89', '80-84', '75-79', '70-74', '60-69', '50-59', '40-49', '<40']
+    bucket_ranges = {
+        '95+': lambda x: x >= 95,
+        '90-94': lambda x: 90 <= x < 95,
+        '85-89': lambda x: 85 <= x < 90,
+        '80-84': lambda x: 80 <= x < 85,
+        '75-79': lambda x: 75 <= x < 80,
+        '70-74': lambda x: 70 <= x < 75,
+        '60-69': lambda x: 60 <= x < 70,
+        '50-59': lambda x: 50 <= x < 60,
+        '40-49': lambda x: 40 <= x < 50,
+        '<40': lambda x: x < 40
+    }
+    subject_bucket_counts = defaultdict(lambda: defaultdict(int))
+    subject_scores = defaultdict(list)
+
+    for student in data:
+        status = student.get("Status", "RE-APPEAR").strip().upper()
+        status_counts[status] += 1
+        for subject in student.get("Subjects", []):
+            subject_name = subject["Subject"]
+            try:
+                score = int(subject["Total"])
+            except ValueError:
+                continue
+            subject_scores[subject_name].append(score)
+            for bucket, rule in bucket_ranges.items():
+                if rule(score):
+                    subject_bucket_counts[subject_name][bucket] += 1
+                    break
+
+    for subject in subject_bucket_counts:
+        for bucket in score_buckets:
+            if bucket not in subject_bucket_counts[subject]:
+                subject_bucket_counts[subject][bucket] = 0
+
+    df_buckets = pd.DataFrame(subject_bucket_counts).fillna(0).astype(int).T
+    df_buckets = df_buckets[score_buckets] if all(b in df_buckets.columns for b in score_buckets) else df_buckets
+    df_avg = pd.DataFrame({subj: [sum(scores)/len(scores)] for subj, scores in subject_scores.items()},
+                          index=["Average"]).T.sort_values("Average", ascending=False)
+    return status_counts, df_buckets, df_avg, subject_scores
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized result analysis")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--students", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=3, help="analysis runs to take the best of")
+    parser.add_argument("--skip-legacy", action="store_true", help="don't time the old row loop")
+    args = parser.parse_args()
+
+    sample = make_records(args.data, 1)
+    records = make_records(args.data, -(-args.students // len(sample)))[:args.students]
+    print(f"{len(records)} students, {sum(len(s['Subjects']) for s in records)} subject rows")
+
+    df, normalize_s = timed(lambda: to_long_frame(records, columns=ANALYSIS_COLUMNS))
+    best = None
+    for _ in range(args.repeat):
+        _, seconds = timed(analyze_frame, df)
+        best = seconds if best is None else min(best, seconds)
+    print(f"normalize records -> long table   {normalize_s:8.3f} s")
+    print(f"vectorized analysis on the table  {best:8.3f} s")
+
+    state, build_s = timed(AnalysisState.from_frame, df)
+    updates = records[:1000]
+    _, remove_s = timed(lambda: [state.remove(int(s["Roll No"])) for s in updates])
+    _, add_s = timed(lambda: [state.add(s) for s in updates])
+    _, result_s = timed(state.result)
+    print(f"build incremental AnalysisState   {build_s:8.3f} s")
+    print(f"remove / add one student          {remove_s * 1e6 / len(updates):8.1f} / "
+          f"{add_s * 1e6 / len(updates):.1f} us")
+    print(f"results after an update           {result_s:8.3f} s")
+
+    if not args.skip_legacy:
+        _, legacy_s = timed(legacy_prepare_analysis, records)
+        print(f"old row-by-row prepare_analysis   {legacy_s:8.3f} s  "
+              f"({legacy_s / best:.0f}x slower than the vectorized analysis)")
+
+
+if __name__ == "__main__":
+    main()
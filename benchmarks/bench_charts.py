@@ -0,0 +1,68 @@
+# Server-side cost of page2's charts with each rendering backend: matplotlib
+# figures rasterized to PNG (what st.pyplot sends) against the Vega-Lite
+# specs in chart_specs.py, which the browser draws.
+#
+#   python benchmarks/bench_charts.py --scale 10
+#
+# --scale repeats the sample results with shifted roll numbers; the charts
+# are per subject, so their cost barely depends on the number of students.
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import charts as figures  # noqa: E402
+from analysis import analyze  # noqa: E402
+from bench_store import make_records  # noqa: E402
+from dashboard import CHARTS  # noqa: E402
+from memo_cache import figure_png  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matplotlib against Vega-Lite chart rendering")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    records = make_records(args.data, args.scale)
+    status_counts, df_buckets, df_avg, subject_scores = analyze(records)
+    subject, scores = next(iter(subject_scores.items()))
+    charts = {
+        "status_pie": (status_counts,),
+        "bucket_bars": (df_buckets, "Subject-wise Score Distribution"),
+        "average_bars": (df_avg,),
+        "bucket_heatmap": (df_buckets,),
+        "teacher_pie": (scores[:40].count(scores[0]), 40, "Teacher - " + subject),
+        "marks_histogram": (scores[:40], subject),
+    }
+
+    print(f"{len(records)} students, {len(df_buckets)} subjects")
+    print(f"{'chart':>16} {'matplotlib s':>13} {'PNG KB':>8} {'Vega-Lite s':>12} {'spec KB':>8}")
+    totals = [0.0, 0.0]
+    for name, chart_args in charts.items():
+        draw, spec = CHARTS[name]
+        start = time.perf_counter()
+        png = figure_png(getattr(figures, draw)(*chart_args))
+        server_s = time.perf_counter() - start
+        start = time.perf_counter()
+        text = json.dumps(spec(*chart_args))
+        browser_s = time.perf_counter() - start
+        totals[0] += server_s
+        totals[1] += browser_s
+        print(f"{name:>16} {server_s:>13.3f} {len(png) / 1e3:>8.0f} {browser_s:>12.4f} {len(text) / 1e3:>8.1f}")
+    print(f"{'total':>16} {totals[0]:>13.3f} {'':>8} {totals[1]:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Parser benchmark: checks every backend against the saved fixtures and
+# reports pages/second for each.
+#
+#   python benchmarks/bench_parser.py [--rounds 50] [--pages-dir DIR]
+#
+# fixtures/result_pages holds Result_Detail pages and expected.json with the
+# dict extract_result must return for each of them; tests/test_parser.py
+# checks every backend against it. The check here only guards timing a
+# --pages-dir the backends disagree on.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scraper import PARSER_BACKENDS  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fixtures", "result_pages")
+
+
+def load_pages(pages_dir):
+    pages = {}
+    for name in sorted(os.listdir(pages_dir)):
+        if name.endswith(".html"):
+            with open(os.path.join(pages_dir, name), encoding="utf-8") as f:
+                pages[name] = f.read()
+    expected_path = os.path.join(pages_dir, "expected.json")
+    expected = {}
+    if os.path.exists(expected_path):
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+    return pages, expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the result page parsers")
+    parser.add_argument("--rounds", type=int, default=50, help="passes over the page set per backend")
+    parser.add_argument("--pages-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    pages, expected = load_pages(args.pages_dir)
+    if not pages:
+        sys.exit(f"No .html pages in {args.pages_dir}")
+
+    # Correctness first: every backend must agree with expected.json (or with
+    # the bs4 backend when a page has no expected entry).
+    reference = {name: expected.get(name) or PARSER_BACKENDS["bs4"](html)
+                 for name, html in pages.items()}
+    for backend, extract in PARSER_BACKENDS.items():
+        mismatches = [name for name, html in pages.items() if extract(html) != reference[name]]
+        if mismatches:
+            sys.exit(f"{backend}: output differs on {', '.join(mismatches)}")
+
+    html_list = list(pages.values())
+    print(f"{len(html_list)} pages x {args.rounds} rounds, "
+          f"{sum(map(len, html_list)) / len(html_list) / 1024:.1f} KB/page")
+    print(f"{'backend':<8} {'pages/s':>10} {'ms/page':>9}")
+    baseline = None
+    for backend, extract in PARSER_BACKENDS.items():
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for html in html_list:
+                extract(html)
+        elapsed = time.perf_counter() - start
+        rate = args.rounds * len(html_list) / elapsed
+        baseline = baseline or rate
+        print(f"{backend:<8} {rate:>10.0f} {1000 / rate:>9.3f}  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
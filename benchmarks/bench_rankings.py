@@ -0,0 +1,87 @@
+# Top-N rankings (rankings.py) on a board-sized dataset against ranking by
+# a full sort of every student, then rank and percentile columns for every
+# row against pandas' groupby rank.
+#
+#   python benchmarks/bench_rankings.py --students 300000 --top 10
+#
+# That the partial selection picks the same students as the full sort (ties
+# included) is tested in tests/test_rankings.py, and that the rank columns
+# match pandas in tests/test_ranks.py.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_store import make_records  # noqa: E402
+from rankings import RANKING_COLUMNS, RankingEngine, ScoreRanks, add_rank_columns  # noqa: E402
+from results_store import to_long_frame  # noqa: E402
+
+
+def full_sort_top(engine, students, scores, n):
+    # Reference: sort everyone, keep all level with the n-th score
+    order = np.argsort(-scores, kind="stable")
+    if len(order) > n:
+        order = order[scores[order] >= scores[order[n - 1]]]
+    return set(engine.rolls[students[order]].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-N rankings")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--students", type=int, default=300_000)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    sample = make_records(args.data, 1)
+    records = make_records(args.data, -(-args.students // len(sample)))[:args.students]
+    df = to_long_frame(records, columns=RANKING_COLUMNS)
+    del records
+
+    start = time.perf_counter()
+    engine = RankingEngine(df)
+    build_s = time.perf_counter() - start
+    print(f"{len(engine)} students, {len(engine.subjects)} subjects; engine built in {build_s:.3f}s")
+
+    start = time.perf_counter()
+    for subject in engine.subjects:
+        engine.top_subject(subject, args.top)
+    subjects_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for subject in engine.subjects:
+        full_sort_top(engine, *engine._subjects[subject], args.top)
+    sort_s = time.perf_counter() - start
+    print(f"top {args.top} of every subject: partial selection {subjects_s:.3f}s, full sort {sort_s:.3f}s")
+
+    # The three most taken subjects, so most students are in the group
+    group = sorted(engine.subjects, key=lambda s: -len(engine._subjects[s][0]))[:3]
+    start = time.perf_counter()
+    table = engine.top_group(group, args.top)
+    group_s = time.perf_counter() - start
+    print(f"top {args.top} of group {', '.join(group)}: {group_s:.3f}s ({len(table)} rows with ties)")
+
+    start = time.perf_counter()
+    add_rank_columns(df)
+    columns_s = time.perf_counter() - start
+    start = time.perf_counter()
+    df.groupby("Subject", observed=True)["Total"].rank(method="min", ascending=False)
+    pandas_s = time.perf_counter() - start
+    print(f"rank and percentile columns for {len(df)} rows: {columns_s:.3f}s "
+          f"(pandas groupby rank of subjects alone {pandas_s:.3f}s)")
+
+    ranks = ScoreRanks({s: engine._subjects[s][1] for s in engine.subjects}, engine.grand_totals)
+    subject = engine.subjects[0]
+    start = time.perf_counter()
+    for score in range(1000):
+        ranks.rank(subject, score % 150)
+        ranks.percentile(subject, score % 150)
+    print(f"single rank + percentile lookup: {(time.perf_counter() - start) / 1000 * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Memory of the compact StudentRecord model (student_records.py) against the
+# JSON-shaped dicts, per 100k students.
+#
+#   python benchmarks/bench_records.py --students 100000
+#
+# The dicts are decoded from JSON text, as they are when a results file is
+# loaded or a journal replayed, so their strings aren't shared between
+# students. Sizes are what tracemalloc sees allocated for each form.
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_store import make_records  # noqa: E402
+from results_store import to_long_frame  # noqa: E402
+from student_records import compact_records, to_dicts  # noqa: E402
+
+
+def allocated(build):
+    # Returns (result, bytes still allocated for it)
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn, *args):
+    # Timed separately: tracemalloc slows allocation-heavy code several times
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory of the compact student record model")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--students", type=int, default=100_000)
+    args = parser.parse_args()
+
+    sample = make_records(args.data, 1)
+    text = json.dumps(make_records(args.data, -(-args.students // len(sample)))[:args.students])
+
+    dicts, dict_bytes = allocated(lambda: json.loads(text))
+    del text
+    n = len(dicts)
+    records, record_bytes = allocated(lambda: compact_records(dicts))
+    frame, frame_bytes = allocated(lambda: to_long_frame(records))
+    compact_s = timed(compact_records, dicts)
+    expand_s = timed(to_dicts, records)
+    if to_dicts(records) != dicts:
+        raise SystemExit("MISMATCH: StudentRecord.to_dict() didn't reproduce the records")
+
+    per_100k = 100_000 / n
+    print(f"{n} students, {sum(len(s['Subjects']) for s in dicts)} subject rows")
+    print(f"{'form':>22} {'MB per 100k':>12} {'bytes/student':>14}")
+    for name, size in (("JSON dicts", dict_bytes), ("StudentRecord", record_bytes),
+                       ("long frame (analysis)", frame_bytes)):
+        print(f"{name:>22} {size * per_100k / 1e6:>12.1f} {size / n:>14.0f}")
+    print(f"StudentRecords use {dict_bytes / record_bytes:.1f}x less memory than the dicts")
+    print(f"dicts -> records {compact_s:.2f}s, records -> dicts {expand_s:.2f}s, round trip identical")
+
+
+if __name__ == "__main__":
+    main()
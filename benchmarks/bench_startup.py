@@ -0,0 +1,101 @@
+# Cold-start cost of the dashboard: the import time of dashboard.py broken
+# down by its heavy dependencies (python -X importtime), and the time to
+# first render of page1 with Streamlit's AppTest. Every run is a fresh
+# interpreter, so nothing is already imported.
+#
+#   python benchmarks/bench_startup.py --runs 5 --max-first-render 3
+#
+# Exits with status 1 if page1's first render loads a dependency that
+# should be imported lazily (scraping, plotting, PDF), or if the median
+# first render takes longer than --max-first-render seconds.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Where each of these is first imported, its cumulative import time
+WATCHED = ["streamlit", "pandas", "numpy", "pyarrow", "analysis", "results_store", "results_warehouse",
+           "matplotlib.pyplot", "seaborn", "requests", "bs4", "fpdf", "scraper", "charts", "pdf_reports"]
+# Only loaded on the code paths that need them
+LAZY = ["matplotlib", "seaborn", "requests", "bs4", "fpdf", "scraper", "charts", "pdf_reports"]
+
+FIRST_RENDER = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=120).run()
+done = time.perf_counter()
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+print(ready - start, done - ready, ",".join(m for m in {lazy!r} if m in sys.modules) or "-")
+"""
+
+
+def import_times():
+    # module -> cumulative microseconds where it was first imported, and the
+    # total for dashboard.py
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import dashboard"],
+                            cwd=ROOT, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the column header
+        times.setdefault(fields[2].strip(), int(fields[1]))
+    return times
+
+
+def first_render():
+    # (seconds to import AppTest/streamlit, seconds for page1's first run,
+    # lazy modules that got loaded)
+    code = FIRST_RENDER.format(path=os.path.join(ROOT, "dashboard.py"), lazy=LAZY)
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(f"page1 failed to render:\n{result.stderr}")
+    ready, run, loaded = result.stdout.split()[-3:]
+    return float(ready), float(run), [] if loaded == "-" else loaded.split(",")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard cold start")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-first-render", type=float, default=None,
+                        help="fail if page1's median first render (seconds) is slower")
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    print(f"import dashboard: median {statistics.median(r['dashboard'] for r in runs) / 1e6:.3f}s "
+          f"over {args.runs} cold runs")
+    for module in WATCHED:
+        seen = [r[module] for r in runs if module in r]
+        if seen:
+            print(f"  {module:>18} {statistics.median(seen) / 1e6:8.3f}s")
+        else:
+            print(f"  {module:>18}   not imported")
+
+    renders = [first_render() for _ in range(args.runs)]
+    ready = statistics.median(r[0] for r in renders)
+    run = statistics.median(r[1] for r in renders)
+    print(f"page1 first render: {ready + run:.3f}s (streamlit {ready:.3f}s, dashboard script {run:.3f}s)")
+
+    failed = False
+    loaded = sorted({m for r in renders for m in r[2]})
+    if loaded:
+        print(f"FAIL: page1 loaded {', '.join(loaded)}, which should be imported lazily")
+        failed = True
+    if args.max_first_render is not None and ready + run > args.max_first_render:
+        print(f"FAIL: first render {ready + run:.3f}s is over {args.max_first_render}s")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Load time and memory of the ways the dashboard can load results: the
+# original pd.read_json path, the streaming JSON reader and the columnar
+# Parquet store (results_store.py).
+#
+#   python benchmarks/bench_store.py --scale 100
+#
+# The sample results are repeated --scale times with shifted roll numbers.
+# Each case runs in a fresh process and covers what page2 does with the
+# file: load it, then prepare_analysis. Peak memory is Python/numpy
+# allocations (tracemalloc) plus Arrow's own pool, which tracemalloc can't see.
+# Frame MB for JSON leaves out the nested Subjects lists, so peak is the
+# number to compare.
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def make_records(path, scale):
+    with open(path, encoding="utf-8") as f:
+        base = json.load(f)
+    records = []
+    for i in range(scale):
+        for s in base:
+            records.append({**s, "Roll No": str(int(s["Roll No"] or 0) + i * 1_000_000)})
+    return records
+
+
+def _measure(kind, path, out):
+    import pandas as pd
+    import pyarrow as pa
+
+    from dashboard import prepare_analysis
+    from results_store import read_json_stream, read_parquet
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if kind == "json":
+        # What process_uploaded_file does with an uploaded JSON file
+        data = pd.read_json(path)
+    elif kind == "stream":
+        data = read_json_stream(path)
+    else:
+        data = read_parquet(path)
+    loaded = time.perf_counter()
+    status_counts, df_buckets, df_avg, subject_scores = prepare_analysis(data)
+    done = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    out.put({
+        "kind": kind,
+        "load_s": loaded - start,
+        "analysis_s": done - loaded,
+        "total_s": done - start,
+        "frame_mb": data.memory_usage(deep=True).sum() / 1e6,
+        "peak_mb": (peak + pa.default_memory_pool().max_memory()) / 1e6,
+        "students": sum(status_counts.values()),
+    })
+
+
+def measure(kind, path):
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(kind, path, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and Parquet results loading")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--scale", type=int, default=20, help="copies of the sample results")
+    args = parser.parse_args()
+
+    # Imported here so spawned children don't pay for it twice
+    from results_store import to_long_frame, write_parquet
+
+    records = make_records(args.data, args.scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "results.json")
+        parquet_path = os.path.join(tmp, "results.parquet")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+        write_parquet(to_long_frame(records), parquet_path)
+        del records
+
+        print(f"JSON {os.path.getsize(json_path) / 1e6:.1f} MB, "
+              f"Parquet {os.path.getsize(parquet_path) / 1e6:.1f} MB")
+        print(f"{'format':>8} {'students':>9} {'load s':>8} {'analysis s':>10} {'total s':>8} "
+              f"{'frame MB':>9} {'peak MB':>8}")
+        runs = [measure("json", json_path), measure("stream", json_path), measure("parquet", parquet_path)]
+        for run in runs:
+            print(f"{run['kind']:>8} {run['students']:>9} {run['load_s']:>8.3f} {run['analysis_s']:>10.3f} "
+                  f"{run['total_s']:>8.3f} {run['frame_mb']:>9.1f} {run['peak_mb']:>8.1f}")
+        print(f"Streaming JSON peaks at {runs[1]['peak_mb'] / runs[0]['peak_mb']:.0%} of pd.read_json's memory; "
+              f"Parquet loads and analyses {runs[0]['total_s'] / runs[2]['total_s']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# How ingestion, analysis, ranking, the teacher tab and chart rendering
+# scale with the number of students, on synthetic results
+# (synthetic_results.py), stored so runs can be compared.
+#
+#   python benchmarks/bench_suite.py --sizes 1000,10000,100000
+#   python benchmarks/bench_suite.py --sizes 500000 --repeat 1 --compare benchmarks/results/suite-20261017-101500.json
+#
+# Each size runs in a fresh process on a dataset generated once and kept in
+# .cache/synthetic. Every stage is timed --repeat times and the best kept;
+# peak memory is the child's peak RSS. Results go to benchmarks/results as
+# JSON, and each run is compared with the previous one there (or with
+# --compare). With --max-regression the run exits with status 1 if a stage
+# got slower by more than that percentage; it also does if a size's process
+# dies or runs past --timeout without a result.
+
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+from memo_cache import file_hash  # noqa: E402
+from synthetic_results import DEFAULT_SAMPLE, make_dataset  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, ".cache", "synthetic")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+MIN_COMPARED_S = 0.01  # stages faster than this are too noisy to flag
+TEACHER_ROLLS = 40     # students in a typical teacher's selection
+
+
+def dataset_path(students, seed, sample):
+    # One file per size, seed and sample content
+    name = f"synthetic_{students}_seed{seed}_{file_hash(sample)[:8]}.json"
+    return os.path.join(DATA_DIR, name)
+
+
+def _best(repeat, fn):
+    # (best seconds, result of the last call)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def _measure(path, repeat, out):
+    import resource
+    import tempfile
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    warnings.simplefilter("ignore")
+    # dashboard.py runs outside `streamlit run` here; keep its warnings quiet
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")
+
+    import charts as figures
+    from analysis import AnalysisState, SubjectIndex, select_rolls
+    from dashboard import CHARTS, prepare_analysis
+    from memo_cache import figure_png
+    from rankings import RankingEngine, ScoreRanks, add_rank_columns
+    from results_store import read_json_stream, read_parquet, write_parquet
+
+    stages = {}
+
+    def timed(name, fn):
+        stages[name], result = _best(repeat, fn)
+        return result
+
+    data = timed("ingest: read_json_stream", lambda: read_json_stream(path))
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = os.path.join(tmp, "results.parquet")
+        timed("ingest: write_parquet", lambda: write_parquet(data, parquet_path))
+        data = timed("ingest: read_parquet", lambda: read_parquet(parquet_path))
+
+    status_counts, df_buckets, df_avg, subject_scores = timed("analysis: prepare_analysis",
+                                                              lambda: prepare_analysis(data))
+    timed("analysis: AnalysisState", lambda: AnalysisState.from_data(data))
+
+    rankings = timed("ranking: RankingEngine", lambda: RankingEngine.from_data(data))
+    timed("ranking: top 5 per subject", lambda: [rankings.top_subject(s, 5) for s in rankings.subjects])
+    timed("ranking: ScoreRanks", lambda: ScoreRanks(subject_scores, rankings.grand_totals))
+    timed("ranking: add_rank_columns", lambda: add_rank_columns(data))
+
+    # The teacher tab: one teacher with a roll range in every subject, and
+    # the whole of the largest subject
+    index = timed("teacher: SubjectIndex", lambda: SubjectIndex.from_data(data))
+    first = int(index.rolls[0])
+    rolls = timed("teacher: select_rolls", lambda: select_rolls(f"{first}-{first + TEACHER_ROLLS - 1}",
+                                                                index.rolls))
+    timed("teacher: lookup per subject", lambda: [index.lookup(s, rolls) for s in index.subjects])
+    largest = max(index.subjects, key=lambda s: len(subject_scores.get(s, ())))
+    everyone = index.subject_rolls(largest)
+    total, pass_count, scores = timed("teacher: lookup whole subject", lambda: index.lookup(largest, everyone))
+
+    # Each chart as the dashboard draws it, both backends
+    chart_args = {
+        "status_pie": (status_counts,),
+        "bucket_bars": (df_buckets, "Subject-wise Score Distribution"),
+        "average_bars": (df_avg,),
+        "bucket_heatmap": (df_buckets,),
+        "teacher_pie": (pass_count, total, "Teacher - " + largest),
+        "marks_histogram": (scores, largest),
+    }
+    for name, args in chart_args.items():
+        draw, spec = CHARTS[name]
+        timed(f"chart: {name} png", lambda: figure_png(getattr(figures, draw)(*args)))
+        timed(f"chart: {name} spec", lambda: json.dumps(spec(*args)))
+
+    out.put({
+        "students": int(len(index.rolls)),
+        "rows": int(len(data)),
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "stages": stages,
+    })
+
+
+class MeasureFailed(RuntimeError):
+    pass
+
+
+def measure(path, repeat, timeout=None):
+    # Raises MeasureFailed if the child dies without a result (e.g. killed
+    # for memory) or is still running after timeout seconds
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(path, repeat, out))
+    proc.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return out.get(timeout=1)
+            except queue.Empty:
+                pass
+            if not proc.is_alive():
+                try:
+                    # a result put just before the child exited
+                    return out.get(timeout=1)
+                except queue.Empty:
+                    raise MeasureFailed(f"exited with code {proc.exitcode} without a result") from None
+            if deadline is not None and time.monotonic() > deadline:
+                raise MeasureFailed(f"no result after {timeout:g}s")
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+
+
+def environment():
+    import matplotlib
+    import numpy
+    import pandas
+    import pyarrow
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "pyarrow": pyarrow.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def latest_results(results_dir):
+    runs = sorted(glob.glob(os.path.join(results_dir, "suite-*.json")))
+    return runs[-1] if runs else None
+
+
+def compare(run, previous, max_regression=None):
+    # Prints each stage against the previous run; returns the regressions
+    # over max_regression percent as (size, stage, change)
+    regressions = []
+    for size, result in run["sizes"].items():
+        before = previous["sizes"].get(size, {}).get("stages", {})
+        if not before:
+            continue
+        print(f"\n{size} students against {previous['created']} ({previous['environment'].get('commit') or '?'})")
+        print(f"{'stage':<36} {'now s':>9} {'before s':>9} {'change':>8}")
+        for stage, seconds in result["stages"].items():
+            if stage not in before:
+                continue
+            change = 100 * (seconds / before[stage] - 1) if before[stage] else 0.0
+            flag = ""
+            if max_regression is not None and change > max_regression and \
+                    max(seconds, before[stage]) >= MIN_COMPARED_S:
+                regressions.append((size, stage, change))
+                flag = "  <-"
+            print(f"{stage:<36} {seconds:>9.4f} {before[stage]:>9.4f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data paths on synthetic results")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated student counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, best kept")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sample", default=DEFAULT_SAMPLE, help="results JSON the synthetic data is modeled on")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="results file to compare with; defaults to the latest stored run")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="fail if a stage is slower than the compared run by more than this percent")
+    parser.add_argument("--timeout", type=float, default=None, help="give up on a size after this many seconds")
+    parser.add_argument("--no-save", action="store_true", help="don't store this run's results")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    previous_path = args.compare or latest_results(args.results_dir)
+    run = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": environment(),
+        "seed": args.seed,
+        "sample": os.path.basename(args.sample),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+
+    failed = []
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for students in sizes:
+        path = dataset_path(students, args.seed, args.sample)
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            # Written under a temporary name so an interrupted run leaves no half file
+            make_dataset(path + ".tmp", students, seed=args.seed, sample=args.sample)
+            os.replace(path + ".tmp", path)
+            print(f"Generated {students} students in {time.perf_counter() - start:.1f}s "
+                  f"({os.path.getsize(path) / 1e6:.0f} MB)")
+        try:
+            result = measure(path, args.repeat, args.timeout)
+        except MeasureFailed as e:
+            print(f"\n{students} students: measurement {e}")
+            failed.append((students, str(e)))
+            continue
+        run["sizes"][str(students)] = result
+        print(f"\n{result['students']} students, {result['rows']} rows, peak {result['peak_mb']:.0f} MB")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage:<36} {seconds:>9.4f}s")
+
+    regressions = []
+    if previous_path:
+        with open(previous_path, encoding="utf-8") as f:
+            regressions = compare(run, json.load(f), args.max_regression)
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved results to {path}")
+
+    for students, error in failed:
+        print(f"FAIL: measurement at {students} students {error}")
+    for size, stage, change in regressions:
+        print(f"FAIL: {stage} at {size} students is {change:+.1f}% slower")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Cost of the perf_trace instrumentation: an empty span and counter with
+# tracing off and on, and the parse hot path (extract_result over the saved
+# fixture pages) against calling the parser directly.
+#
+#   python benchmarks/bench_trace.py --rounds 50 --repeat 5
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import perf_trace  # noqa: E402
+from bench_parser import FIXTURES_DIR, load_pages  # noqa: E402
+from scraper import DEFAULT_PARSER, PARSER_BACKENDS, extract_result  # noqa: E402
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def empty_span():
+    with perf_trace.span("bench"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perf_trace overhead")
+    parser.add_argument("--rounds", type=int, default=50, help="passes over the fixture pages")
+    parser.add_argument("--calls", type=int, default=1_000_000, help="empty spans/counters timed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per parse variant")
+    args = parser.parse_args()
+
+    print(f"{'':<16} {'span ns':>9} {'count ns':>9}")
+    for label, trace in (("tracing off", None), ("tracing on", perf_trace.Trace(max_spans=0))):
+        with perf_trace.recording(trace):
+            span_s = per_call(empty_span, args.calls)
+            count_s = per_call(lambda: perf_trace.count("bench"), args.calls)
+        print(f"{label:<16} {span_s * 1e9:>9.0f} {count_s * 1e9:>9.0f}")
+
+    pages = list(load_pages(FIXTURES_DIR)[0].values()) * args.rounds
+    direct = PARSER_BACKENDS[DEFAULT_PARSER]
+    results = {}
+    for _ in range(args.repeat):
+        # Alternated and the best of each kept, so drift doesn't favour one
+        for label, trace, parse in (("direct", None, direct), ("tracing off", None, extract_result),
+                                    ("tracing on", perf_trace.Trace(), extract_result)):
+            with perf_trace.recording(trace):
+                start = time.perf_counter()
+                for html in pages:
+                    parse(html)
+                seconds = (time.perf_counter() - start) / len(pages)
+            results[label] = min(results.get(label, seconds), seconds)
+    print(f"\n{DEFAULT_PARSER} parse of {len(pages)} pages")
+    for label, seconds in results.items():
+        print(f"{label:<16} {seconds * 1000:.4f} ms/page ({seconds / results['direct'] - 1:+.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Insert and load speed of the local results warehouse (results_warehouse.py).
+#
+#   python benchmarks/bench_warehouse.py --students 100000 --institutions 20
+#
+# The students are spread over --institutions institution codes and
+# inserted through a WarehouseWriter, as a scrape job streams them in, once
+# per batch size. Then one institution is loaded back with the indexed
+# query and compared with reading its JSON file.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_store import make_records  # noqa: E402
+from results_store import read_json_stream  # noqa: E402
+from results_warehouse import ResultsWarehouse  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the results warehouse")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--institutions", type=int, default=20)
+    parser.add_argument("--batch-sizes", default="1,50,500,5000")
+    args = parser.parse_args()
+
+    sample = make_records(args.data, 1)
+    records = make_records(args.data, -(-args.students // len(sample)))[:args.students]
+    per_institution = -(-len(records) // args.institutions)
+    print(f"{len(records)} students, {sum(len(s['Subjects']) for s in records)} subject rows, "
+          f"{args.institutions} institutions")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'batch size':>10} {'seconds':>8} {'students/s':>11}")
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            path = os.path.join(tmp, f"warehouse-{batch_size}.sqlite3")
+            warehouse = ResultsWarehouse(path, batch_size=batch_size)
+            # A single-row batch takes a commit per student; cap its run
+            sample_size = len(records) if batch_size >= 50 else min(len(records), 5000)
+            start = time.perf_counter()
+            for i in range(0, sample_size, per_institution):
+                with warehouse.writer(2, 2025, str(100000 + i // per_institution)) as writer:
+                    for record in records[i:min(i + per_institution, sample_size)]:
+                        writer.add(record)
+            seconds = time.perf_counter() - start
+            print(f"{batch_size:>10} {seconds:>8.2f} {sample_size / seconds:>11.0f}")
+            warehouse.close()
+
+        warehouse = ResultsWarehouse(path)
+        start = time.perf_counter()
+        df = warehouse.load("100000", 2, 2025)
+        load_s = time.perf_counter() - start
+        json_path = os.path.join(tmp, "institution.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(records[:per_institution], f)
+        start = time.perf_counter()
+        read_json_stream(json_path)
+        json_s = time.perf_counter() - start
+        print(f"load one institution ({df['Roll No'].nunique()} students, {len(df)} rows): "
+              f"warehouse {load_s:.3f}s, JSON file {json_s:.3f}s")
+        print("query plan: " + "; ".join(warehouse.query_plan("100000", 2, 2025)))
+        warehouse.close()
+
+
+if __name__ == "__main__":
+    main()
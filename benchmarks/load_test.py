@@ -0,0 +1,133 @@
+# Scraper load test against the offline mock board (mock_server.py).
+#
+#   python benchmarks/load_test.py --concurrency 1,4,8,16 --latency 0.1 --rolls 1000
+#   python benchmarks/load_test.py --url http://127.0.0.1:8000/Result_Detail --concurrency 8
+#
+# For each concurrency setting it scrapes the same roll list through
+# scrape_rolls (no cache) and reports end-to-end throughput, request latency
+# percentiles, response codes and what the adaptive throttle ended up doing.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from mock_server import MockBoard, start_server  # noqa: E402
+from scraper import make_session, scrape_rolls  # noqa: E402
+from throttle import AdaptiveThrottle, CircuitBreaker  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def build_roll_list(data_path, count, empty_share):
+    with open(data_path, encoding="utf-8") as f:
+        rolls = [int(s["Roll No"]) for s in json.load(f) if s.get("Roll No")]
+    n_empty = int(count * empty_share)
+    real = [rolls[i % len(rolls)] for i in range(count - n_empty)]
+    # Rolls below 100000 never exist, so they come back as empty pages
+    empty = list(range(10000, 10000 + n_empty))
+    return real + empty
+
+
+def run_once(url, rolls, concurrency, rate, cooldown):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def record(response, *args, **kwargs):
+        with lock:
+            latencies.append(response.elapsed.total_seconds())
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    throttle = AdaptiveThrottle(rate=rate, concurrency=concurrency,
+                                breaker=CircuitBreaker(cooldown=cooldown))
+    session = make_session(concurrency)
+    session.hooks["response"].append(record)
+    start = time.perf_counter()
+    try:
+        outcomes = scrape_rolls(rolls, concurrency=concurrency, url=url, throttle=throttle,
+                                session=session)
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rolls": len(rolls),
+        "seconds": elapsed,
+        "rolls_per_s": len(rolls) / elapsed,
+        "requests": len(latencies),
+        "failed": sum(1 for _, _, error in outcomes if error is not None),
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p90_ms": 1000 * percentile(latencies, 90),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "mean_ms": 1000 * statistics.fmean(latencies) if latencies else 0.0,
+        "statuses": statuses,
+        "throttle": throttle.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the scraper against the mock BISE server")
+    parser.add_argument("--url", help="existing endpoint; by default a mock server is started in-process")
+    parser.add_argument("--data", default=os.path.join(ROOT, "results_107004.json"))
+    parser.add_argument("--rolls", type=int, default=500, help="roll numbers to fetch per run")
+    parser.add_argument("--empty-share", type=float, default=0.2,
+                        help="share of rolls that don't exist (empty pages)")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="comma separated settings to compare")
+    parser.add_argument("--rate", type=float, default=0, help="starting requests per second (0 = unpaced)")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--block-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--cooldown", type=float, default=2.0, help="circuit breaker cooldown in seconds")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        board = MockBoard.from_file(args.data, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, block_rate=args.block_rate,
+                                    rate_limit=args.rate_limit, block_for=args.cooldown, seed=1)
+        server, url = start_server(board)
+
+    rolls = build_roll_list(args.data, args.rolls, args.empty_share)
+    runs = []
+    print(f"{len(rolls)} rolls per run against {url}")
+    print(f"{'conc':>4} {'rolls/s':>8} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'failed':>6} "
+          f"{'blocks':>6} {'retries':>7} {'final rate':>10}")
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            run = run_once(url, rolls, concurrency, args.rate, args.cooldown)
+            runs.append(run)
+            t = run["throttle"]
+            print(f"{concurrency:>4} {run['rolls_per_s']:>8.1f} {run['p50_ms']:>7.1f} {run['p90_ms']:>7.1f} "
+                  f"{run['p99_ms']:>7.1f} {run['failed']:>6} {t['blocks']:>6} {t['retries']:>7} "
+                  f"{t['rate'] or '-':>10}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from analysis import SCORE_BUCKETS
+
+# Vega-Lite specs for page2's charts, drawn in the browser instead of being
+# rasterized on the server. Each function takes the same arguments as the
+# matching matplotlib plot_* function in charts.py and returns a plain
+# dict (JSON-serializable, data inline) for st.vega_lite_chart. Matplotlib
+# stays the renderer for print and PDF export.
+
+SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+# Score buckets from '95+' down, darkest first as in the matplotlib charts
+BUCKET_COLORS = {"scheme": "blues", "reverse": True}
+
+
+def _pie(values, colors, title):
+    # values: [(label, count)]; percentages computed in the browser
+    share = [
+        {"joinaggregate": [{"op": "sum", "field": "Students", "as": "All"}]},
+        {"calculate": "datum.Students / datum.All", "as": "Share"},
+    ]
+    encoding = {
+        "theta": {"field": "Students", "type": "quantitative", "stack": True},
+        "color": {"field": "Status", "type": "nominal", "sort": None,
+                  "scale": {"range": colors}, "legend": {"title": "Status"}},
+        "order": {"field": "Order", "type": "quantitative"},
+        "tooltip": [{"field": "Status"}, {"field": "Students"},
+                    {"field": "Share", "format": ".1%"}],
+    }
+    return {
+        "$schema": SCHEMA,
+        "title": title,
+        "data": {"values": [{"Status": label, "Students": int(count), "Order": i}
+                            for i, (label, count) in enumerate(values)]},
+        "transform": share,
+        "encoding": encoding,
+        "layer": [
+            {"mark": {"type": "arc", "outerRadius": 120}},
+            {"mark": {"type": "text", "radius": 80, "fontSize": 13, "fontWeight": "bold", "color": "white"},
+             "encoding": {"text": {"field": "Share", "format": ".1%"}}},
+        ],
+        "view": {"stroke": None},
+    }
+
+
+def status_pie(status_counts):
+    return _pie(list(status_counts.items()), ["#0d47a1", "#90caf9", "#42a5f5", "#bbdefb"], "Overall Result: Pass vs Reappear")
+
+
+def teacher_pie(pass_count, total, title):
+    return _pie([("Pass", pass_count), ("Reappear", total - pass_count)], ["#2e7d32", "#ef5350"], title)
+
+
+def _bucket_values(df_buckets):
+    return [{"Subject": subject, "Score Range": bucket, "Students": int(count)}
+            for subject, row in zip(df_buckets.index, df_buckets.to_numpy().tolist())
+            for bucket, count in zip(df_buckets.columns, row)]
+
+
+def bucket_bars(df_buckets, title):
+    subjects = list(df_buckets.index)
+    return {
+        "$schema": SCHEMA,
+        "title": title,
+        "data": {"values": _bucket_values(df_buckets)},
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": "Subject", "type": "nominal", "sort": subjects,
+                  "axis": {"labelAngle": -45, "title": "Subjects"}},
+            "xOffset": {"field": "Score Range", "sort": SCORE_BUCKETS},
+            "y": {"field": "Students", "type": "quantitative", "title": "Number of Students"},
+            "color": {"field": "Score Range", "type": "ordinal", "sort": SCORE_BUCKETS,
+                      "scale": BUCKET_COLORS},
+        },
+        "height": 400,
+    }
+
+
+def average_bars(df_avg):
+    return {
+        "$schema": SCHEMA,
+        "title": "Average Scores by Subject",
+        "data": {"values": [{"Subject": subject, "Average": float(average)}
+                            for subject, average in df_avg["Average"].items()]},
+        "encoding": {
+            "x": {"field": "Subject", "type": "nominal", "sort": "-y", "axis": {"labelAngle": -45}},
+            "y": {"field": "Average", "type": "quantitative", "title": "Average Score"},
+        },
+        "layer": [
+            {"mark": {"type": "bar", "tooltip": True},
+             "encoding": {"color": {"field": "Average", "type": "quantitative",
+                                    "scale": {"scheme": "blues"}, "legend": None}}},
+            {"mark": {"type": "text", "dy": -6, "fontWeight": "bold"},
+             "encoding": {"text": {"field": "Average", "format": ".1f"}}},
+        ],
+        "height": 400,
+    }
+
+
+def bucket_heatmap(df_buckets):
+    return {
+        "$schema": SCHEMA,
+        "title": "Score Range Heatmap by Subject",
+        "data": {"values": _bucket_values(df_buckets)},
+        "transform": [{"joinaggregate": [{"op": "max", "field": "Students", "as": "Most"}]}],
+        "encoding": {
+            "x": {"field": "Score Range", "type": "ordinal", "sort": SCORE_BUCKETS},
+            "y": {"field": "Subject", "type": "nominal", "sort": list(df_buckets.index)},
+        },
+        "layer": [
+            {"mark": {"type": "rect", "tooltip": True},
+             "encoding": {"color": {"field": "Students", "type": "quantitative",
+                                    "scale": {"scheme": "blues"}}}},
+            {"mark": {"type": "text"},
+             "encoding": {"text": {"field": "Students", "type": "quantitative"},
+                          "color": {"condition": {"test": "datum.Students > datum.Most / 2", "value": "white"},
+                                    "value": "black"}}},
+        ],
+    }
+
+
+def marks_histogram(scores, subject):
+    # Ten bins with a density curve over them, like sns.histplot(kde=True)
+    return {
+        "$schema": SCHEMA,
+        "title": f"Distribution of Marks in {subject}",
+        "data": {"values": [{"Marks": float(score)} for score in scores]},
+        "layer": [
+            {"mark": {"type": "bar", "color": "skyblue", "tooltip": True},
+             "encoding": {"x": {"field": "Marks", "bin": {"maxbins": 10}, "title": "Marks"},
+                          "y": {"aggregate": "count", "title": "Count"}}},
+            {"transform": [{"density": "Marks"}],
+             "mark": {"type": "line", "color": "steelblue"},
+             "encoding": {"x": {"field": "value", "type": "quantitative"},
+                          "y": {"field": "density", "type": "quantitative", "axis": None}}},
+        ],
+        "resolve": {"scale": {"y": "independent"}},
+        "height": 250,
+    }
@@ -0,0 +1,137 @@
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Matplotlib versions of the dashboard's charts, used for the server-side
+# backend, printing and the PDF reports. Each returns the figure; callers
+# rasterize it with memo_cache.figure_png.
+
+def plot_status_pie(status_counts):
+    fig, ax = plt.subplots(figsize=(6, 6))
+    wedges, texts, autotexts = ax.pie(
+        status_counts.values(), 
+        labels=status_counts.keys(), 
+        autopct='%1.1f%%',
+        colors=['#0d47a1', '#90caf9', '#42a5f5', '#bbdefb'],
+        startangle=90,
+        explode=[0.05 if i == 0 else 0 for i in range(len(status_counts))],  # slight separation
+        shadow=False,
+        textprops={'fontsize': 12, 'color': 'white', 'weight': 'bold'}
+    )
+
+    # Improve legend
+    ax.legend(
+        wedges, 
+        status_counts.keys(),
+        title="Status",
+        loc="center left",
+        bbox_to_anchor=(1, 0, 0.5, 1)
+    )
+
+    # Make percentage labels more visible
+    plt.setp(autotexts, size=12, weight="bold", color='white')
+
+    # Equal aspect ratio ensures pie is drawn as circle
+    ax.axis('equal')  
+    ax.set_title("Overall Result: Pass vs Reappear", pad=20, fontweight='bold')
+
+    plt.tight_layout()
+    return fig
+
+def plot_average_scores(df_avg):
+    fig, ax = plt.subplots(figsize=(14, 8))
+    
+    # Sort scores to get darker colors for higher values
+    scores = df_avg["Average"]
+    ranks = scores.rank(ascending=False).astype(int)  # 1 = highest score
+    n_colors = len(scores)
+    
+    # Generate a reversed Blues palette (darker → lighter)
+    palette = sns.color_palette("Blues", n_colors=n_colors)[::-1]
+    
+    # Map ranks to colors
+    colors = [palette[rank - 1] for rank in ranks]
+
+    sns.barplot(x=df_avg.index, y=scores, palette=colors)
+
+    # Add value labels
+    for i, v in enumerate(scores):
+        ax.text(i, v + 0.5, f"{v:.1f}", ha='center', va='bottom', fontweight='bold')
+
+    plt.xticks(rotation=45, ha="right", fontsize = 8)
+    plt.title("Average Scores by Subject")
+    plt.ylabel("Average Score")
+    plt.tight_layout()
+    return fig
+
+def plot_bucket_heatmap(df_buckets):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.heatmap(df_buckets, annot=True, fmt="d", cmap="Blues", ax=ax)
+    plt.title("Score Range Heatmap by Subject")
+    return fig
+
+def plot_teacher_pie(pass_count, total, title):
+    fig, ax = plt.subplots(figsize=(3.5, 3.5))
+    ax.pie(
+        [pass_count, total - pass_count],
+        labels=["Pass", "Reappear"],
+        autopct='%1.1f%%',
+        colors=['#2e7d32', '#ef5350'],
+        startangle=90
+    )
+    ax.set_title(title)
+    return fig
+
+def plot_marks_histogram(scores, subject):
+    fig, ax = plt.subplots(figsize=(5, 3))
+    sns.histplot(scores, bins=10, kde=True, ax=ax, color="skyblue")
+    ax.set_title(f"Distribution of Marks in {subject}")
+    ax.set_xlabel("Marks")
+    return fig
+
+def plot_enhanced_bar(df, title):
+    colors = sns.color_palette("Blues", n_colors=len(df))[::-1]
+    
+    ax = df.plot(kind='bar', 
+                 width=0.95, 
+                 color=colors,
+                #  edgecolor='black',
+                #  linewidth=0.5,
+                 figsize=(14, 8))
+    
+    # Add value labels on each bar
+    for container in ax.containers:
+        ax.bar_label(container, 
+                    label_type='edge', 
+                    padding=6,
+                    fontsize=5,
+                    rotation = 90,
+                    fmt='%d')
+    
+    plt.title(title, 
+              fontsize=16, 
+              pad=20, 
+              fontweight='bold')
+    plt.xlabel("Subjects", 
+               fontsize=12, 
+               labelpad=10)
+    plt.ylabel("Number of Students", 
+               fontsize=12, 
+               labelpad=10)
+    
+    plt.xticks(rotation=45, 
+               ha="right",
+               fontsize=10)
+    plt.yticks(fontsize=10)
+    
+    plt.grid(axis='y', 
+             linestyle='--', 
+             alpha=0.7)
+    
+    plt.legend(title="Score Range", 
+               bbox_to_anchor=(1.02, 1), 
+               loc='upper left',
+               frameon=True,
+               fontsize=10)
+    
+    plt.tight_layout()
+    return ax.get_figure()
@@ -1,16 +1,26 @@
 import streamlit as st
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
 import json
-import re
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import defaultdict
-from io import StringIO
-from itertools import zip_longest
-from fpdf import FPDF
+import os
+import tempfile
+import time
+from io import BytesIO, StringIO
 import streamlit.components.v1 as components
+import chart_specs
+import perf_trace
+from analysis import AnalysisState, SubjectIndex, analyze, select_rolls
+from memo_cache import MemoCache, content_hash, figure_png
+from rankings import GRAND_TOTAL, RankingEngine, ScoreRanks, add_rank_columns
+from result_cache import ResultCache
+from results_store import is_long_frame, read_json_stream, read_parquet, to_long_frame
+from results_warehouse import ResultsWarehouse
+from student_records import compact_records, to_dicts
+
+# Scraping (requests, BeautifulSoup), matplotlib/seaborn and FPDF are
+# imported where they are first needed, so uploading a file and the default
+# browser-drawn charts don't pay for them on a cold start; see
+# benchmarks/bench_startup.py.
 
 # CSS for print page breaks
 PRINT_CSS = """
@@ -35,355 +45,207 @@ def render_print_button():
         """, height=60)
     
 # ========== Scraping Functions ==========
-def fetch_html(p, q, r):
-    url = "https://results.biserawalpindi.edu.pk/Result_Detail"
-    params = {"p": p, "q": q, "r": r}
-    ###
-    headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 \
-                  (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
-    "Referer": "https://results.biserawalpindi.edu.pk/",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-}
+@st.cache_resource
+def get_result_cache():
+    # One cache connection per server process, shared by all sessions
+    return ResultCache()
+
+@st.cache_resource
+def get_warehouse():
+    # Local results warehouse, shared by all sessions like the cache
+    return ResultsWarehouse()
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def _job_progress(job_id, journal_stamp):
+    from scrape_jobs import ScrapeJob
+    job = ScrapeJob.load(job_id)
+    return job.is_complete(), job.counts()
+
+def job_progress(job_id):
+    # (complete, counts) of a scrape job. Replaying a journal is the slow
+    # part, so it is redone only when the journal's mtime or size changed,
+    # not on every rerun of the page.
+    from scrape_jobs import JOBS_DIR
+    try:
+        stat = os.stat(os.path.join(JOBS_DIR, job_id, "journal.jsonl"))
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        stamp = None
+    return _job_progress(job_id, stamp)
+
+def probe_data(p_values, q=2, r=2025, concurrency=None, rate=None,
+               use_cache=True, institution=None, use_warehouse=False):
+    # Like scrape_data, but ranges are walked with the gap-skipping prober
+    # instead of fetching every number in them
+    from roll_prober import is_hit, probe_rolls
+    from roll_ranges import parse_p_ranges
+    from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE
+    from throttle import AdaptiveThrottle
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    rate = rate or DEFAULT_RATE
+    spans = parse_p_ranges(p_values)
+    span = sum(end - start + 1 for start, end in spans)
+    cache = get_result_cache() if use_cache else None
+    throttle = AdaptiveThrottle(rate=rate, concurrency=concurrency)
 
-    response = requests.get(url, headers=headers)
-
-    ###
-#     headers = {
-#     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-#     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-#     "Accept-Language": "en-US,en;q=0.5",
-#     "Referer": "https://results.biserawalpindi.edu.pk/",
-#     "Connection": "keep-alive",
-# }
-
-    url = f"https://results.biserawalpindi.edu.pk/Result_Detail?p={p}&q=2&r=2025"
-
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  # raises 403 if blocked
-
-    # headers = {"User-Agent": "Mozilla/5.0"}
-    # response = requests.get(url, params=params, headers=headers)
-    # response.raise_for_status()
-    return response.text
-
-def extract_result(html):
-    soup = BeautifulSoup(html, "html.parser")
-    info = {}
-
-    def get_field(label):
-        field = soup.find(string=re.compile(rf"^{label}", re.IGNORECASE))
-        return field.find_next().get_text(strip=True) if field else ""
-
-    info["Roll No"] = get_field("ROLL NO")
-    info["Student Name"] = get_field("STUDENT NAME")
-    info["Student Type"] = get_field("STUDENT TYPE")
-    info["Grand Total"] = get_field("GRAND TOTAL")
-    info["Status"] = get_field("STATUS")
-
-    subject_table = soup.find("table")
-    subjects = []
-
-    if subject_table:
-        rows = subject_table.find_all("tr")
-        headers = [th.get_text(strip=True).upper() for th in rows[0].find_all("th")]
-
-        for row in rows[1:]:
-            cells = row.find_all("td")
-            if len(cells) != len(headers):
-                continue
-
-            values = [td.get_text(strip=True) for td in cells]
-            row_dict = dict(zip(headers, values))
-
-            if not row_dict.get("SUBJECT"):
-                continue
-
-            subject_entry = {
-                "Subject": row_dict.get("SUBJECT", ""),
-                "Theory-I": row_dict.get("THEORY-I", ""),
-                "Theory-II": row_dict.get("THEORY-II", ""),
-                "Practical": row_dict.get("PRACTICAL", ""),
-                "Total": row_dict.get("TOTAL", "")
-            }
-
-            if "PERCENTILE MARKS" in headers:
-                if row_dict.get("PERCENTILE MARKS"):
-                    subject_entry["Percentile Marks"] = row_dict["PERCENTILE MARKS"]
-                if row_dict.get("RELATIVE GRADE"):
-                    subject_entry["Relative Grade"] = row_dict["RELATIVE GRADE"]
-                if row_dict.get("REMARKS"):
-                    subject_entry["Remarks"] = row_dict["REMARKS"]
-
-            subjects.append(subject_entry)
-
-    info["Subjects"] = subjects
-    return info
-
-def parse_p_input(p_input):
-    result = []
-    for part in p_input.split(','):
-        part = part.strip()
-        if '-' in part:
-            start, end = map(int, part.split('-'))
-            result.extend(range(start, end + 1))
-        else:
-            result.append(int(part))
-    return result
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    fetched = [0]
+
+    def on_progress(p, result, error):
+        fetched[0] += 1
+        status_text.text(f"Probing roll number: {p} ({fetched[0]} requests for {span} roll numbers) "
+                         f"at {throttle.rate:.1f} req/s")
+        if error is not None:
+            st.warning(f"Failed for roll number {p}: {str(error)}")
+        progress_bar.progress(min(1.0, (p - spans[0][0] + 1) / max(1, spans[-1][1] - spans[0][0] + 1)))
+
+    prober = probe_rolls(spans, q=q, r=r, concurrency=concurrency, cache=cache,
+                         throttle=throttle, on_progress=on_progress)
+    st.session_state.throttle_stats = throttle.stats()
+    st.session_state.probe_stats = prober.stats()
+
+    progress_bar.progress(1.0)
+    status_text.text("Scraping complete!")
+    results = compact_records(result for p, result, error in prober.results() if is_hit(result))
+    if use_warehouse:
+        get_warehouse().add(results, q, r, institution)
+    return results
+
+def scrape_data(p_values, q=2, r=2025, concurrency=None, rate=None,
+                use_cache=True, job_id=None, probe=False, institution=None, use_warehouse=False):
+    from roll_prober import is_hit
+    from scrape_jobs import ScrapeJob
+    from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE
+    from throttle import AdaptiveThrottle
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    rate = rate or DEFAULT_RATE
+    if probe and not job_id:
+        return probe_data(p_values, q=q, r=r, concurrency=concurrency, rate=rate,
+                          use_cache=use_cache, institution=institution, use_warehouse=use_warehouse)
+
+    # Runs (or resumes) a journaled scrape job so a rerun or crash midway
+    # doesn't lose the rolls already fetched.
+    if job_id:
+        job = ScrapeJob.load(job_id)
+        if use_warehouse and not job.meta.get("institution"):
+            st.warning(f"Job {job_id} has no institution code, so its results aren't saved to the warehouse")
+            use_warehouse = False
+        if use_warehouse:
+            # Rolls finished before the interruption; run() only stores new ones
+            get_warehouse().add(job.results(as_records=True), job.q, job.r, job.meta["institution"],
+                                job.meta.get("name"))
+    else:
+        job = ScrapeJob.create(p_values, q=q, r=r, meta={"institution": institution} if institution else None)
+    st.session_state.scrape_job_id = job.job_id
+    cache = get_result_cache() if use_cache else None
+    hits_before, misses_before = (cache.hits, cache.misses) if cache else (0, 0)
 
-def scrape_data(p_values, q=2, r=2025):
-    p_list = parse_p_input(p_values)
-    all_results = []
+    throttle = AdaptiveThrottle(rate=rate, concurrency=concurrency)
 
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    for i, p in enumerate(p_list):
-        try:
-            status_text.text(f"Fetching roll number: {p} ({i+1}/{len(p_list)})")
-            html = fetch_html(p, q, r)
-            result = extract_result(html)
-            if result.get("Roll No"):  # Only include if valid
-                all_results.append(result)
-        except Exception as e:
-            st.warning(f"Failed for roll number {p}: {str(e)}")
-        
-        progress_bar.progress((i + 1) / len(p_list))
-    
+    live_metrics = st.empty()
+    already_done = len(job.p_list) - len(job.pending())
+    # Running totals updated per result, so the figures show while scraping
+    live = AnalysisState.from_data(job.results(as_records=True))
+
+    def on_progress(done, total, p, result, error):
+        status_text.text(f"Fetched roll number: {p} ({already_done + done}/{len(job.p_list)}) "
+                         f"at {throttle.rate:.1f} req/s, {throttle.limit} parallel")
+        if error is not None:
+            st.warning(f"Failed for roll number {p}: {str(error)}")
+        elif is_hit(result):
+            live.add(result)
+            live_metrics.text(f"{len(live)} students so far, {live.status_counts['PASS']} passed "
+                              f"({100 * live.status_counts['PASS'] / len(live):.1f}%)")
+        progress_bar.progress((already_done + done) / len(job.p_list))
+
+    # Results go into the warehouse in batches as they are fetched
+    job.run(concurrency=concurrency, rate=rate, cache=cache, on_progress=on_progress,
+            throttle=throttle, warehouse=get_warehouse() if use_warehouse else None)
+    st.session_state.throttle_stats = throttle.stats()
+    all_results = job.compact(as_records=True)
+
+    progress_bar.progress(1.0)
     status_text.text("Scraping complete!")
+    if cache is not None:
+        st.session_state.cache_stats = {
+            "hits": cache.hits - hits_before,
+            "misses": cache.misses - misses_before,
+            **{k: v for k, v in cache.stats().items() if k in ("entries", "bytes", "evictions")},
+        }
     return all_results
 
 # ========== Data Processing Functions ==========
 def process_uploaded_file(uploaded_file):
     try:
-        if uploaded_file.type == "application/json":
-            return pd.read_json(uploaded_file)
+        if uploaded_file.name.endswith(".parquet"):
+            return read_parquet(uploaded_file)
+        elif uploaded_file.type == "application/json":
+            # Streamed record by record into the typed long table instead of
+            # building a DataFrame of nested subject lists
+            return read_json_stream(uploaded_file)
         else:
             return pd.read_csv(uploaded_file)
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
         return None
 
-def prepare_analysis(data):
-    # Handle both raw scraped data and uploaded DataFrame
-    if isinstance(data, pd.DataFrame):
-        # Process uploaded file data
-        status_counts = {"PASS": 0, "RE-APPEAR": 0}
-        subject_scores = defaultdict(list)
-        
-        # Convert DataFrame to the same format as scraped data
-        for _, row in data.iterrows():
-            status = row.get("Status", "RE-APPEAR").strip().upper()
-            status_counts[status] += 1
-            
-            # Process subjects - this part needs to match your actual DataFrame structure
-            # You may need to adjust this based on how your uploaded data is structured
-            subjects = eval(row.get("Subjects", "[]")) if isinstance(row.get("Subjects"), str) else row.get("Subjects", [])
-            for subject in subjects:
-                subject_name = subject.get("Subject", "")
-                try:
-                    score = int(subject.get("Total", 0))
-                    subject_scores[subject_name].append(score)
-                except:
-                    continue
-        
-                # Create score buckets
-                score_buckets = ['95+', '90-94', '85-89', '80-84', '75-79', '70-74', '60-69', '50-59', '40-49', '<40']
-                bucket_ranges = {
-                    '95+': lambda x: x >= 95,
-                    '90-94': lambda x: 90 <= x < 95,
-                    '85-89': lambda x: 85 <= x < 90,
-                    '80-84': lambda x: 80 <= x < 85,
-                    '75-79': lambda x: 75 <= x < 80,
-                    '70-74': lambda x: 70 <= x < 75,
-                    '60-69': lambda x: 60 <= x < 70,
-                    '50-59': lambda x: 50 <= x < 60,
-                    '40-49': lambda x: 40 <= x < 50,
-                    '<40': lambda x: x < 40
-                }
-        
-        subject_bucket_counts = defaultdict(lambda: defaultdict(int))
-        
-        for subject, scores in subject_scores.items():
-            for score in scores:
-                for bucket, rule in bucket_ranges.items():
-                    if rule(score):
-                        subject_bucket_counts[subject][bucket] += 1
-                        break
-        
-        # Ensure all buckets are present for each subject
-        for subject in subject_bucket_counts:
-            for bucket in score_buckets:
-                if bucket not in subject_bucket_counts[subject]:
-                    subject_bucket_counts[subject][bucket] = 0
-        
-        df_buckets = pd.DataFrame(subject_bucket_counts).fillna(0).astype(int).T
-        # Reorder columns to match score_buckets
-        df_buckets = df_buckets[score_buckets] if all(b in df_buckets.columns for b in score_buckets) else df_buckets
-        
-        df_avg = pd.DataFrame({subj: [sum(scores)/len(scores)] for subj, scores in subject_scores.items()},
-                              index=["Average"]).T.sort_values("Average", ascending=False)
-        
-        return status_counts, df_buckets, df_avg, subject_scores
-    
-    else:
-        # Process scraped data (original implementation)
-        status_counts = {"PASS": 0, "RE-APPEAR": 0}
-        # Create score buckets
-        score_buckets = ['95+', '90-94', '85-89', '80-84', '75-79', '70-74', '60-69', '50-59', '40-49', '<40']
-        bucket_ranges = {
-            '95+': lambda x: x >= 95,
-            '90-94': lambda x: 90 <= x < 95,
-            '85-89': lambda x: 85 <= x < 90,
-            '80-84': lambda x: 80 <= x < 85,
-            '75-79': lambda x: 75 <= x < 80,
-            '70-74': lambda x: 70 <= x < 75,
-            '60-69': lambda x: 60 <= x < 70,
-            '50-59': lambda x: 50 <= x < 60,
-            '40-49': lambda x: 40 <= x < 50,
-            '<40': lambda x: x < 40
-        }
-
-        subject_bucket_counts = defaultdict(lambda: defaultdict(int))
-        subject_scores = defaultdict(list)
-
-        for student in data:
-            status = student.get("Status", "RE-APPEAR").strip().upper()
-            status_counts[status] += 1
+@st.cache_resource
+def get_memo_cache():
+    # Analysis results and rendered charts by dataset content, shared by all sessions
+    return MemoCache()
+
+def get_analysis_state(data):
+    # Returns (content hash, AnalysisState). Worked out once per data source
+    # and kept in the session, so reruns from widget clicks reuse the
+    # aggregates; the same data loaded in another session hits the memo.
+    cached = st.session_state.get("analysis_state")
+    if cached is None or cached[0] is not data:
+        data_key = content_hash(data)
+        state = get_memo_cache().get_or_compute(("analysis", data_key), lambda: AnalysisState.from_data(data),
+                                                size=AnalysisState.nbytes)
+        cached = (data, data_key, state)
+        st.session_state.analysis_state = cached
+    return cached[1], cached[2]
 
-            for subject in student.get("Subjects", []):
-                subject_name = subject["Subject"]
-                try:
-                    score = int(subject["Total"])
-                except:
-                    continue
-
-                subject_scores[subject_name].append(score)
-
-                for bucket, rule in bucket_ranges.items():
-                    if rule(score):
-                        subject_bucket_counts[subject_name][bucket] += 1
-                        break
-
-        # Ensure all buckets are present for each subject
-        for subject in subject_bucket_counts:
-            for bucket in score_buckets:
-                if bucket not in subject_bucket_counts[subject]:
-                    subject_bucket_counts[subject][bucket] = 0
-
-        df_buckets = pd.DataFrame(subject_bucket_counts).fillna(0).astype(int).T
-        # Reorder columns to match score_buckets
-        df_buckets = df_buckets[score_buckets] if all(b in df_buckets.columns for b in score_buckets) else df_buckets
-        
-        df_avg = pd.DataFrame({subj: [sum(scores)/len(scores)] for subj, scores in subject_scores.items()},
-                              index=["Average"]).T.sort_values("Average", ascending=False)
-        
-        return status_counts, df_buckets, df_avg, subject_scores
+def prepare_analysis(data):
+    # Handles the columnar store, raw scraped data and uploaded DataFrames
+    # alike; see analysis.py
+    return analyze(data)
 
 # ========== Visualization Functions ==========
-# def plot_subject_group(selected_group, subject_scores):
-#     # Filter scores based on selected group
-#     group_scores = {subj: scores for subj, scores in subject_scores.items() if subj in selected_group}
-#     if not group_scores:
-#         return None
-
-#     # Create DataFrame with NaN padding for unequal lengths
-#     df = pd.DataFrame(dict(zip(group_scores.keys(), zip_longest(*group_scores.values()))))
-
-#     # Calculate mean scores for each subject
-#     mean_scores = df.mean().sort_values(ascending=False)
-
-#     # Plot bar chart
-#     plt.figure(figsize=(10, 6))
-#     bars = plt.bar(mean_scores.index, mean_scores.values, color=sns.color_palette("Blues", len(mean_scores)))
-
-#     # Add value labels on bars
-#     for bar in bars:
-#         height = bar.get_height()
-#         plt.text(bar.get_x() + bar.get_width()/2, height + 0.5, f'{height:.1f}', ha='center', fontweight='bold')
-
-#     plt.title(f"Average Scores in {', '.join(selected_group)}", pad=20)
-#     plt.ylabel("Average Score")
-#     plt.xticks(rotation=45, ha="right")
-#     plt.tight_layout()
-
-#     return plt
 
-# def show_top_scorers_table(groups, subject_scores, full_data):
-#     for group in groups:
-#         group_name = group["name"]
-#         selected_subjects = group["subjects"]
-
-#         group_scores = {subj: scores for subj, scores in subject_scores.items() if subj in selected_subjects}
-#         if not group_scores:
-#             st.warning(f"No data for group '{group_name}'")
-#             continue
-
-#         df = pd.DataFrame(dict(zip(group_scores.keys(), zip_longest(*group_scores.values()))))
-#         df["Total"] = df.sum(axis=1)
-
-#         full_df = df.copy()
-#         full_df["Roll No"] = full_data["Roll No"].values[:len(df)]
-#         full_df["Student Name"] = full_data["Student Name"].values[:len(df)]
-#         full_df["Grand Total"] = full_data["Grand Total"].values[:len(df)]
-
-#         available_subjects = [s for s in selected_subjects if s in full_df.columns]
-
-#         columns_to_show = ["Roll No", "Student Name", "Grand Total"] + available_subjects
-#         top5 = full_df.sort_values("Total", ascending=False).head(5)[columns_to_show]
-
-#         st.markdown(f"**Top 5 Scorers in Group: {group_name}**")
-#         st.dataframe(top5.reset_index(drop=True), use_container_width=True)
-
-
-def plot_enhanced_bar(df, title):
-    plt.figure(figsize=(14, 8))
-    colors = sns.color_palette("Blues", n_colors=len(df))[::-1]
-    
-    ax = df.plot(kind='bar', 
-                 width=0.95, 
-                 color=colors,
-                #  edgecolor='black',
-                #  linewidth=0.5,
-                 figsize=(14, 8))
-    
-    # Add value labels on each bar
-    for container in ax.containers:
-        ax.bar_label(container, 
-                    label_type='edge', 
-                    padding=6,
-                    fontsize=5,
-                    rotation = 90,
-                    fmt='%d')
-    
-    plt.title(title, 
-              fontsize=16, 
-              pad=20, 
-              fontweight='bold')
-    plt.xlabel("Subjects", 
-               fontsize=12, 
-               labelpad=10)
-    plt.ylabel("Number of Students", 
-               fontsize=12, 
-               labelpad=10)
-    
-    plt.xticks(rotation=45, 
-               ha="right",
-               fontsize=10)
-    plt.yticks(fontsize=10)
-    
-    plt.grid(axis='y', 
-             linestyle='--', 
-             alpha=0.7)
-    
-    plt.legend(title="Score Range", 
-               bbox_to_anchor=(1.02, 1), 
-               loc='upper left',
-               frameon=True,
-               fontsize=10)
-    
-    plt.tight_layout()
-    return plt
+BROWSER_CHARTS = "Browser (Vega-Lite)"
+SERVER_CHARTS = "Server (matplotlib)"
+
+def show_chart(name, key, *args):
+    # Builds a chart once per name and key (the dataset's content hash plus
+    # any parameters); reruns show the cached spec or image. Browser charts
+    # ship a Vega-Lite spec; server charts a PNG rasterized by matplotlib.
+    draw, spec = CHARTS[name]
+    backend = st.session_state.get("chart_backend", BROWSER_CHARTS)
+    with perf_trace.span(f"render {name}", backend=backend):
+        if backend == BROWSER_CHARTS:
+            chart = get_memo_cache().get_or_compute(("chart_spec", name, key), lambda: spec(*args),
+                                                    size=lambda s: len(json.dumps(s)))
+            st.vega_lite_chart(chart)
+        else:
+            import charts  # matplotlib and seaborn, only for server charts
+            png = get_memo_cache().get_or_compute(("chart", name, key),
+                                                  lambda: figure_png(getattr(charts, draw)(*args)))
+            st.image(png, use_container_width=True)
+
+# chart name -> (matplotlib figure function in charts.py, Vega-Lite spec function)
+CHARTS = {
+    "status_pie": ("plot_status_pie", chart_specs.status_pie),
+    "bucket_bars": ("plot_enhanced_bar", chart_specs.bucket_bars),
+    "average_bars": ("plot_average_scores", chart_specs.average_bars),
+    "bucket_heatmap": ("plot_bucket_heatmap", chart_specs.bucket_heatmap),
+    "teacher_pie": ("plot_teacher_pie", chart_specs.teacher_pie),
+    "marks_histogram": ("plot_marks_histogram", chart_specs.marks_histogram),
+}
 #######
 # plt.savefig("subject_score_distribution.png")
 # plt.close()
@@ -408,14 +270,14 @@ def page1():
     
     input_method = st.radio(
         "Choose your input method:",
-        ("Upload JSON File", "Enter Roll Numbers Manually"),
+        ("Upload JSON File", "Enter Roll Numbers Manually", "Load from Results Warehouse"),
         horizontal=True
     )
     
     if input_method == "Upload JSON File":
         uploaded_file = st.file_uploader(
-            "Upload your JSON file ",
-            type=["json"],
+            "Upload your JSON or Parquet file ",
+            type=["json", "parquet"],
             accept_multiple_files=False,
             key="file_uploader"
         )
@@ -425,12 +287,42 @@ def page1():
             if processed_data is not None:
                 st.session_state.processed_data = processed_data
                 st.success("File processed successfully!")
+                if is_long_frame(processed_data):
+                    st.caption(f"{processed_data['Roll No'].nunique()} students, {len(processed_data)} subject rows, "
+                               f"{processed_data.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory")
                 st.dataframe(processed_data.head())
                 
                 if st.button("Proceed to Visualization"):
                     st.session_state.page = "page2"
                     st.rerun()
-    
+
+    elif input_method == "Load from Results Warehouse":
+        warehouse = get_warehouse()
+        datasets = warehouse.datasets()
+        if not datasets:
+            st.info("The results warehouse is empty. Scrape with \"Save to results warehouse\" ticked, "
+                    "or import a file with `python results_warehouse.py import`.")
+        else:
+            labels = [f"{d['institution'] or 'No institution'} {d['name'] or ''} | Q {d['q']}, {d['r']} | "
+                      f"{d['students']} students" for d in datasets]
+            choice = st.selectbox("Institution, session and year", range(len(datasets)),
+                                  format_func=labels.__getitem__)
+            if st.button("Load Results"):
+                d = datasets[choice]
+                processed_data = warehouse.load(d["institution"], d["q"], d["r"])
+                if d["institution"] is None:
+                    # students stored without an institution code
+                    processed_data = processed_data[processed_data["Institution"].isna()].reset_index(drop=True)
+                st.session_state.processed_data = processed_data
+            processed_data = st.session_state.processed_data
+            if is_long_frame(processed_data) and "Institution" in processed_data:
+                st.success(f"Loaded {processed_data['Roll No'].nunique()} students, "
+                           f"{len(processed_data)} subject rows")
+                st.dataframe(processed_data.head())
+                if st.button("Proceed to Visualization"):
+                    st.session_state.page = "page2"
+                    st.rerun()
+
     else:
         roll_numbers = st.text_area(
             "Enter 6-digit roll numbers (comma separated or ranges with hyphen)",
@@ -467,42 +359,108 @@ def page1():
             except Exception as e:
                 st.error(f"Error processing input: {str(e)}")
         
+        from scrape_jobs import list_jobs
+        from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE
         with st.expander("Advanced Options"):
             col1, col2 = st.columns(2)
             with col1:
                 q_value = st.number_input("Q Parameter (default 2)", min_value=1, value=2)
             with col2:
                 r_value = st.number_input("R Parameter (Year, default 2025)", min_value=2000, value=2025)
-        
-        if st.button("Start Scraping", disabled=not ('valid_rolls' in st.session_state)):
+            col3, col4 = st.columns(2)
+            with col3:
+                concurrency = st.number_input("Parallel Requests", min_value=1, max_value=32,
+                                              value=DEFAULT_CONCURRENCY)
+            with col4:
+                rate = st.number_input("Starting Requests per Second", min_value=0.5,
+                                       value=DEFAULT_RATE, step=0.5)
+            use_cache = st.checkbox("Use local result cache", value=True,
+                                    help="Reuse pages fetched earlier for the same session and year")
+            if st.button("Clear Cache"):
+                get_result_cache().clear()
+                st.success("Result cache cleared")
+            probe = st.checkbox("Skip empty stretches in ranges", value=False,
+                                help="Samples ahead through runs of non-existent roll numbers instead "
+                                     "of fetching every number in a range")
+            col5, col6 = st.columns(2)
+            with col5:
+                institution = st.text_input("Institution Code", value="",
+                                            help="Stored with the results, e.g. 107004") or None
+            with col6:
+                # Needs a code: results stored without one can't be told apart later
+                use_warehouse = st.checkbox("Save to results warehouse", value=False, disabled=not institution,
+                                            help="Keep the results in the local warehouse to load "
+                                                 "them later without scraping or uploading again; "
+                                                 "needs an Institution Code") and bool(institution)
+
+        # Offer to pick up scrape jobs that were interrupted
+        resume_job_id = None
+        unfinished = []
+        for job_id in list_jobs()[:20]:
+            complete, counts = job_progress(job_id)
+            if not complete:
+                unfinished.append((job_id, counts))
+        if unfinished:
+            with st.expander("Resume Interrupted Scrape"):
+                labels = {job_id: f"{job_id} ({counts['pending']} of {counts['total']} rolls left)"
+                          for job_id, counts in unfinished}
+                choice = st.selectbox("Job", list(labels), format_func=labels.get)
+                if st.button("Resume Job"):
+                    resume_job_id = choice
+
+        start = st.button("Start Scraping", disabled=not ('valid_rolls' in st.session_state))
+        if start or resume_job_id:
             st.session_state.scraping_started = True
             
             try:
-                scraped_data = scrape_data(st.session_state.valid_rolls, q=q_value, r=r_value)
+                scraped_data = scrape_data(st.session_state.get("valid_rolls", ""), q=q_value, r=r_value,
+                                           concurrency=concurrency, rate=rate,
+                                           use_cache=use_cache, job_id=resume_job_id, probe=probe,
+                                           institution=institution, use_warehouse=use_warehouse)
                 st.session_state.scraped_results = scraped_data
                 st.session_state.scraping_complete = True
                 
                 # Convert to DataFrame for better display
-                df_results = pd.json_normalize(
-                    scraped_data,
-                    meta=['Roll No', 'Student Name', 'Student Type', 'Grand Total', 'Status'],
-                    record_path='Subjects',
-                    errors='ignore'
-                )
+                df_results = to_long_frame(scraped_data, q=q_value, r=r_value)
                 
                 st.success("Scraping completed successfully!")
+                if probe and not resume_job_id and "probe_stats" in st.session_state:
+                    stats = st.session_state.probe_stats
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Roll Numbers in Ranges", stats["span"])
+                    c2.metric("Requests Made", stats["requested"])
+                    c3.metric("Requests Saved", stats["saved"], f"{stats['saved_pct']:.1f}%")
+                if use_cache and "cache_stats" in st.session_state:
+                    stats = st.session_state.cache_stats
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Cache Hits", stats["hits"])
+                    c2.metric("Cache Misses (fetched)", stats["misses"])
+                    c3.metric("Cached Pages", stats["entries"],
+                              help=f"{stats['bytes'] / 1e6:.1f} MB on disk, {stats['evictions']} evicted")
+                if "throttle_stats" in st.session_state:
+                    stats = st.session_state.throttle_stats
+                    if stats["blocks"] or stats["errors"]:
+                        st.info(f"The board's server pushed back: {stats['blocks']} blocked responses, "
+                                f"{stats['retries']} retries, circuit breaker tripped "
+                                f"{stats['breaker_trips']} time(s). Final rate {stats['rate']} req/s.")
                 
                 # Add download buttons
                 st.subheader("Download Scraped Data")
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    # CSV Download
-                    pass
+                    # CSV Download, with each mark's and grand total's rank
+                    # and percentile among the scraped students
+                    st.download_button(
+                        label="Download as CSV",
+                        data=add_rank_columns(df_results).to_csv(index=False),
+                        file_name='bise_results.csv',
+                        mime='text/csv',
+                    )
                 
                 with col2:
                     # JSON Download
-                    json_data = json.dumps(scraped_data, indent=2)
+                    json_data = json.dumps(to_dicts(scraped_data), indent=2)
                     st.download_button(
                         label="Download as JSON",
                         data=json_data,
@@ -510,6 +468,17 @@ def page1():
                         mime='application/json',
                     )
                 
+                with col3:
+                    # Parquet Download (typed columns, much faster to load back)
+                    parquet_data = BytesIO()
+                    df_results.to_parquet(parquet_data, index=False)
+                    st.download_button(
+                        label="Download as Parquet",
+                        data=parquet_data.getvalue(),
+                        file_name='bise_results.parquet',
+                        mime='application/octet-stream',
+                    )
+                
             # if st.button("Proceed to Visualization"):
             #     st.session_state.page = "page2"
             #     st.rerun()
@@ -529,9 +498,15 @@ def page2():
             st.rerun()
         return
     
+    started = time.perf_counter()
+    st.radio("Chart rendering", (BROWSER_CHARTS, SERVER_CHARTS), horizontal=True, key="chart_backend",
+             help="Browser charts are drawn client-side from Vega-Lite specs; server charts are "
+                  "matplotlib images, as used for printing")
+
     # Prepare data
-    data_source = st.session_state.processed_data if 'processed_data' in st.session_state else st.session_state.scraped_results
-    status_counts, df_buckets, df_avg, subject_scores = prepare_analysis(data_source)
+    data_source = st.session_state.processed_data if st.session_state.get('processed_data') is not None else st.session_state.scraped_results
+    data_key, analysis_state = get_analysis_state(data_source)
+    status_counts, df_buckets, df_avg, subject_scores = analysis_state.result()
     
     # Overall metrics
     st.header("Overall Performance")
@@ -546,133 +521,98 @@ def page2():
     
     with tab1:
         st.subheader("Pass vs Reappear")
-        fig, ax = plt.subplots(figsize=(6, 6))
-        wedges, texts, autotexts = ax.pie(
-            status_counts.values(), 
-            labels=status_counts.keys(), 
-            autopct='%1.1f%%',
-            colors=['#0d47a1', '#90caf9'],
-            startangle=90,
-            explode=(0.05, 0),  # slight separation
-            shadow=False,
-            textprops={'fontsize': 12, 'color': 'white', 'weight': 'bold'}
-        )
-
-        # Improve legend
-        ax.legend(
-            wedges, 
-            status_counts.keys(),
-            title="Status",
-            loc="center left",
-            bbox_to_anchor=(1, 0, 0.5, 1)
-        )
-
-        # Make percentage labels more visible
-        plt.setp(autotexts, size=12, weight="bold", color='white')
-
-        # Equal aspect ratio ensures pie is drawn as circle
-        ax.axis('equal')  
-        ax.set_title("Overall Result: Pass vs Reappear", pad=20, fontweight='bold')
-
-        plt.tight_layout()
-        st.pyplot(fig)
+        show_chart("status_pie", data_key, status_counts)
 
 
         st.subheader("Score Distribution by Subject")
         if not df_buckets.empty:
-            fig = plot_enhanced_bar(df_buckets, "Subject-wise Score Distribution")
-            st.pyplot(fig)
+            show_chart("bucket_bars", data_key, df_buckets, "Subject-wise Score Distribution")
         else:
             st.warning("No score distribution data available")
         
         st.subheader("Average Scores by Subject")
         if not df_avg.empty:
-            fig, ax = plt.subplots(figsize=(14, 8))
-            
-            # Sort scores to get darker colors for higher values
-            scores = df_avg["Average"]
-            ranks = scores.rank(ascending=False).astype(int)  # 1 = highest score
-            n_colors = len(scores)
-            
-            # Generate a reversed Blues palette (darker → lighter)
-            palette = sns.color_palette("Blues", n_colors=n_colors)[::-1]
-            
-            # Map ranks to colors
-            colors = [palette[rank - 1] for rank in ranks]
-
-            sns.barplot(x=df_avg.index, y=scores, palette=colors)
-
-            # Add value labels
-            for i, v in enumerate(scores):
-                ax.text(i, v + 0.5, f"{v:.1f}", ha='center', va='bottom', fontweight='bold')
-
-            plt.xticks(rotation=45, ha="right", fontsize = 8)
-            plt.title("Average Scores by Subject")
-            plt.ylabel("Average Score")
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart("average_bars", data_key, df_avg)
 
         else:
             st.warning("No average score data available")
-    # Prepare full_data for top scorers (must include Roll No and Student Name)
-        if st.session_state.processed_data is not None:
-            df_raw_data = st.session_state.processed_data.copy()
-        elif st.session_state.scraped_results is not None:
-            df_raw_data = pd.DataFrame([
-                {
-                    "Roll No": record["Roll No"],
-                    "Student Name": record["Student Name"],
-                    **{s["Subject"]: s["Marks"] for s in record["Subjects"]}
-                }
-                for record in st.session_state.scraped_results
-            ])
-        else:
-            df_raw_data = pd.DataFrame(columns=["Roll No", "Student Name"])
 
 
     with tab2:
-        # st.subheader("Subject Group Analysis")
-
-        # if "saved_subject_groups" not in st.session_state:
-        #     st.session_state.saved_subject_groups = []
-        # if "temp_subjects" not in st.session_state:
-        #     st.session_state.temp_subjects = []
-
-        # all_subjects = list(subject_scores.keys())
-        # st.markdown("### Create New Group")
-
-        # # Checkboxes for each subject
-        # selected_subjects = []
-        # cols = st.columns(4)
-        # for i, subject in enumerate(all_subjects):
-        #     with cols[i % 4]:
-        #         if st.checkbox(subject, value=subject in st.session_state.temp_subjects, key=f"sub_chk_{subject}"):
-        #             selected_subjects.append(subject)
-        # st.session_state.temp_subjects = selected_subjects
-
-        # group_name = st.text_input("Group Name")
-
-        # if st.button("Save Group"):
-        #     if group_name and selected_subjects:
-        #         st.session_state.saved_subject_groups.append({
-        #             "name": group_name,
-        #             "subjects": selected_subjects
-        #         })
-        #         st.success(f"Group '{group_name}' saved.")
-        #         st.session_state.temp_subjects = []
-
-        # if st.session_state.saved_subject_groups:
-        #         show_top_scorers_table(st.session_state.saved_subject_groups, subject_scores, df_raw_data)
-        pass
+        # Partial-selection rankings, built once per dataset
+        rankings = get_memo_cache().get_or_compute(
+            ("rankings", data_key), lambda: RankingEngine.from_data(data_source), size=RankingEngine.nbytes)
+
+        st.subheader("Top Scorers by Subject")
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            top_subject = st.selectbox("Subject", rankings.subjects, key="top_subject")
+        with col2:
+            top_count = st.number_input("Top N", min_value=1, max_value=100, value=5, key="top_count")
+        with col3:
+            include_ties = st.checkbox("Include ties", value=True, key="top_ties",
+                                       help="Also list everyone level with the last place")
+        if top_subject:
+            st.dataframe(rankings.top_subject(top_subject, top_count, include_ties), hide_index=True)
+
+        st.subheader("Subject Group Analysis")
+
+        if "saved_subject_groups" not in st.session_state:
+            st.session_state.saved_subject_groups = []
+
+        st.markdown("### Create New Group")
+        selected_subjects = st.multiselect("Subjects in Group", rankings.subjects, key="group_subjects")
+        group_name = st.text_input("Group Name")
+
+        if st.button("Save Group"):
+            if group_name and selected_subjects:
+                st.session_state.saved_subject_groups.append({
+                    "name": group_name,
+                    "subjects": selected_subjects
+                })
+                st.success(f"Group '{group_name}' saved.")
+
+        for group in st.session_state.saved_subject_groups:
+            top_group = rankings.top_group(group["subjects"], top_count, include_ties)
+            st.markdown(f"**Top {top_count} Scorers in Group: {group['name']}** ({', '.join(group['subjects'])})")
+            if top_group.empty:
+                st.warning(f"No student has marks in every subject of group '{group['name']}'")
+            else:
+                st.dataframe(top_group, hide_index=True)
+
+        st.subheader("Student Standing")
+        # Sorted scores per subject, built once per dataset; each lookup is
+        # a binary search
+        score_ranks = get_memo_cache().get_or_compute(
+            ("score_ranks", data_key), lambda: ScoreRanks(subject_scores, rankings.grand_totals),
+            size=ScoreRanks.nbytes)
+        standing_roll = st.number_input("Roll Number", min_value=0, step=1, value=None, key="standing_roll")
+        if standing_roll is not None:
+            student = np.flatnonzero(rankings.rolls == standing_roll)
+            if not len(student):
+                st.warning(f"Roll number {standing_roll} is not in this dataset")
+            else:
+                st.markdown(f"**{rankings.names[student[0]]}**")
+                rows = []
+                for subject in rankings.subjects + [GRAND_TOTAL]:
+                    mark = (rankings.grand_totals[student] if subject == GRAND_TOTAL
+                            else rankings.marks(subject, student))[0]
+                    if np.isnan(mark) or not score_ranks.students(subject):
+                        continue
+                    rows.append({
+                        "Subject": subject,
+                        "Marks": int(mark),
+                        "Rank": int(score_ranks.rank(subject, mark)),
+                        "Out of": score_ranks.students(subject),
+                        "Percentile": round(float(score_ranks.percentile(subject, mark)), 2),
+                    })
+                st.dataframe(pd.DataFrame(rows), hide_index=True)
 
     
     with tab3:
         st.subheader("Heatmap of Performance")
         if not df_buckets.empty:
-            fig, ax = plt.subplots(figsize=(12, 8))
-            sns.heatmap(df_buckets, annot=True, fmt="d", cmap="Blues", ax=ax)
-            plt.title("Score Range Heatmap by Subject")
-            st.pyplot(fig)
+            show_chart("bucket_heatmap", data_key, df_buckets)
         else:
             st.warning("No data available for heatmap")
 
@@ -686,24 +626,17 @@ def page2():
         if st.button("Add Teacher"):
             st.session_state.teacher_entries.append({
                 "name": "",
-                "rolls": [],
+                "rolls": set(),
+                "roll_input": "",
+                "whole_subject": False,
                 "subject": "",
                 "show_graphs": False  # Track if graphs should be shown
             })
 
-        # Roll number mapping
-        roll_map = {
-            r['Roll No']: r for r in data_source
-        } if isinstance(data_source, list) else {
-            row['Roll No']: row.to_dict() for _, row in data_source.iterrows()
-        }
-
-        # Extract subject list
-        all_subjects = set()
-        for r in roll_map.values():
-            for subj in r.get("Subjects", []):
-                all_subjects.add(subj.get("Subject", ""))
-        all_subjects = sorted(all_subjects)
+        # Per-subject (roll, total, pass) index, built once per dataset
+        subject_index = get_memo_cache().get_or_compute(
+            ("subject_index", data_key), lambda: SubjectIndex.from_data(data_source), size=SubjectIndex.nbytes)
+        all_subjects = subject_index.subjects
 
         for idx, teacher in enumerate(st.session_state.teacher_entries):
             st.markdown(f"Teacher {idx + 1}")
@@ -719,40 +652,35 @@ def page2():
                 key=f"subject_{idx}"
             )
 
-            # Checkboxes for selecting roll numbers
-            selected_rolls = []
-            with st.expander(f"Select Students (Roll Numbers) for {teacher['name'] or f'Teacher {idx+1}'}"):
-                for roll_no in roll_map.keys():
-                    checked = roll_no in teacher["rolls"]
-                    if st.checkbox(f"{roll_no}", checked, key=f"{roll_no}_{idx}"):
-                        selected_rolls.append(roll_no)
-
-            teacher["rolls"] = selected_rolls
+            # Roll numbers as a list/ranges, or everyone who took the subject
+            teacher["whole_subject"] = st.checkbox(
+                f"All students who took {teacher['subject']}", value=teacher.get("whole_subject", False),
+                key=f"whole_subject_{idx}"
+            )
+            teacher["roll_input"] = st.text_input(
+                f"Roll Numbers for {teacher['name'] or f'Teacher {idx+1}'}",
+                value=teacher.get("roll_input", ""),
+                key=f"rolls_{idx}",
+                disabled=teacher["whole_subject"],
+                help="Comma separated numbers or ranges with hyphen, e.g. 100001-100040, 100052"
+            )
+            try:
+                if teacher["whole_subject"]:
+                    teacher["rolls"] = subject_index.subject_rolls(teacher["subject"])
+                else:
+                    teacher["rolls"] = select_rolls(teacher["roll_input"], subject_index.rolls)
+            except ValueError:
+                st.error("Invalid format. Use comma separated numbers or ranges (e.g., 100001-100005)")
+                teacher["rolls"] = set()
+            st.caption(f"{len(teacher['rolls'])} students selected")
 
             # Save selection
             if st.button(f"Save Selections for Teacher {idx+1}"):
                 teacher["show_graphs"] = True
 
             if teacher.get("show_graphs", False):
-                selected_results = [roll_map[r] for r in teacher["rolls"] if r in roll_map]
                 selected_subject = teacher["subject"]
-
-                pass_count = 0
-                subject_scores = []
-
-                for student in selected_results:
-                    subjects = student.get("Subjects", [])
-                    for subj in subjects:
-                        if subj.get("Subject") == selected_subject:
-                            try:
-                                score = float(subj.get("Total", 0))
-                                if student.get("Status", "").upper() == "PASS":
-                                    pass_count += 1
-                                subject_scores.append(score)
-                            except (ValueError, TypeError):
-                                continue
-
-                total = len(selected_results)
+                total, pass_count, subject_scores = subject_index.lookup(selected_subject, teacher["rolls"])
 
                 col1, col2 = st.columns(2)
 
@@ -760,33 +688,98 @@ def page2():
                     st.markdown(f"**{pass_count} Passed** / **{total - pass_count} Reappeared**")
 
                     if total > 0:
-                        fig, ax = plt.subplots(figsize=(3.5, 3.5))
-                        ax.pie(
-                            [pass_count, total - pass_count],
-                            labels=["Pass", "Reappear"],
-                            autopct='%1.1f%%',
-                            colors=['#2e7d32', '#ef5350'],
-                            startangle=90
-                        )
-                        ax.set_title(f"{teacher['name']} - {selected_subject}")
-                        st.pyplot(fig)
+                        title = f"{teacher['name']} - {selected_subject}"
+                        show_chart("teacher_pie", (pass_count, total, title), pass_count, total, title)
                     else:
                         st.warning("No students selected for this teacher to display pie chart.")
 
                 with col2:
                     if subject_scores:
-                        fig, ax = plt.subplots(figsize=(5, 3))
-                        sns.histplot(subject_scores, bins=10, kde=True, ax=ax, color="skyblue")
-                        ax.set_title(f"Distribution of Marks in {selected_subject}")
-                        ax.set_xlabel("Marks")
-                        st.pyplot(fig)
+                        show_chart("marks_histogram", (selected_subject, tuple(subject_scores)),
+                                   subject_scores, selected_subject)
                     else:
                         st.info("No valid scores available for selected subject.")
     
+    # The same sections as a PDF, with the teachers whose graphs are shown
+    st.header("PDF Report")
+    if st.button("Build PDF Report"):
+        teachers = [(t["name"] or f"Teacher {i + 1}", t["subject"], t["rolls"])
+                    for i, t in enumerate(st.session_state.teacher_entries) if t.get("show_graphs")]
+        from pdf_reports import institution_report
+        # The chart PNGs only live as long as the build, so interactive
+        # builds don't pile up files on the server
+        with st.spinner("Building PDF report..."), tempfile.TemporaryDirectory() as assets_dir:
+            pdf = institution_report(data_source, st.session_state.school_name, teachers,
+                                     assets_dir=assets_dir, subject_index=subject_index)
+            st.session_state.pdf_report = (data_key, pdf.pdf_bytes())
+    if st.session_state.get("pdf_report", (None,))[0] == data_key:
+        st.download_button(
+            label="Download PDF Report",
+            data=st.session_state.pdf_report[1],
+            file_name=f"{st.session_state.school_name or 'result'}_report.pdf",
+            mime="application/pdf",
+        )
+
+    # Server-side time to build this page with each chart backend (the
+    # browser still has to draw Vega-Lite charts after this)
+    render_times = st.session_state.setdefault("render_times", {})
+    render_times.setdefault(st.session_state.chart_backend, []).append(time.perf_counter() - started)
+    with st.expander("Page Render Times"):
+        st.table(pd.DataFrame({
+            backend: {"renders": len(times), "first (s)": round(times[0], 3),
+                      "latest (s)": round(times[-1], 3), "median (s)": round(float(pd.Series(times).median()), 3)}
+            for backend, times in render_times.items()
+        }).T)
+
+    with st.expander("Cache Statistics"):
+        stats = get_memo_cache().stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Hit Rate", f"{100 * stats['hit_rate']:.1f}%", help=f"{stats['hits']} hits, {stats['misses']} misses")
+        c2.metric("Cached Items", stats["entries"], help=f"{stats['evictions']} evicted")
+        c3.metric("Cache Size", f"{stats['bytes'] / 1e6:.1f} MB")
+        st.table(pd.DataFrame(stats["kinds"]).T.rename(columns={"hit_rate": "hit rate"}))
+
     if st.button("Back to Data Input Page"):
         st.session_state.page = "page1"
         st.rerun()
 
+# ========== Performance Panel ==========
+def performance_panel(trace):
+    # Spans and counters recorded in this session by perf_trace
+    stages = trace.stages()
+    counters = trace.counters
+    st.sidebar.header("Performance")
+
+    fetch, parse = stages.get("fetch"), stages.get("parse")
+    analysis = [v["total ms"] for k, v in stages.items() if k.startswith("analysis")]
+    c1, c2 = st.sidebar.columns(2)
+    c1.metric("Requests/sec", f"{fetch['calls'] / fetch['window s']:.1f}" if fetch and fetch["window s"] else "-")
+    c2.metric("Downloaded", f"{counters.get('bytes downloaded', 0) / 1e6:.2f} MB")
+    c1.metric("Parse ms/page", f"{parse['mean ms']:.2f}" if parse else "-")
+    c2.metric("Analysis ms", f"{sum(analysis):.0f}" if analysis else "-")
+
+    renders = {k[len("render "):]: v for k, v in stages.items() if k.startswith("render ")}
+    if renders:
+        st.sidebar.markdown("**Render ms per chart**")
+        st.sidebar.dataframe(pd.DataFrame(renders).T[["calls", "mean ms", "max ms"]])
+    hits = {k: v for k, v in counters.items() if k.endswith(" hits") or k.endswith(" misses")}
+    if hits:
+        st.sidebar.markdown("**Cache lookups**")
+        st.sidebar.dataframe(pd.Series(hits, name="count"))
+    with st.sidebar.expander("All spans"):
+        st.dataframe(pd.DataFrame(stages).T)
+
+    st.sidebar.download_button(
+        label="Download Trace (JSON)",
+        data=trace.to_json(),
+        file_name=f"dashboard_trace_{time.strftime('%Y%m%d_%H%M%S', time.localtime(trace.created))}.json",
+        mime="application/json",
+        help="Chrome trace format; open in ui.perfetto.dev or chrome://tracing",
+    )
+    if st.sidebar.button("Reset Trace"):
+        trace.clear()
+        st.rerun()
+
 # ========== Main App ==========
 # Modify main()
 def main():
@@ -794,10 +787,24 @@ def main():
     if 'page' not in st.session_state:
         st.session_state.page = "page1"
 
-    if st.session_state.page == "page1":
-        page1()
-    elif st.session_state.page == "page2":
-        page2()
+    # Optional timing of fetching, parsing, analysis and chart rendering for
+    # this session; nothing is recorded while it is off. The trace only
+    # records this session's script run, so sessions can time themselves
+    # side by side.
+    trace = None
+    if st.sidebar.checkbox("Performance", key="show_performance",
+                           help="Time the slow stages of this session and show them here"):
+        trace = st.session_state.setdefault("perf_trace", perf_trace.Trace())
+
+    with perf_trace.recording(trace):
+        with perf_trace.span(st.session_state.page):
+            if st.session_state.page == "page1":
+                page1()
+            elif st.session_state.page == "page2":
+                page2()
+
+    if trace:
+        performance_panel(trace)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
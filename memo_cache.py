@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+import perf_trace
+from student_records import StudentRecord
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 2000
+
+
+class MemoCache:
+    # In-memory cache of computed values (analysis results, rendered chart
+    # images) keyed by the content hash of the dataset they came from plus
+    # whatever parameters went into them, so an unchanged chart is never
+    # recomputed or re-rasterized on a rerun. Least recently used entries
+    # are evicted past max_bytes / max_entries. Hits and misses are counted
+    # per kind (the first element of the key).
+    #
+    # Safe to share between Streamlit sessions.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._size = 0
+        self._counts = {}  # kind -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, size=None):
+        # Returns the cached value for key, or stores and returns compute().
+        # size(value) gives its size in bytes (default: len() of bytes,
+        # sys.getsizeof otherwise).
+        with self._lock:
+            counts = self._counts.setdefault(key[0], [0, 0])
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                counts[0] += 1
+                perf_trace.count(f"memo {key[0]} hits")
+                return entry[0]
+            counts[1] += 1
+        perf_trace.count(f"memo {key[0]} misses")
+
+        # Computed outside the lock; two sessions missing together both compute
+        value = compute()
+        if size is not None:
+            nbytes = size(value)
+        elif isinstance(value, (bytes, bytearray)):
+            nbytes = len(value)
+        else:
+            nbytes = sys.getsizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._size += nbytes
+            self._evict()
+        return value
+
+    def _evict(self):
+        while len(self._entries) > 1 and (self._size > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._size -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        # Totals plus {"kinds": {kind: {"hits", "misses", "hit_rate"}}}
+        def rates(hits, misses):
+            lookups = hits + misses
+            return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+        with self._lock:
+            hits = sum(c[0] for c in self._counts.values())
+            misses = sum(c[1] for c in self._counts.values())
+            return {
+                **rates(hits, misses),
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "kinds": {kind: rates(*c) for kind, c in self._counts.items()},
+            }
+
+
+def content_hash(data):
+    # Hash of a dataset's content: a DataFrame, or a list of result dicts /
+    # StudentRecords. Equal data in the same form hashes the same, wherever
+    # it was loaded from. Memo keys are built from it.
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, pd.DataFrame):
+        h.update(repr(list(data.columns)).encode())
+        h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        for record in data:
+            if isinstance(record, StudentRecord):
+                # Codes index the process-wide intern tables, as stable as
+                # this in-memory cache
+                h.update(repr((record.roll, record.name, record.student_type, record.grand_total,
+                               record.status, record.extra)).encode())
+                for packed in (record.codes, record.marks, record.percentiles):
+                    h.update(packed.tobytes())
+            else:
+                h.update(repr(record).encode())
+    return h.hexdigest()
+
+
+def file_hash(path, read_size=1 << 20):
+    # Content hash of a file, without parsing it
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(read_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ArtifactManifest:
+    # What a batch run last built, kept as JSON next to its output: name ->
+    # entry dict, typically the key (content hash of the inputs and settings)
+    # each artifact was built from. A rerun rebuilds only artifacts whose key
+    # changed or whose file is gone.
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def set(self, name, entry):
+        self.entries[name] = entry
+
+    def is_fresh(self, name, key, paths):
+        entry = self.entries.get(name)
+        return bool(entry) and entry.get("key") == key and all(os.path.exists(p) for p in paths)
+
+    def save(self):
+        # Written whole and renamed, so an interrupted run leaves the old one
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temp, self.path)
+
+
+def figure_png(fig, dpi=200):
+    # Rasterizes a matplotlib figure the way st.pyplot does, then closes it
+    import matplotlib.pyplot as plt  # only loaded by callers that draw
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from result_pages import render_result_page
+
+# Local stand-in for results.biserawalpindi.edu.pk. Serves Result_Detail pages
+# rendered from a results JSON file, with configurable latency, server errors
+# and blocking, so the scraper can be tested and load-tested offline:
+#
+#   python mock_server.py --data results_107004.json --latency 0.2 --block-rate 0.02
+#   python result_csv.py 103516-103700 --url http://127.0.0.1:8000/Result_Detail --no-cache
+
+
+class MockBoard:
+    # Shared configuration and counters for all request handler threads.
+    def __init__(self, records, latency=0.0, jitter=0.0, error_rate=0.0, block_rate=0.0,
+                 rate_limit=0.0, block_for=10.0, seed=None, error_rolls=()):
+        # records: {(roll, q, r): record}; q/r of None match any session/year
+        self.records = records
+        self.error_rolls = set(error_rolls)  # always answered with a server error
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.rate_limit = rate_limit    # req/s above which the client gets blocked
+        self.block_for = block_for      # seconds a rate-limit block lasts
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.status_counts = {}
+        self._blocked_until = 0.0
+        self._window = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, q=None, r=None, **options):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = {(int(s["Roll No"]), q, r): s for s in data if s.get("Roll No")}
+        return cls(records, **options)
+
+    def lookup(self, p, q, r):
+        for key in ((p, q, r), (p, None, None)):
+            if key in self.records:
+                return self.records[key]
+        return None
+
+    def decide(self):
+        # Returns the status code to answer with before the page is rendered
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if now < self._blocked_until:
+                return 403
+            if self.rate_limit:
+                self._window = [t for t in self._window if now - t < 1.0]
+                self._window.append(now)
+                if len(self._window) > self.rate_limit:
+                    self._blocked_until = now + self.block_for
+                    return 403
+            roll = self.random.random()
+        if roll < self.block_rate:
+            return 403
+        if roll < self.block_rate + self.error_rate:
+            return 500
+        return 200
+
+    def count(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+
+class ResultHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    board = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.rstrip("/").endswith("Result_Detail"):
+            return self._send(404, "Not Found")
+
+        board = self.board
+        board.delay()
+        status = board.decide()
+        if status == 403:
+            return self._send(403, "<html><body><h1>403 Forbidden</h1></body></html>")
+        if status == 500:
+            return self._send(500, "<html><body><h1>Server Error</h1></body></html>")
+
+        params = parse_qs(url.query)
+        try:
+            p = int(params.get("p", [""])[0])
+            q = int(params.get("q", ["2"])[0])
+            r = int(params.get("r", ["2025"])[0])
+        except ValueError:
+            return self._send(200, render_result_page(None))
+        if p in board.error_rolls:
+            return self._send(500, "<html><body><h1>Server Error</h1></body></html>")
+        self._send(200, render_result_page(board.lookup(p, q, r)))
+
+    def _send(self, status, body):
+        self.board.count(status)
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown a load test
+
+
+def start_server(board, host="127.0.0.1", port=0):
+    # Starts the mock in a background thread. port=0 picks a free port.
+    # Returns (server, url of the Result_Detail endpoint); stop with
+    # server.shutdown().
+    handler = type("BoundResultHandler", (ResultHandler,), {"board": board})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/Result_Detail"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic BISE Result_Detail pages locally")
+    parser.add_argument("--data", default="results_107004.json", help="results JSON to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500 responses")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="share of random 403 responses")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests per second above which every request is blocked for --block-for seconds")
+    parser.add_argument("--block-for", type=float, default=10.0)
+    args = parser.parse_args()
+
+    board = MockBoard.from_file(args.data, latency=args.latency, jitter=args.jitter,
+                                error_rate=args.error_rate, block_rate=args.block_rate,
+                                rate_limit=args.rate_limit, block_for=args.block_for)
+    server, url = start_server(board, args.host, args.port)
+    print(f"Serving {len(board.records)} results at {url}?p=<roll>&q=2&r=2025 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"{board.requests} requests served: {board.status_counts}")
@@ -0,0 +1,392 @@
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+import matplotlib
+import pandas as pd
+from fpdf import FPDF
+from PIL import Image
+
+import charts
+from analysis import SubjectIndex, analyze, select_rolls
+from memo_cache import ArtifactManifest, content_hash, figure_png, file_hash
+from results_store import read_json_stream, read_parquet
+from results_warehouse import DEFAULT_WAREHOUSE_PATH, ResultsWarehouse
+
+# Headless PDF reports with page2's sections: one per institution (summary
+# metrics, pass vs reappear, score distribution, averages, heatmap and the
+# teacher breakdowns) and one per teacher. A batch fans out over a process
+# pool, one institution per task. Charts are drawn once into a shared asset
+# directory under the hash of what they show, so an institution's teacher
+# reports reuse its charts and workers never draw the same chart twice.
+# manifest.json in the output directory keys each institution's PDFs by the
+# hash of its results, teachers and title, so a rerun only rebuilds the
+# institutions whose data changed.
+#
+#   python pdf_reports.py results_107004.json --teachers teachers.json -o reports
+#   python pdf_reports.py --warehouse -o reports --workers 8
+#
+# The teachers file maps an institution (code, or file name without its
+# extension) to its teachers; without "rolls" a teacher gets everyone who
+# took the subject:
+#   {"107004": [{"name": "Ms. Amna", "subject": "PHYSICS", "rolls": "103683-103720"}]}
+
+DEFAULT_ASSETS_DIR = os.path.join("data", "report_assets")
+MANIFEST_NAME = "manifest.json"
+REPORT_VERSION = 1  # bump when the report layout changes
+REPORT_DPI = 120  # enough for print at the widths used below
+PAGE_WIDTH = 190  # A4 less the default 10 mm margins
+
+
+def _start_worker():
+    # Pool workers only ever draw to files
+    matplotlib.use("Agg")
+
+
+def _text(value):
+    # FPDF's core fonts are Latin-1 only
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+
+def chart_asset(assets_dir, draw, *args):
+    # Path of the PNG of charts.<draw>(*args) in assets_dir, drawing it only
+    # if it isn't there yet. Written under a temporary name and renamed, so
+    # workers racing for the same chart never read half a file. Stored as
+    # RGB: FPDF splits the alpha channel out of RGBA PNGs in pure Python,
+    # which takes longer than drawing the chart.
+    key = content_hash([draw.__name__] + [content_hash(a) if isinstance(a, pd.DataFrame) else a
+                                          for a in args])
+    path = os.path.join(assets_dir, f"{draw.__name__}-{key}.png")
+    if not os.path.exists(path):
+        os.makedirs(assets_dir, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        image = Image.open(BytesIO(figure_png(draw(*args), dpi=REPORT_DPI)))
+        image.convert("RGB").save(temp, format="PNG")
+        os.replace(temp, path)
+    return path
+
+
+def resolve_teachers(specs, subject_index):
+    # Teacher specs from the teachers file to (name, subject, roll set)
+    teachers = []
+    for spec in specs:
+        if spec.get("rolls"):
+            rolls = select_rolls(spec["rolls"], subject_index.rolls)
+        else:
+            rolls = subject_index.subject_rolls(spec["subject"])
+        teachers.append((spec["name"], spec["subject"], rolls))
+    return teachers
+
+
+class ResultReport(FPDF):
+    def __init__(self, title):
+        super().__init__(format="A4")
+        self.title = _text(title)
+        self.set_auto_page_break(True, margin=15)
+        self.add_page()
+
+    def header(self):
+        self.set_font("Arial", "B", 11)
+        self.multi_cell(0, 6, self.title, align="C")
+        self.ln(2)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 6, f"Page {self.page_no()}", align="C")
+
+    def heading(self, text):
+        self.ln(3)
+        self.set_font("Arial", "B", 13)
+        self.cell(0, 8, _text(text), ln=1)
+
+    def metrics(self, pairs):
+        # A row of boxed figures, like st.metric columns
+        width = PAGE_WIDTH / len(pairs)
+        self.set_font("Arial", "", 9)
+        for label, _ in pairs:
+            self.cell(width, 6, _text(label), border="LTR", align="C")
+        self.ln()
+        self.set_font("Arial", "B", 14)
+        for _, value in pairs:
+            self.cell(width, 9, _text(value), border="LBR", align="C")
+        self.ln(12)
+
+    def table(self, header, rows, widths):
+        self.set_font("Arial", "B", 9)
+        for text, width in zip(header, widths):
+            self.cell(width, 6, _text(text), border=1, align="C")
+        self.ln()
+        self.set_font("Arial", "", 9)
+        for row in rows:
+            for i, (text, width) in enumerate(zip(row, widths)):
+                self.cell(width, 6, _text(text), border=1, align="L" if i == 0 else "R")
+            self.ln()
+        self.ln(3)
+
+    def chart(self, path, width=PAGE_WIDTH):
+        # Centered; FPDF starts a new page when the image doesn't fit
+        self.image(path, x=10 + (PAGE_WIDTH - width) / 2, w=width)
+        self.ln(3)
+
+    def pdf_bytes(self):
+        return self.output(dest="S").encode("latin-1")
+
+
+def add_teacher_section(pdf, name, subject, rolls, subject_index, assets_dir):
+    students, pass_count, scores = subject_index.lookup(subject, rolls)
+    pdf.heading(f"{name} - {subject}")
+    average = f"{sum(scores) / len(scores):.1f}" if scores else "-"
+    pdf.metrics([("Students", students), ("Passed", pass_count), ("Reappeared", students - pass_count),
+                 ("Pass Percentage", f"{100 * pass_count / students:.1f}%" if students else "-"),
+                 ("Average Marks", average)])
+    if students:
+        pie = chart_asset(assets_dir, charts.plot_teacher_pie, pass_count, students, f"{name} - {subject}")
+        pdf.chart(pie, width=80)
+    if scores:
+        pdf.chart(chart_asset(assets_dir, charts.plot_marks_histogram, scores, subject), width=130)
+
+
+def institution_report(data, school, teachers=(), year=2025, assets_dir=DEFAULT_ASSETS_DIR,
+                       subject_index=None):
+    # The institution's report; teachers are (name, subject, roll set) as
+    # on page2's Teacher-wise tab
+    status_counts, df_buckets, df_avg, _ = analyze(data)
+    total = sum(status_counts.values())
+    pdf = ResultReport(f"B.I.S.E RAWALPINDI SSC Annual Examination {year} | {school} Result Analysis")
+
+    pdf.heading("Overall Performance")
+    pass_share = 100 * status_counts["PASS"] / total if total else 0
+    pdf.metrics([("Total Students", total), ("Passed Students", status_counts["PASS"]),
+                 ("Pass Percentage", f"{pass_share:.1f}%"), ("Reappear Percentage", f"{100 - pass_share:.1f}%")])
+
+    pdf.heading("Pass vs Reappear")
+    pdf.chart(chart_asset(assets_dir, charts.plot_status_pie, status_counts), width=100)
+    if not df_buckets.empty:
+        pdf.heading("Score Distribution by Subject")
+        pdf.chart(chart_asset(assets_dir, charts.plot_enhanced_bar, df_buckets, "Subject-wise Score Distribution"))
+    if not df_avg.empty:
+        pdf.heading("Average Scores by Subject")
+        pdf.chart(chart_asset(assets_dir, charts.plot_average_scores, df_avg))
+        pdf.table(["Subject", "Average"], [(subject, f"{average:.1f}") for subject, average in
+                                           df_avg["Average"].items()], [150, 40])
+    if not df_buckets.empty:
+        pdf.heading("Heatmap of Performance")
+        pdf.chart(chart_asset(assets_dir, charts.plot_bucket_heatmap, df_buckets))
+
+    if teachers:
+        subject_index = subject_index or SubjectIndex.from_data(data)
+        pdf.add_page()
+        pdf.heading("Teacher-wise Comparative Report")
+        for name, subject, rolls in teachers:
+            add_teacher_section(pdf, name, subject, rolls, subject_index, assets_dir)
+    return pdf
+
+
+def teacher_report(subject_index, school, name, subject, rolls, year=2025, assets_dir=DEFAULT_ASSETS_DIR):
+    pdf = ResultReport(f"B.I.S.E RAWALPINDI SSC Annual Examination {year} | {school} | {name}")
+    add_teacher_section(pdf, name, subject, rolls, subject_index, assets_dir)
+    return pdf
+
+
+def _load(source):
+    if source[0] == "warehouse":
+        _, db, institution, q, r = source
+        warehouse = ResultsWarehouse(db)
+        try:
+            return warehouse.load(institution, q, r)
+        finally:
+            warehouse.close()
+    path = source[1]
+    if path.endswith(".parquet"):
+        return read_parquet(path)
+    return read_json_stream(path)
+
+
+def _file_name(text):
+    return re.sub(r"[^\w.-]+", "_", text).strip("_") or "report"
+
+
+def report_paths(job, out_dir):
+    # The institution's PDF, then one per teacher in a folder beside it
+    paths = [os.path.join(out_dir, f"{_file_name(job['label'])}.pdf")]
+    teacher_dir = os.path.join(out_dir, _file_name(job["label"]))
+    for spec in job.get("teachers", []):
+        paths.append(os.path.join(teacher_dir, f"{_file_name(spec['name'])}-{_file_name(spec['subject'])}.pdf"))
+    return paths
+
+
+def manifest_name(job):
+    # Manifest entry of a job: a results file's full path (so files of the
+    # same name in different directories keep their own entries), or the
+    # institution/year/session label of a warehouse dataset
+    if job["source"][0] == "file":
+        return os.path.abspath(job["source"][1])
+    return job["label"]
+
+
+def check_outputs(jobs, out_dir):
+    # Raises ValueError if two jobs would write the same PDF: their labels
+    # (file names without extension) clash, as for 107004.json in two
+    # directories
+    owners = {}
+    for job in jobs:
+        for path in report_paths(job, out_dir):
+            other = owners.setdefault(os.path.normcase(path), job)
+            if other is not job:
+                raise ValueError(f"{_describe(other)} and {_describe(job)} would both write {path}; "
+                                 "rename one of them")
+
+
+def _describe(job):
+    return job["source"][1] if job["source"][0] == "file" else job["label"]
+
+
+def job_key(job):
+    # Content hash of everything a job's PDFs are built from. Results files
+    # are hashed as they are; a warehouse dataset stands for its student
+    # count and when it was last written to (every write stamps the rows it
+    # stores), so nothing is loaded to find it unchanged.
+    source = job["source"]
+    data = file_hash(source[1]) if source[0] == "file" else job["fingerprint"]
+    return content_hash([REPORT_VERSION, REPORT_DPI, data, job["school"], job["year"], job.get("teachers", [])])
+
+
+def build_reports(job, out_dir, assets_dir=DEFAULT_ASSETS_DIR):
+    # Runs in a pool worker: loads one institution, writes its report and
+    # one per teacher. Returns the paths written.
+    data = _load(job["source"])
+    subject_index = SubjectIndex.from_data(data)
+    teachers = resolve_teachers(job.get("teachers", []), subject_index)
+
+    paths = report_paths(job, out_dir)
+    pdf = institution_report(data, job["school"], teachers, job["year"], assets_dir, subject_index)
+    pdf.output(paths[0], "F")
+    if teachers:
+        os.makedirs(os.path.dirname(paths[1]), exist_ok=True)
+    for (name, subject, rolls), path in zip(teachers, paths[1:]):
+        teacher_report(subject_index, job["school"], name, subject, rolls, job["year"],
+                       assets_dir).output(path, "F")
+    return paths
+
+
+def make_jobs(files=(), warehouse=None, teachers=None, year=2025):
+    # One job per results file (a file given twice counts once) and per
+    # institution/session/year in the warehouse; teachers as read from the
+    # teachers file
+    teachers = teachers or {}
+    jobs = []
+    seen = set()
+    for path in files:
+        if os.path.abspath(path) in seen:
+            continue
+        seen.add(os.path.abspath(path))
+        label = os.path.splitext(os.path.basename(path))[0]
+        jobs.append({"label": label, "school": label, "year": year, "source": ("file", path),
+                     "teachers": teachers.get(label, [])})
+    if warehouse:
+        store = ResultsWarehouse(warehouse)
+        datasets = store.datasets()
+        store.close()
+        for d in datasets:
+            code = d["institution"] or "unknown"
+            jobs.append({"label": f"{code}-{d['r']}-{d['q']}", "school": d["name"] or code, "year": d["r"],
+                         "source": ("warehouse", warehouse, d["institution"], d["q"], d["r"]),
+                         "fingerprint": [d["students"], d["updated"]],
+                         "teachers": teachers.get(code, [])})
+    return jobs
+
+
+def run_batch(jobs, out_dir, workers=None, assets_dir=DEFAULT_ASSETS_DIR, on_done=None, force=False):
+    # Builds the reports of every job whose key changed since the last run
+    # (all of them with force), in a process pool unless workers == 1.
+    # on_done(job, paths, rebuilt, error) is called as each institution is
+    # settled. Returns (PDFs written, PDFs unchanged). Raises ValueError
+    # before building anything if two jobs would write the same PDF.
+    check_outputs(jobs, out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = ArtifactManifest(os.path.join(out_dir, MANIFEST_NAME))
+    written = unchanged = 0
+
+    pending = []
+    for job in jobs:
+        key = job_key(job)
+        paths = report_paths(job, out_dir)
+        if not force and manifest.is_fresh(manifest_name(job), key, paths):
+            unchanged += len(paths)
+            if on_done:
+                on_done(job, paths, False, None)
+        else:
+            pending.append((job, key))
+
+    def finish(job, key, paths, error):
+        nonlocal written
+        if not error:
+            written += len(paths)
+            name = manifest_name(job)
+            # A results file of the same name from another directory, built
+            # in an earlier run, no longer owns these PDFs
+            for other in [n for n, e in manifest.entries.items() if n != name and e.get("pdf") == paths[0]]:
+                del manifest.entries[other]
+            manifest.set(name, {"key": key, "reports": len(paths), "pdf": paths[0]})
+        if on_done:
+            on_done(job, paths, True, error)
+
+    if workers == 1 or len(pending) <= 1:
+        _start_worker()
+        for job, key in pending:
+            try:
+                paths, error = build_reports(job, out_dir, assets_dir), None
+            except Exception as e:
+                paths, error = [], e
+            finish(job, key, paths, error)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker) as pool:
+            futures = {pool.submit(build_reports, job, out_dir, assets_dir): (job, key) for job, key in pending}
+            for future in as_completed(futures):
+                error = future.exception()
+                finish(*futures[future], [] if error else future.result(), error)
+    manifest.save()
+    return written, unchanged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write PDF result reports per institution and per teacher")
+    parser.add_argument("files", nargs="*", help="results JSON or Parquet files, one per institution")
+    parser.add_argument("--warehouse", nargs="?", const=DEFAULT_WAREHOUSE_PATH,
+                        help="also report every institution in the results warehouse")
+    parser.add_argument("--teachers", help="JSON file of teachers per institution")
+    parser.add_argument("-o", "--out", default="reports", help="output directory (default reports)")
+    parser.add_argument("--assets", default=DEFAULT_ASSETS_DIR, help="shared chart directory")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("-r", type=int, default=2025, help="year shown for results files (default 2025)")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, ignoring the manifest")
+    args = parser.parse_args()
+    if not args.files and not args.warehouse:
+        parser.error("give results files and/or --warehouse")
+
+    teachers = None
+    if args.teachers:
+        with open(args.teachers, encoding="utf-8") as f:
+            teachers = json.load(f)
+    jobs = make_jobs(args.files, args.warehouse, teachers, args.r)
+
+    def on_done(job, paths, rebuilt, error):
+        if error:
+            print(f"{job['label']}: FAILED ({error})")
+        elif rebuilt:
+            print(f"{job['label']}: {len(paths)} report(s)")
+
+    try:
+        check_outputs(jobs, args.out)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    count, unchanged = run_batch(jobs, args.out, args.workers, args.assets, on_done, args.force)
+    elapsed = time.perf_counter() - start
+    print(f"{count} reports for {len(jobs)} institution(s) in {elapsed:.1f}s "
+          f"({60 * count / elapsed:.0f} reports/minute), {unchanged} unchanged")
@@ -0,0 +1,200 @@
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Timing spans and counters around the hot paths: fetching and parsing
+# result pages, analysis, chart rendering and cache lookups. Nothing is
+# recorded unless a Trace is active (see recording()); until then span()
+# hands back one shared do-nothing context and count() returns at once, so
+# instrumented code pays a context variable lookup and a call.
+#
+#   with perf_trace.span("parse", backend="lxml"):
+#       ...
+#   perf_trace.count("bytes downloaded", len(body))
+#
+# The recording trace belongs to a context, not the process (see start()):
+# each Streamlit script run is a thread of its own, so a session's trace
+# gets only that session's spans and any number of sessions can record at
+# once. Pool workers start without a trace; submit work through bind() to
+# have it recorded into the caller's.
+
+MAX_SPANS = 200_000  # past this only counters are kept
+
+_active = contextvars.ContextVar("perf_trace", default=None)
+
+
+class TraceBusy(RuntimeError):
+    pass
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "start")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.add_span(self.name, self.start, time.perf_counter() - self.start, self.attrs,
+                            failed=exc_type is not None)
+        return False
+
+
+class Trace:
+    # Spans as (name, start, seconds, thread id, attrs) with start relative
+    # to the trace's creation, and named counters
+    def __init__(self, max_spans=MAX_SPANS):
+        self.max_spans = max_spans
+        self.created = time.time()
+        self.spans = []
+        self.counters = {}
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, seconds, attrs=None, failed=False):
+        if failed:
+            attrs = dict(attrs or {}, failed=True)
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append((name, start - self._origin, seconds, threading.get_ident(), attrs))
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.dropped = 0
+
+    def stages(self):
+        # name -> {"calls", "total ms", "mean ms", "max ms", "window s"}; the
+        # window runs from the first span's start to the last one's end,
+        # which for concurrent fetches is the wall time they took
+        with self._lock:
+            spans = list(self.spans)
+        grouped = {}
+        for name, start, seconds, _, _ in spans:
+            grouped.setdefault(name, []).append((start, seconds))
+        stages = {}
+        for name, timings in sorted(grouped.items()):
+            durations = [seconds for _, seconds in timings]
+            stages[name] = {
+                "calls": len(durations),
+                "total ms": round(1000 * sum(durations), 2),
+                "mean ms": round(1000 * sum(durations) / len(durations), 3),
+                "max ms": round(1000 * max(durations), 3),
+                "window s": round(max(s + d for s, d in timings) - min(s for s, _ in timings), 3),
+            }
+        return stages
+
+    def to_json(self):
+        # Chrome trace event format (chrome://tracing, ui.perfetto.dev); the
+        # counters go in otherData
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        events = []
+        for name, start, seconds, thread, attrs in spans:
+            event = {"name": name, "ph": "X", "ts": round(start * 1e6, 1), "dur": round(seconds * 1e6, 1),
+                     "pid": 1, "tid": thread}
+            if attrs:
+                event["args"] = {key: str(value) for key, value in attrs.items()}
+            events.append(event)
+        return json.dumps({
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created)),
+                          "counters": counters, "dropped spans": self.dropped},
+        })
+
+
+def span(name, **attrs):
+    trace = _active.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, attrs)
+
+
+def count(name, value=1):
+    trace = _active.get()
+    if trace is not None:
+        trace.add(name, value)
+
+
+def enabled():
+    return _active.get() is not None
+
+
+def start(trace):
+    # Makes trace the one receiving spans and counters in the calling
+    # thread's context. False if another trace is recording there; starting
+    # the active one again is a no-op that returns True.
+    current = _active.get()
+    if current is not None and current is not trace:
+        return False
+    _active.set(trace)
+    return True
+
+
+def stop(trace):
+    # Ends trace's recording; does nothing if trace isn't the active one,
+    # so a late stop can't end another trace's recording
+    if _active.get() is trace:
+        _active.set(None)
+
+
+def bind(fn):
+    # fn wrapped to record into the calling context's trace from whichever
+    # thread runs it (pool workers start with none); fn itself when nothing
+    # is recording
+    trace = _active.get()
+    if trace is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _active.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+    return run
+
+
+@contextmanager
+def recording(trace):
+    # start()/stop() around a block; raises TraceBusy if another trace is
+    # recording in this context. With trace None nothing is recorded or changed.
+    if trace is None:
+        yield None
+        return
+    if not start(trace):
+        raise TraceBusy("Another trace is already recording here")
+    try:
+        yield trace
+    finally:
+        stop(trace)
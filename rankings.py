@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+
+import perf_trace
+from results_store import is_long_frame, student_starts, to_long_frame
+
+# Top-N students per subject and per subject group (sum of the chosen
+# subjects' totals), keyed by roll number. Selection is partial: only the N
+# best scores are picked out with np.argpartition and only those are sorted,
+# so ranking a board-wide dataset doesn't sort every student.
+#
+# Rank and percentile of any score (ScoreRanks, add_rank_columns) come from
+# binary searches over the scores sorted once per dataset.
+
+RANKING_COLUMNS = ["Roll No", "Student Name", "Grand Total", "Subject", "Total"]
+
+
+def top_n(scores, n, ties=True):
+    # Indices (in no order) of the n highest scores. With ties, everyone level
+    # with the n-th score is included too. Equal scores are ordered by the
+    # caller's tie-break (see RankingEngine._rank).
+    if n <= 0 or not len(scores):
+        return np.empty(0, dtype=np.intp)
+    if n >= len(scores):
+        return np.arange(len(scores))
+    candidates = np.argpartition(scores, len(scores) - n)[len(scores) - n:]
+    if ties:
+        candidates = np.flatnonzero(scores >= scores[candidates].min())
+    return candidates
+
+
+def _whole(values):
+    # Marks as nullable integers for display
+    return pd.array(np.asarray(values, dtype=np.float64), dtype="Float64").astype("Int64")
+
+
+def competition_ranks(sorted_scores):
+    # "1224" ranking for scores sorted highest first
+    negated = -np.asarray(sorted_scores)
+    return np.searchsorted(negated, negated, side="left") + 1
+
+
+class RankingEngine:
+    # Built once per dataset from the long frame: per student their roll,
+    # name and grand total; per subject the students who took it (as row
+    # indices into the student arrays, ascending) and their totals.
+    def __init__(self, df):
+        first_rows = student_starts(df)
+        student = np.cumsum(first_rows) - 1
+        self.rolls = df["Roll No"].to_numpy()[first_rows].astype(np.int64)
+        self.names = df["Student Name"].to_numpy(dtype=object)[first_rows]
+        self.grand_totals = df["Grand Total"].to_numpy(dtype=np.float64, na_value=np.nan)[first_rows]
+
+        codes = df["Subject"].cat.codes.to_numpy()
+        totals = df["Total"].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = np.flatnonzero((codes >= 0) & ~np.isnan(totals))
+        keep = keep[np.argsort(codes[keep], kind="stable")]  # students stay ascending within a subject
+        bounds = np.searchsorted(codes[keep], np.arange(len(df["Subject"].cat.categories) + 1))
+        self._subjects = {}
+        for i, name in enumerate(df["Subject"].cat.categories):
+            rows = keep[bounds[i]:bounds[i + 1]]
+            if len(rows):
+                self._subjects[name] = (student[rows], totals[rows])
+        self.subjects = sorted(self._subjects)
+
+    @classmethod
+    def from_data(cls, data):
+        with perf_trace.span("analysis: rankings"):
+            df = data if is_long_frame(data) else to_long_frame(data, columns=RANKING_COLUMNS)
+            return cls(df)
+
+    def __len__(self):
+        return len(self.rolls)
+
+    def top_subject(self, subject, n=5, ties=True):
+        # DataFrame of the n best in a subject: Rank, Roll No, Student Name,
+        # Grand Total, <subject>
+        students, totals = self._subjects.get(subject, (np.empty(0, dtype=np.intp), np.empty(0)))
+        return self._rank(students, totals, [subject], n, ties, score_column=None)
+
+    def top_group(self, subjects, n=5, ties=True):
+        # The n best by the sum of their totals in `subjects`, among students
+        # with a mark in every one of them. Columns: Rank, Roll No, Student
+        # Name, Grand Total, one per subject, Group Total.
+        subjects = [s for s in subjects if s in self._subjects]
+        if not subjects:
+            return self._rank(np.empty(0, dtype=np.intp), np.empty(0), [], n, ties, "Group Total")
+        sums = np.zeros(len(self.rolls))
+        counts = np.zeros(len(self.rolls), dtype=np.int64)
+        for subject in subjects:
+            students, totals = self._subjects[subject]
+            sums += np.bincount(students, weights=totals, minlength=len(self.rolls))
+            counts += np.bincount(students, minlength=len(self.rolls))
+        students = np.flatnonzero(counts == len(subjects))
+        return self._rank(students, sums[students], subjects, n, ties, "Group Total")
+
+    def marks(self, subject, students):
+        # Each student's total in the subject, NaN where they didn't take it
+        if subject not in self._subjects:
+            return np.full(len(students), np.nan)
+        subject_students, totals = self._subjects[subject]
+        pos = np.minimum(np.searchsorted(subject_students, students), len(subject_students) - 1)
+        return np.where(subject_students[pos] == students, totals[pos], np.nan)
+
+    def _rank(self, students, scores, subjects, n, ties, score_column):
+        picked = top_n(scores, n, ties)
+        students, scores = students[picked], scores[picked]
+        # Highest score first; level scores by grand total, then roll number
+        grand = np.nan_to_num(self.grand_totals[students], nan=-1)
+        order = np.lexsort((self.rolls[students], -grand, -scores))
+        students, scores = students[order], scores[order]
+
+        table = {
+            "Rank": competition_ranks(scores),
+            "Roll No": self.rolls[students],
+            "Student Name": self.names[students],
+            "Grand Total": _whole(self.grand_totals[students]),
+        }
+        for subject in subjects:
+            table[subject] = _whole(self.marks(subject, students))
+        if score_column:
+            table[score_column] = _whole(scores)
+        return pd.DataFrame(table)
+
+    def nbytes(self):
+        return (self.rolls.nbytes + self.grand_totals.nbytes + 8 * len(self.names)
+                + sum(a.nbytes for entry in self._subjects.values() for a in entry))
+
+
+GRAND_TOTAL = "Grand Total"
+
+
+def _standing(sorted_scores, scores, offset=0, size=None):
+    # Competition rank (1 = best) and percentile rank of scores among
+    # sorted_scores (ascending), by binary search. The percentile counts
+    # those scoring lower plus half of those level: 100 * (below + equal/2) / n.
+    # offset/size select a slice of sorted_scores per score.
+    left = np.searchsorted(sorted_scores, scores, side="left") - offset
+    right = np.searchsorted(sorted_scores, scores, side="right") - offset
+    n = len(sorted_scores) if size is None else size
+    return n - right + 1, 100 * (left + (right - left) / 2) / np.maximum(n, 1)
+
+
+class ScoreRanks:
+    # Where a mark stands among everyone's marks in the same subject, or a
+    # grand total among all grand totals. Built once per dataset from the
+    # subject_scores of prepare_analysis; each query is a binary search over
+    # the sorted scores, for one score or an array of them.
+    def __init__(self, subject_scores, grand_totals=None):
+        self._sorted = {subject: np.sort(np.asarray(scores, dtype=np.float64))
+                        for subject, scores in subject_scores.items()}
+        if grand_totals is not None:
+            grand_totals = np.asarray(grand_totals, dtype=np.float64)
+            self._sorted[GRAND_TOTAL] = np.sort(grand_totals[~np.isnan(grand_totals)])
+
+    def students(self, subject):
+        return len(self._sorted.get(subject, ()))
+
+    def rank(self, subject, score):
+        return self._standing(subject, score)[0]
+
+    def percentile(self, subject, score):
+        return self._standing(subject, score)[1]
+
+    def _standing(self, subject, score):
+        if subject not in self._sorted:
+            raise KeyError(subject)
+        return _standing(self._sorted[subject], score)
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self._sorted.values())
+
+
+def add_rank_columns(df, within=None):
+    # Copy of a long frame with "Subject Rank", "Subject Percentile", "Grand
+    # Total Rank" and "Grand Total Percentile" columns: each mark against the
+    # same subject's marks, each grand total against all students'. With
+    # within (e.g. "Institution") the ranking is inside each value of that
+    # column and the new columns are prefixed with its name. One sort per
+    # column, O(n log n) overall. Rows without a mark get <NA>.
+    prefix = f"{within} " if within else ""
+    out = df.copy()
+    groups = (df[within].cat.codes.to_numpy().astype(np.int64) if within
+              else np.zeros(len(df), dtype=np.int64))
+
+    first_rows = student_starts(df)
+    student = np.cumsum(first_rows) - 1
+
+    subject_keys = groups * (len(df["Subject"].cat.categories) + 1) + df["Subject"].cat.codes.to_numpy()
+    columns = (
+        ("Subject", subject_keys, df["Total"], np.ones(len(df), dtype=bool)),
+        ("Grand Total", groups, df["Grand Total"], first_rows),
+    )
+    for name, keys, marks, candidates in columns:
+        marks = marks.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = candidates & ~np.isnan(marks)
+        if name == "Subject":
+            valid &= df["Subject"].cat.codes.to_numpy() >= 0
+        # Sort (group, mark) pairs as one number so each group is a slice.
+        # The sorted values are searched for themselves (in order, which
+        # keeps the binary searches cache friendly) and scattered back.
+        rows = np.flatnonzero(valid)
+        composite = keys[rows] * 65536.0 + marks[rows]
+        order = np.argsort(composite)
+        ordered = composite[order]
+        _, starts, sizes = np.unique(keys[rows][order], return_index=True, return_counts=True)
+        slot = np.repeat(np.arange(len(starts)), sizes)
+        rank, percentile = _standing(ordered, ordered, starts[slot], sizes[slot])
+
+        rank_values = np.full(len(df), np.nan)
+        percentile_values = np.full(len(df), np.nan)
+        rank_values[rows[order]] = rank
+        percentile_values[rows[order]] = percentile
+        if name == "Grand Total":
+            # One value per student, shown on each of their rows
+            rank_values = rank_values[np.flatnonzero(first_rows)][student]
+            percentile_values = percentile_values[np.flatnonzero(first_rows)][student]
+        out[f"{prefix}{name} Rank"] = _whole(rank_values)
+        out[f"{prefix}{name} Percentile"] = pd.array(np.round(percentile_values, 2), dtype="Float64")
+    return out
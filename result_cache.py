@@ -0,0 +1,155 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import perf_trace
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "results.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600  # seconds; results don't change once announced
+DEFAULT_MISS_TTL = 3600      # pages without a result: the roll may be published later
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 500_000
+
+
+class ResultCache:
+    # On-disk cache of result pages keyed by (p, q, r). Each entry keeps the raw
+    # HTML and the parsed record so a hit costs neither a round trip nor a
+    # parse. Entries older than ttl are treated as misses, and so are pages
+    # without a roll number (not found, or not published yet) older than
+    # miss_ttl; once the cache grows past max_bytes / max_entries the least
+    # recently used entries are evicted.
+    #
+    # Safe to share between the scraper's worker threads.
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                 max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES, miss_ttl=DEFAULT_MISS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several batch worker processes may share the file; wait for locks
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                p INTEGER NOT NULL,
+                q INTEGER NOT NULL,
+                r INTEGER NOT NULL,
+                html TEXT,
+                record TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (p, q, r)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._conn.commit()
+        self._size, self._count = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+
+    def get(self, p, q, r):
+        # Returns the cached parsed record, or None on a miss.
+        now = time.time()
+        key = (int(p), int(q), int(r))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record, fetched_at FROM results WHERE p=? AND q=? AND r=?", key).fetchone()
+            record = json.loads(row[0]) if row is not None else None
+            ttl = self.ttl if record and record.get("Roll No") else self.miss_ttl
+            if record is None or (ttl and now - row[1] > ttl):
+                self.misses += 1
+                perf_trace.count("result cache misses")
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed_at=? WHERE p=? AND q=? AND r=?", (now, *key))
+            self._conn.commit()
+            self.hits += 1
+        perf_trace.count("result cache hits")
+        return record
+
+    def get_html(self, p, q, r):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html FROM results WHERE p=? AND q=? AND r=?", (int(p), int(q), int(r))).fetchone()
+        return row[0] if row else None
+
+    def put(self, p, q, r, html, record):
+        now = time.time()
+        key = (int(p), int(q), int(r))
+        record_json = json.dumps(record, ensure_ascii=False)
+        size = len(html or "") + len(record_json)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM results WHERE p=? AND q=? AND r=?", key).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, html, record_json, size, now, now))
+            if old:
+                self._size += size - old[0]
+            else:
+                self._size += size
+                self._count += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until we are back under both caps.
+        while self._count and (self._size > self.max_bytes or self._count > self.max_entries):
+            batch = max(1, self._count // 20)
+            rows = self._conn.execute(
+                "SELECT p, q, r, size FROM results ORDER BY accessed_at LIMIT ?", (batch,)).fetchall()
+            self._conn.executemany(
+                "DELETE FROM results WHERE p=? AND q=? AND r=?", [row[:3] for row in rows])
+            self._size -= sum(row[3] for row in rows)
+            self._count -= len(rows)
+            self.evictions += len(rows)
+
+    def purge_expired(self):
+        now = time.time()
+        expired = []
+        if self.ttl:
+            expired.append(("fetched_at < ?", now - self.ttl))
+        if self.miss_ttl:
+            expired.append(("""(fetched_at < ? AND COALESCE(json_extract(record, '$."Roll No"'), '') = '')""",
+                            now - self.miss_ttl))
+        if not expired:
+            return 0
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM results WHERE " + " OR ".join(sql for sql, _ in expired),
+                [cutoff for _, cutoff in expired]).rowcount
+            self._size, self._count = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+            self._conn.commit()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._size = self._count = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._count,
+            "bytes": self._size,
+        }
+
+    def close(self):
+        self._conn.close()
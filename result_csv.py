@@ -88,104 +88,100 @@
 #     main(user_input)
 
 
-import requests
-from bs4 import BeautifulSoup
-import json
-import re
-
-def fetch_html(p, q, r):
-    url = "https://results.biserawalpindi.edu.pk/Result_Detail"
-    params = {"p": p, "q": q, "r": r}
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, params=params, headers=headers)
-    response.raise_for_status()
-    return response.text
-
-def extract_result(html):
-    soup = BeautifulSoup(html, "html.parser")
-    info = {}
-
-    def get_field(label):
-        field = soup.find(string=re.compile(rf"^{label}", re.IGNORECASE))
-        return field.find_next().get_text(strip=True) if field else ""
-
-    # Extract top-level student info
-    info["Roll No"] = get_field("ROLL NO")
-    info["Student Name"] = get_field("STUDENT NAME")
-    info["Student Type"] = get_field("STUDENT TYPE")
-    info["Grand Total"] = get_field("GRAND TOTAL")
-    info["Status"] = get_field("STATUS")
-
-    # Subject Table Processing
-    subject_table = soup.find("table")
-    subjects = []
-
-    if subject_table:
-        rows = subject_table.find_all("tr")
-        headers = [th.get_text(strip=True).upper() for th in rows[0].find_all("th")]
-
-        for row in rows[1:]:
-            cells = row.find_all("td")
-            if len(cells) != len(headers):
-                continue  # skip malformed or irrelevant rows
-
-            values = [td.get_text(strip=True) for td in cells]
-            row_dict = dict(zip(headers, values))
-
-            if not row_dict.get("SUBJECT"):
-                continue  # skip invalid subjects
-
-            subject_entry = {
-                "Subject": row_dict.get("SUBJECT", ""),
-                "Theory-I": row_dict.get("THEORY-I", ""),
-                "Theory-II": row_dict.get("THEORY-II", ""),
-                "Practical": row_dict.get("PRACTICAL", ""),
-                "Total": row_dict.get("TOTAL", "")
-            }
-
-            # Optional Fields
-            if "PERCENTILE MARKS" in headers:
-                if row_dict.get("PERCENTILE MARKS"):
-                    subject_entry["Percentile Marks"] = row_dict["PERCENTILE MARKS"]
-                if row_dict.get("RELATIVE GRADE"):
-                    subject_entry["Relative Grade"] = row_dict["RELATIVE GRADE"]
-                if row_dict.get("REMARKS"):
-                    subject_entry["Remarks"] = row_dict["REMARKS"]
-
-            subjects.append(subject_entry)
-
-    info["Subjects"] = subjects
-    return info
-
-def parse_p_input(p_input):
-    result = []
-    for part in p_input.split(','):
-        if '-' in part:
-            start, end = map(int, part.split('-'))
-            result.extend(range(start, end + 1))
+import argparse
+
+from result_cache import ResultCache
+from results_store import save_results
+from roll_prober import is_hit, probe_rolls
+from roll_ranges import parse_p_ranges
+from scrape_jobs import ScrapeJob
+from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE
+from throttle import AdaptiveThrottle
+
+
+def probe_main(p_values, q=2, r=2025, output="results_107004_ad.json",
+               concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, use_cache=True, url=None):
+    # Ranges are walked with the gap-skipping prober instead of fetching
+    # every number in them
+    cache = ResultCache() if use_cache else None
+
+    def on_progress(p, result, error):
+        if error is not None:
+            print(f"Failed for p={p}: {error}")
+        elif is_hit(result):
+            print(f"Found p={p}")
+
+    prober = probe_rolls(parse_p_ranges(p_values), q=q, r=r, concurrency=concurrency, rate=rate,
+                         cache=cache, on_progress=on_progress, url=url)
+    all_results = [result for p, result, error in prober.results() if is_hit(result)]
+    save_results(all_results, output, q=q, r=r)
+    print(f"Saved {len(all_results)} results to {output}")
+    stats = prober.stats()
+    print(f"Requested {stats['requested']} of {stats['span']} roll numbers "
+          f"({stats['saved']} requests saved, {stats['saved_pct']:.1f}%), "
+          f"{stats['skipped_stretches']} empty stretches skipped")
+    if cache is not None:
+        cache.close()
+
+def main(p_values, q=2, r=2025, output="results_107004_ad.json",
+         concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, use_cache=True, resume=None, url=None):
+    # Every roll is journaled as it arrives, so an interrupted run can be
+    # picked up again with resume=<job id>.
+    if resume:
+        job = ScrapeJob.load(resume)
+        print(f"Resuming job {job.job_id}: {len(job.pending())} of {len(job.p_list)} rolls left")
+    else:
+        job = ScrapeJob.create(p_values, q=q, r=r)
+        print(f"Started job {job.job_id} for {len(job.p_list)} rolls")
+    cache = ResultCache() if use_cache else None
+    throttle = AdaptiveThrottle(rate=rate, concurrency=concurrency)
+
+    def on_progress(done, total, p, result, error):
+        if error is not None:
+            print(f"Failed for p={p}: {error}")
         else:
-            result.append(int(part))
-    return result
-
-def main(p_values, q=2, r=2025, output="results_107004_ad.json"):
-    p_list = parse_p_input(p_values)
-    all_results = []
-
-    for p in p_list:
-        try:
-            print(f"Fetching p={p}")
-            html = fetch_html(p, q, r)
-            result = extract_result(html)
-            if result.get("Roll No"):  # Only include if valid
-                all_results.append(result)
-        except Exception as e:
-            print(f"Failed for p={p}: {e}")
-
-    with open(output, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, indent=2, ensure_ascii=False)
+            print(f"Fetched p={p} ({done}/{total})")
+
+    try:
+        job.run(concurrency=concurrency, rate=rate, cache=cache, on_progress=on_progress,
+                throttle=throttle, url=url)
+    except KeyboardInterrupt:
+        print(f"Interrupted. Resume with: python result_csv.py --resume {job.job_id}")
+        raise
+
+    all_results = job.compact(output)
+    counts = job.counts()
     print(f"Saved {len(all_results)} results to {output}")
+    stats = throttle.stats()
+    print(f"Requests: {stats['requests']}, blocked: {stats['blocks']}, retries: {stats['retries']}, "
+          f"breaker trips: {stats['breaker_trips']}, final rate: {stats['rate']} req/s")
+    if counts["pending"]:
+        print(f"{counts['pending']} rolls still pending; resume with --resume {job.job_id}")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} pages cached")
+        cache.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape BISE Rawalpindi results for a list of roll numbers")
     # Example usage: individual and range combined
-    user_input = "103683,124861"
-    main(user_input)
+    parser.add_argument("rolls", nargs="?", default="103683,124861",
+                        help="comma separated roll numbers or ranges, e.g. 103683,124861-124870")
+    parser.add_argument("-q", type=int, default=2, help="session parameter (default 2)")
+    parser.add_argument("-r", type=int, default=2025, help="year parameter (default 2025)")
+    parser.add_argument("-o", "--output", default="results_107004_ad.json",
+                        help="results file; a .parquet name writes the columnar store")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="starting requests per second")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--resume", metavar="JOB_ID", help="continue an interrupted job")
+    parser.add_argument("--probe", action="store_true",
+                        help="skip stretches of non-existent roll numbers inside ranges")
+    parser.add_argument("--url", help="alternative Result_Detail endpoint, e.g. mock_server.py")
+    args = parser.parse_args()
+    if args.probe and not args.resume:
+        probe_main(args.rolls, q=args.q, r=args.r, output=args.output, concurrency=args.concurrency,
+                   rate=args.rate, use_cache=not args.no_cache, url=args.url)
+    else:
+        main(args.rolls, q=args.q, r=args.r, output=args.output, concurrency=args.concurrency,
+             rate=args.rate, use_cache=not args.no_cache, resume=args.resume, url=args.url)
@@ -0,0 +1,106 @@
+from html import escape
+
+# Renders a record in the extract_result shape back into a Result_Detail page.
+# Used for the parser fixtures and anywhere we need realistic pages without
+# hitting the board's site.
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Result Detail | BISE Rawalpindi</title>
+<link href="/Content/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+<div class="container body-content">
+  <div class="text-center">
+    <h3>BOARD OF INTERMEDIATE AND SECONDARY EDUCATION RAWALPINDI</h3>
+    <h4>RESULT INTIMATION</h4>
+    <h4>{exam}</h4>
+  </div>
+  <div class="row">
+    <div class="col-md-3"><b>ROLL NO</b></div>
+    <div class="col-md-3">{roll}</div>
+    <div class="col-md-3"><b>FORM-ID (for office use only)</b></div>
+    <div class="col-md-3">{form_id}</div>
+  </div>
+  <div class="row">
+    <div class="col-md-3"><b>STUDENT NAME</b></div>
+    <div class="col-md-3">{name}</div>
+    <div class="col-md-3"><b>STUDENT TYPE</b></div>
+    <div class="col-md-3">{student_type}</div>
+  </div>
+  <table class="table table-bordered table-condensed">
+    <tr>
+{header_cells}
+    </tr>
+{rows}
+  </table>
+  <div class="row">
+    <div class="col-md-3"><b>GRAND TOTAL</b></div>
+    <div class="col-md-3"><strong>{grand_total}</strong></div>
+    <div class="col-md-3"><b>STATUS</b></div>
+    <div class="col-md-3"><strong>{status}</strong></div>
+  </div>
+  <p class="small">Errors and omissions are excepted. This result intimation is issued for information only.</p>
+</div>
+</body>
+</html>
+"""
+
+EMPTY_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Result Detail | BISE Rawalpindi</title>
+</head>
+<body>
+<div class="container body-content">
+  <div class="alert alert-danger">No result found against the given information.</div>
+</div>
+</body>
+</html>
+"""
+
+BASE_COLUMNS = ["SUBJECT", "THEORY-I", "THEORY-II", "PRACTICAL", "TOTAL"]
+RELATIVE_COLUMNS = ["PERCENTILE MARKS", "RELATIVE GRADE", "REMARKS"]
+FIELD_KEYS = {
+    "SUBJECT": "Subject",
+    "THEORY-I": "Theory-I",
+    "THEORY-II": "Theory-II",
+    "PRACTICAL": "Practical",
+    "TOTAL": "Total",
+    "PERCENTILE MARKS": "Percentile Marks",
+    "RELATIVE GRADE": "Relative Grade",
+    "REMARKS": "Remarks",
+}
+
+
+def render_result_page(record, exam="SSC Annual Examination 2025", relative_columns=None):
+    # relative_columns controls the Percentile/Relative Grade/Remarks columns;
+    # by default they are shown if any subject carries them.
+    if not record or not record.get("Roll No"):
+        return EMPTY_PAGE
+
+    subjects = record.get("Subjects", [])
+    if relative_columns is None:
+        relative_columns = any("Percentile Marks" in s for s in subjects)
+    columns = BASE_COLUMNS + (RELATIVE_COLUMNS if relative_columns else [])
+
+    header_cells = "\n".join(f"      <th>{c}</th>" for c in columns)
+    rows = []
+    for subject in subjects:
+        cells = "".join(f"<td>{escape(str(subject.get(FIELD_KEYS[c], '')))}</td>" for c in columns)
+        rows.append(f"    <tr>{cells}</tr>")
+
+    return PAGE_TEMPLATE.format(
+        exam=escape(exam),
+        roll=escape(record["Roll No"]),
+        form_id=escape(str(record.get("Form-ID", ""))),
+        name=escape(record.get("Student Name", "")),
+        student_type=escape(record.get("Student Type", "")),
+        header_cells=header_cells,
+        rows="\n".join(rows),
+        grand_total=escape(record.get("Grand Total", "")),
+        status=escape(record.get("Status", "")),
+    )
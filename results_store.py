@@ -0,0 +1,389 @@
+import argparse
+import ast
+import io
+import json
+import os
+import re
+from array import array
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from student_records import (GRADES, NO_CODE, NO_MARK, REMARKS, SUBJECTS, StudentRecord,
+                             compact_records, to_dicts)
+
+# Long-format results table: one row per (student, subject) with typed
+# columns, stored as Parquet. Column names match pd.json_normalize on the
+# scraped JSON so the rest of the dashboard reads them the same way.
+#
+#   python results_store.py results_107004.json -o results_107004.parquet
+
+STUDENT_COLUMNS = ["Roll No", "Student Name", "Student Type", "Grand Total", "Status"]
+SUBJECT_COLUMNS = ["Subject", "Theory-I", "Theory-II", "Practical", "Total",
+                   "Percentile Marks", "Relative Grade", "Remarks"]
+MARK_COLUMNS = ["Theory-I", "Theory-II", "Practical", "Total"]
+CATEGORY_COLUMNS = ["Student Type", "Status", "Subject", "Relative Grade", "Remarks"]
+# Position of the row's student among the source records (0, 1, ...). Roll
+# numbers can't tell students apart: a roll can be missing (stored as 0) or
+# appear twice in a file.
+STUDENT_INDEX = "Student Index"
+
+STREAM_READ_SIZE = 1 << 20       # characters read from the file at a time
+STREAM_CHUNK_STUDENTS = 20_000   # students per columnar chunk
+MAX_RECORD_CHARS = 16 << 20      # a single student record larger than this is a broken file
+
+
+def _numbers(values, dtype, whole=True):
+    # Parses each distinct value once: a mark column holds a few hundred
+    # distinct strings across millions of rows. With whole=True anything
+    # that isn't a whole number (blank, "ABSENT", "76.5") becomes NA, the
+    # same marks int() would reject.
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    parsed = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+    if whole:
+        parsed = parsed.where(parsed == parsed.round())
+    return pd.Series(pd.array(parsed.astype(dtype)).take(codes, allow_fill=True))
+
+
+def _category(values):
+    # Object categories whatever the pandas version infers, so chunks built
+    # separately can be combined with union_categoricals
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return pd.Categorical.from_codes(codes, pd.Index(uniques, dtype=object))
+
+
+_CONVERTERS = {
+    "Roll No": lambda v: _numbers(v, "Int32").fillna(0).astype("int32"),
+    "Student Name": lambda v: pd.Series(v, dtype="string"),
+    "Student Type": _category,
+    "Grand Total": lambda v: _numbers(v, "Int16"),
+    "Status": lambda v: _category([s.strip().upper() if isinstance(s, str) else "" for s in v]),
+    "Subject": _category,
+    "Theory-I": lambda v: _numbers(v, "Int16"),
+    "Theory-II": lambda v: _numbers(v, "Int16"),
+    "Practical": lambda v: _numbers(v, "Int16"),
+    "Total": lambda v: _numbers(v, "Int16"),
+    "Percentile Marks": lambda v: _numbers(v, "float32", whole=False),
+    "Relative Grade": _category,
+    "Remarks": _category,
+    "Session": lambda v: np.asarray(v, dtype="int8"),
+    "Year": lambda v: np.asarray(v, dtype="int16"),
+    "Institution": _category,
+}
+
+
+def to_long_frame(records, q=None, r=None, columns=None):
+    # Flattens scraped/uploaded records (list of dicts or StudentRecords, or
+    # the DataFrame pd.read_json gives for an uploaded file) into the typed
+    # long table. Students without subjects keep one row with a missing
+    # Subject; a missing roll number is stored as 0. columns limits the
+    # table to the ones a caller needs (Roll No and Student Index are
+    # always kept).
+    wanted = set(columns or STUDENT_COLUMNS + SUBJECT_COLUMNS) | {"Roll No"}
+    if isinstance(records, pd.DataFrame):
+        records = records.to_dict("records")
+
+    if any(isinstance(record, StudentRecord) for record in records):
+        records = compact_records(records)
+        if any(record.extra for record in records):
+            # Values that didn't pack (e.g. an "ABSENT" mark) take the general path
+            df = _frame_from_dicts(to_dicts(records), wanted)
+        else:
+            df = _frame_from_compact(records, wanted)
+    else:
+        df = _frame_from_dicts(records, wanted)
+
+    if q is not None:
+        df["Session"] = np.full(len(df), q, dtype="int8")
+    if r is not None:
+        df["Year"] = np.full(len(df), r, dtype="int16")
+    return df
+
+
+def _frame_from_dicts(records, wanted):
+    # Student fields are collected once per student and repeated per
+    # subject row at the end; subject columns are pulled in one pass each
+    students = {c: [] for c in STUDENT_COLUMNS if c in wanted}
+    sizes = []
+    rows = []
+    for student in records:
+        subjects = student.get("Subjects") or [{}]
+        if isinstance(subjects, str):
+            # CSV uploads carry the subject list as its Python repr
+            subjects = ast.literal_eval(subjects)
+        for c, values in students.items():
+            values.append(student.get(c, ""))
+        sizes.append(len(subjects))
+        rows.extend(subjects)
+    subjects = {c: [row.get(c) for row in rows] for c in SUBJECT_COLUMNS if c in wanted}
+
+    student_frame = pd.DataFrame({c: _CONVERTERS[c](v) for c, v in students.items()})
+    index = np.repeat(np.arange(len(sizes), dtype=np.int32), sizes)
+    df = student_frame.take(index).reset_index(drop=True)
+    df[STUDENT_INDEX] = index
+    for c, values in subjects.items():
+        df[c] = _CONVERTERS[c](values)
+    return df
+
+
+def long_frame_from_columns(columns):
+    # Types raw per-row value lists (e.g. rows of a database query) the same
+    # way to_long_frame does: {"Roll No": [...], "Subject": [...], ...}
+    return pd.DataFrame({c: _CONVERTERS[c](values) for c, values in columns.items()})
+
+
+def _frame_from_compact(records, wanted):
+    # StudentRecords already hold marks as integers and names as codes, so
+    # the subject columns are their arrays joined end to end
+    empty_codes = array("H", [NO_CODE] * 3)
+    empty_marks = array("h", [NO_MARK] * len(MARK_COLUMNS))
+    empty_percentiles = array("f", [np.nan])
+    codes, marks, percentiles = array("H"), array("h"), array("f")
+    sizes = []
+    for record in records:
+        if len(record):
+            codes.extend(record.codes)
+            marks.extend(record.marks)
+            percentiles.extend(record.percentiles)
+        else:
+            codes.extend(empty_codes)
+            marks.extend(empty_marks)
+            percentiles.extend(empty_percentiles)
+        sizes.append(len(record) or 1)
+
+    students = {}
+    if "Roll No" in wanted:
+        students["Roll No"] = np.fromiter((max(record.roll, 0) for record in records),
+                                          dtype="int32", count=len(records))
+    if "Grand Total" in wanted:
+        totals = np.fromiter((record.grand_total for record in records), dtype="int16", count=len(records))
+        students["Grand Total"] = pd.arrays.IntegerArray(totals, totals == NO_MARK)
+    for c, attr in (("Student Name", "name"), ("Student Type", "student_type"), ("Status", "status")):
+        if c in wanted:
+            students[c] = _CONVERTERS[c]([getattr(record, attr) for record in records])
+    index = np.repeat(np.arange(len(sizes), dtype=np.int32), sizes)
+    df = pd.DataFrame(students).take(index).reset_index(drop=True)
+    df[STUDENT_INDEX] = index
+
+    def categories(column, table):
+        column = column.astype(np.int32)
+        column[column == NO_CODE] = -1
+        return pd.Categorical.from_codes(column, pd.Index(list(table.values), dtype=object))
+
+    codes = np.frombuffer(codes, dtype=np.uint16).reshape(-1, 3)
+    marks = np.frombuffer(marks, dtype=np.int16).reshape(-1, len(MARK_COLUMNS))
+    for c, column, table in (("Subject", 0, SUBJECTS), ("Relative Grade", 1, GRADES), ("Remarks", 2, REMARKS)):
+        if c in wanted:
+            df[c] = categories(codes[:, column], table)
+    for j, c in enumerate(MARK_COLUMNS):
+        if c in wanted:
+            df[c] = pd.arrays.IntegerArray(marks[:, j].copy(), marks[:, j] == NO_MARK)
+    if "Percentile Marks" in wanted:
+        df["Percentile Marks"] = np.frombuffer(percentiles, dtype=np.float32).copy()
+    return df
+
+
+def run_starts(*columns):
+    # True on each row where any of the columns differs from the row before
+    # (and on the first row)
+    starts = np.zeros(len(columns[0]), dtype=bool)
+    if len(starts):
+        starts[0] = True
+        for column in columns:
+            values = np.asarray(column)
+            starts[1:] |= values[1:] != values[:-1]
+    return starts
+
+
+def student_starts(df):
+    # True on the first row of each student. A student's rows are
+    # contiguous; frames stored before Student Index existed fall back to
+    # runs of roll numbers.
+    if STUDENT_INDEX in df.columns:
+        return run_starts(df[STUDENT_INDEX].to_numpy())
+    return run_starts(df["Roll No"].to_numpy())
+
+
+def is_long_frame(data):
+    return isinstance(data, pd.DataFrame) and "Subject" in data.columns and "Subjects" not in data.columns
+
+
+def from_long_frame(df):
+    # Back to the extract_result record shape (marks as strings again)
+    def text(value):
+        return "" if pd.isna(value) else str(value)
+
+    records = []
+    students = np.cumsum(student_starts(df)) - 1
+    for _, rows in df.groupby(students, sort=False):
+        first = rows.iloc[0]
+        record = {
+            "Roll No": str(first["Roll No"]),
+            "Student Name": text(first["Student Name"]),
+            "Student Type": text(first["Student Type"]),
+            "Grand Total": text(first["Grand Total"]),
+            "Status": text(first["Status"]),
+            "Subjects": [],
+        }
+        for values in rows.to_dict("records"):
+            if pd.isna(values["Subject"]):
+                continue
+            subject = {"Subject": values["Subject"]}
+            for c in MARK_COLUMNS:
+                subject[c] = text(values[c])
+            if not pd.isna(values["Percentile Marks"]):
+                subject["Percentile Marks"] = f"{values['Percentile Marks']:.2f}"
+            for c in ("Relative Grade", "Remarks"):
+                if not pd.isna(values[c]):
+                    subject[c] = values[c]
+            record["Subjects"].append(subject)
+        records.append(record)
+    return records
+
+
+def iter_json_records(fp, read_size=STREAM_READ_SIZE):
+    # Yields the elements of a top-level JSON array one at a time, reading
+    # the file in read_size pieces, so only the record being decoded and the
+    # current piece are held in memory.
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"[ \t\n\r]*")
+    buffer = ""
+    pos = 0
+    eof = False
+    state = "start"  # start -> first -> (separator -> value)* -> ]
+
+    while True:
+        pos = whitespace.match(buffer, pos).end()
+        if pos < len(buffer):
+            ch = buffer[pos]
+            if state == "start":
+                if ch != "[":
+                    raise ValueError("Results file must contain a JSON array of students")
+                pos += 1
+                state = "first"
+                continue
+            if ch == "]" and state in ("first", "separator"):
+                return
+            if state == "separator":
+                if ch != ",":
+                    raise ValueError(f"Expected ',' between students, found {ch!r}")
+                pos += 1
+                state = "value"
+                continue
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+                state = "separator"
+                yield record
+                continue
+            except json.JSONDecodeError:
+                # Most likely the record continues in the next piece
+                if eof or len(buffer) - pos > MAX_RECORD_CHARS:
+                    raise
+        elif eof:
+            raise ValueError("Unexpected end of results file")
+
+        chunk = fp.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def open_text(source):
+    # A path, a text file or a binary file (e.g. a Streamlit upload)
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, encoding="utf-8-sig")
+    if isinstance(source.read(0), bytes):
+        return io.TextIOWrapper(source, encoding="utf-8-sig")
+    return source
+
+
+def read_json_chunks(source, chunk_students=STREAM_CHUNK_STUDENTS, q=None, r=None, columns=None):
+    # Streams a results JSON file as long frames of up to chunk_students
+    # students each, never building the whole nested structure.
+    fp = open_text(source)
+    try:
+        batch = []
+        for record in iter_json_records(fp):
+            batch.append(record)
+            if len(batch) >= chunk_students:
+                yield to_long_frame(batch, q=q, r=r, columns=columns)
+                batch = []
+        if batch:
+            yield to_long_frame(batch, q=q, r=r, columns=columns)
+    finally:
+        if fp is not source:
+            if isinstance(fp, io.TextIOWrapper) and not isinstance(source, (str, os.PathLike)):
+                fp.detach()  # leave the caller's binary file open
+            else:
+                fp.close()
+
+
+def concat_long_frames(frames):
+    # Concatenates long frames built separately; category columns are merged
+    # with union_categoricals (pd.concat would fall back to object columns)
+    # and each frame's Student Index continues from the previous frame's
+    frames = list(frames)
+    if not frames:
+        return to_long_frame([])
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for c in frames[0].columns:
+        parts = [f[c] for f in frames]
+        if c == STUDENT_INDEX:
+            offsets = np.cumsum([0] + [int(p.max()) + 1 if len(p) else 0 for p in parts[:-1]])
+            parts = [(p + offset).astype(np.int32) for p, offset in zip(parts, offsets)]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[c] = union_categoricals(parts, ignore_order=True)
+        else:
+            columns[c] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_json_stream(source, chunk_students=STREAM_CHUNK_STUDENTS, q=None, r=None, columns=None):
+    # Loads a results JSON file straight into the long table with memory
+    # bounded by one chunk of nested records plus the typed table itself
+    return concat_long_frames(read_json_chunks(source, chunk_students, q=q, r=r, columns=columns))
+
+
+def write_parquet(df, path):
+    df.to_parquet(path, engine="pyarrow", index=False, compression="zstd")
+
+
+def read_parquet(path_or_file, columns=None):
+    df = pd.read_parquet(path_or_file, engine="pyarrow", columns=columns)
+    # Parquet round-trips dictionary columns as categories already; make sure
+    # older files written without them still come back typed
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def save_results(records, path, q=None, r=None):
+    # Writes scraped records as Parquet when path ends in .parquet, otherwise
+    # as the usual JSON list
+    if path.endswith(".parquet"):
+        write_parquet(to_long_frame(records, q=q, r=r), path)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(to_dicts(records), f, indent=2, ensure_ascii=False)
+
+
+def convert_file(json_path, output=None, q=None, r=None):
+    df = read_json_stream(json_path, q=q, r=r)
+    output = output or os.path.splitext(json_path)[0] + ".parquet"
+    write_parquet(df, output)
+    return df, output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a results JSON file to the columnar Parquet store")
+    parser.add_argument("json_file")
+    parser.add_argument("-o", "--output", help="defaults to the JSON name with .parquet")
+    parser.add_argument("-q", type=int, help="session to record with the results")
+    parser.add_argument("-r", type=int, help="year to record with the results")
+    args = parser.parse_args()
+    df, output = convert_file(args.json_file, args.output, q=args.q, r=args.r)
+    print(f"Wrote {len(df)} rows ({df['Roll No'].nunique()} students) to {output} "
+          f"({os.path.getsize(output) / 1024:.0f} KB, was {os.path.getsize(args.json_file) / 1024:.0f} KB)")
@@ -0,0 +1,294 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from results_store import STUDENT_INDEX, iter_json_records, long_frame_from_columns, open_text, run_starts
+from student_records import StudentRecord
+
+# Local warehouse of every scraped result, across institutions, sessions (q)
+# and years (r), in one SQLite file:
+#
+#   python results_warehouse.py import results_107004.json -q 2 -r 2025
+#   python results_warehouse.py list
+#
+# Students and their subject marks are stored typed (marks that aren't whole
+# numbers become NULL, as in the long table). Loading an institution is one
+# indexed query that returns the same long frame the Parquet store does.
+
+DEFAULT_WAREHOUSE_PATH = os.path.join("data", "results.sqlite3")
+DEFAULT_BATCH_SIZE = 500  # students per insert transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS institutions (
+    code TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS students (
+    roll INTEGER NOT NULL,
+    q INTEGER NOT NULL,
+    r INTEGER NOT NULL,
+    institution TEXT,
+    name TEXT,
+    student_type TEXT,
+    grand_total INTEGER,
+    status TEXT,
+    scraped_at REAL NOT NULL,
+    PRIMARY KEY (roll, q, r)
+);
+CREATE INDEX IF NOT EXISTS students_institution ON students (institution, q, r);
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS marks (
+    roll INTEGER NOT NULL,
+    q INTEGER NOT NULL,
+    r INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL REFERENCES subjects (id),
+    theory_1 INTEGER,
+    theory_2 INTEGER,
+    practical INTEGER,
+    total INTEGER,
+    percentile REAL,
+    grade TEXT,
+    remarks TEXT,
+    PRIMARY KEY (roll, q, r, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS marks_subject ON marks (subject_id, q, r);
+"""
+
+LOAD_COLUMNS = ["Roll No", "Student Name", "Student Type", "Grand Total", "Status", "Subject",
+                "Theory-I", "Theory-II", "Practical", "Total", "Percentile Marks", "Relative Grade",
+                "Remarks", "Session", "Year", "Institution"]
+
+
+def _int(value):
+    value = value.strip() if isinstance(value, str) else value
+    return int(value) if isinstance(value, str) and value.isdigit() else None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultsWarehouse:
+    # Safe to share between threads; every write holds the lock. Several
+    # processes (e.g. batch_scrape workers) can write to the same file.
+    def __init__(self, path=DEFAULT_WAREHOUSE_PATH, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._subject_ids = {}
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._subject_ids = dict(self._conn.execute("SELECT name, id FROM subjects"))
+
+    # ---------- writing ----------
+    def add(self, records, q, r, institution=None, name=None):
+        # Stores records (dicts or StudentRecords) for one session/year,
+        # replacing any earlier copy of the same rolls. Inserts go in
+        # batch_size transactions. Returns the number of students stored.
+        stored = 0
+        with self.writer(q, r, institution, name) as writer:
+            for record in records:
+                writer.add(record)
+                stored += 1
+        return stored
+
+    def writer(self, q, r, institution=None, name=None):
+        return WarehouseWriter(self, q, r, institution, name)
+
+    def _subject_id(self, subject):
+        subject_id = self._subject_ids.get(subject)
+        if subject_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO subjects (name) VALUES (?)", (subject,))
+            subject_id = self._conn.execute("SELECT id FROM subjects WHERE name=?", (subject,)).fetchone()[0]
+            self._subject_ids[subject] = subject_id
+        return subject_id
+
+    def _write_batch(self, records, q, r, institution, name):
+        now = time.time()
+        students = []
+        marks = []
+        with self._lock:
+            for record in records:
+                if isinstance(record, StudentRecord):
+                    record = record.to_dict()
+                roll = _int(record.get("Roll No"))
+                if roll is None:
+                    continue
+                students.append((roll, q, r, institution, record.get("Student Name", ""),
+                                 record.get("Student Type", ""), _int(record.get("Grand Total")),
+                                 (record.get("Status") or "").strip().upper(), now))
+                for position, subject in enumerate(record.get("Subjects", [])):
+                    marks.append((roll, q, r, position, self._subject_id(subject.get("Subject", "")),
+                                  _int(subject.get("Theory-I")), _int(subject.get("Theory-II")),
+                                  _int(subject.get("Practical")), _int(subject.get("Total")),
+                                  _float(subject.get("Percentile Marks")),
+                                  subject.get("Relative Grade"), subject.get("Remarks")))
+            with self._conn:
+                if institution is not None:
+                    self._conn.execute(
+                        "INSERT INTO institutions (code, name) VALUES (?, ?) "
+                        "ON CONFLICT (code) DO UPDATE SET name=COALESCE(excluded.name, name)",
+                        (institution, name))
+                self._conn.executemany("DELETE FROM marks WHERE roll=? AND q=? AND r=?",
+                                       [s[:3] for s in students])
+                self._conn.executemany("INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       students)
+                self._conn.executemany("INSERT INTO marks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", marks)
+        return len(students)
+
+    # ---------- reading ----------
+    def load(self, institution=None, q=None, r=None, rolls=None):
+        # One indexed query; returns a long frame (see results_store) with
+        # Session, Year and Institution columns, in roll and subject order.
+        # rolls (any number of them) go through a temporary table rather
+        # than bound one by one, which SQLite caps at 999 parameters.
+        where, params = [], []
+        for column, value in (("s.institution", institution), ("s.q", q), ("s.r", r)):
+            if value is not None:
+                where.append(f"{column}=?")
+                params.append(value)
+        if rolls is not None:
+            where.append("s.roll IN (SELECT roll FROM load_rolls)")
+        sql = f"""
+            SELECT s.roll, s.name, s.student_type, s.grand_total, s.status, sub.name,
+                   m.theory_1, m.theory_2, m.practical, m.total, m.percentile, m.grade,
+                   m.remarks, s.q, s.r, s.institution
+            FROM students s
+            LEFT JOIN marks m ON m.roll=s.roll AND m.q=s.q AND m.r=s.r
+            LEFT JOIN subjects sub ON sub.id=m.subject_id
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY s.institution, s.q, s.r, s.roll, m.position
+        """
+        if rolls is None:
+            rows = self._conn.execute(sql, params).fetchall()
+        else:
+            with self._lock, self._conn:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS load_rolls (roll INTEGER PRIMARY KEY)")
+                self._conn.executemany("INSERT OR IGNORE INTO load_rolls VALUES (?)", ((int(p),) for p in rolls))
+                rows = self._conn.execute(sql, params).fetchall()
+                self._conn.execute("DELETE FROM load_rolls")
+        columns = zip(*rows) if rows else [[] for _ in LOAD_COLUMNS]
+        df = long_frame_from_columns(dict(zip(LOAD_COLUMNS, columns)))
+        # A student is a (roll, q, r), and their rows come together
+        starts = run_starts(df["Session"].to_numpy(), df["Year"].to_numpy(), df["Roll No"].to_numpy())
+        df[STUDENT_INDEX] = (np.cumsum(starts) - 1).astype(np.int32)
+        return df
+
+    def query_plan(self, institution, q, r):
+        # For checking the load query uses the indexes
+        return [row[-1] for row in self._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM students s JOIN marks m "
+            "ON m.roll=s.roll AND m.q=s.q AND m.r=s.r WHERE s.institution=? AND s.q=? AND s.r=?",
+            (institution, q, r))]
+
+    def datasets(self):
+        # [{"institution", "name", "q", "r", "students", "pass", "updated"}]
+        # for every institution/session/year in the warehouse; updated is
+        # the time its latest student was stored
+        rows = self._conn.execute("""
+            SELECT s.institution, i.name, s.q, s.r, COUNT(*), SUM(s.status = 'PASS'), MAX(s.scraped_at)
+            FROM students s LEFT JOIN institutions i ON i.code = s.institution
+            GROUP BY s.institution, s.q, s.r
+            ORDER BY s.r DESC, s.q, s.institution
+        """).fetchall()
+        return [{"institution": row[0], "name": row[1], "q": row[2], "r": row[3],
+                 "students": row[4], "pass": row[5], "updated": row[6]} for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+class WarehouseWriter:
+    # Buffers records and writes them batch_size at a time, so a scrape can
+    # hand over each result as it arrives. Use as a context manager, or call
+    # flush() at the end.
+    def __init__(self, warehouse, q, r, institution=None, name=None):
+        self.warehouse = warehouse
+        self.q = q
+        self.r = r
+        self.institution = institution
+        self.name = name
+        self.written = 0
+        self._pending = []
+
+    def add(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.warehouse.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.written += self.warehouse._write_batch(self._pending, self.q, self.r,
+                                                        self.institution, self.name)
+            self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def institution_from_path(path):
+    # The institution code in a results file name, results_107004.json or
+    # 107004.json as batch_scrape.py writes them; None if the name has none
+    match = re.fullmatch(r"(?:results_)?(\d+)\.json", os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def import_file(path, q, r, institution=None, name=None, warehouse_path=DEFAULT_WAREHOUSE_PATH):
+    # Streams a results JSON file into the warehouse
+    warehouse = ResultsWarehouse(warehouse_path)
+    fp = open_text(path)
+    try:
+        return warehouse.add(iter_json_records(fp), q, r, institution, name)
+    finally:
+        fp.close()
+        warehouse.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local results warehouse")
+    parser.add_argument("--db", default=DEFAULT_WAREHOUSE_PATH, help="warehouse file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="import a results JSON file")
+    load.add_argument("json_file")
+    load.add_argument("--institution",
+                      help="institution code, e.g. 107004 (default: from a results_<code>.json or <code>.json name)")
+    load.add_argument("--name", help="institution name")
+    load.add_argument("-q", type=int, default=2, help="session (default 2)")
+    load.add_argument("-r", type=int, default=2025, help="year (default 2025)")
+    commands.add_parser("list", help="list the institutions, sessions and years stored")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        institution = args.institution or institution_from_path(args.json_file)
+        if institution is None:
+            parser.error(f"no institution code in the name {args.json_file}; give --institution")
+        start = time.perf_counter()
+        count = import_file(args.json_file, args.q, args.r, institution, args.name, args.db)
+        print(f"Imported {count} students into {args.db} in {time.perf_counter() - start:.1f}s")
+    else:
+        warehouse = ResultsWarehouse(args.db)
+        for d in warehouse.datasets():
+            print(f"{d['institution'] or '-':>10}  {d['name'] or '':<40} q={d['q']} r={d['r']} "
+                  f"{d['students']:>6} students, {d['pass']} passed")
+        warehouse.close()
@@ -0,0 +1,167 @@
+from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE, make_session, scrape_rolls
+from throttle import AdaptiveThrottle
+
+# Tuned on MC Girls GKN.txt: gaps inside a block are at most 14 rolls, gaps
+# between blocks are thousands, and block heads can be sparse (one roll in
+# six). Over 103516-160753 these settings find all 435 of its rolls with
+# 4,112 of 57,238 requests; from other starting offsets the lone roll 107004
+# can fall between two samples, but every block is still found.
+DEFAULT_GAP = 16           # longest run of empty rolls inside a populated block
+DEFAULT_BATCH = 16         # rolls fetched together while scanning a block
+DEFAULT_PROBE_STRIDE = 20  # distance between samples in a dead stretch
+DEFAULT_PROBE_WIDTH = 8    # samples fetched together per probe step
+DEFAULT_PROBE_WINDOW = 1   # consecutive rolls fetched at each sample
+
+
+def is_hit(result):
+    return bool(result and result.get("Roll No"))
+
+
+class RangeProber:
+    # Scrapes a roll number range without fetching every dead number in it.
+    #
+    # Institutions get their rolls in clusters (see MC Girls GKN.txt), so a
+    # range is mostly empty pages with a few populated blocks. The prober scans
+    # densely while it is inside a block; once more than `gap` consecutive
+    # rolls are empty it switches to sampling every `probe_stride`-th roll
+    # ahead. When a sample hits, it walks backwards from the hit until it sees
+    # more than `gap` empties again (the start of the block) and resumes dense
+    # scanning after the hit.
+    #
+    # A block that fits entirely between two samples can be missed; lower the
+    # stride for ranges with very small blocks.
+    #
+    # fetch_batch(rolls) must return {roll: (result, error)}.
+    def __init__(self, fetch_batch, gap=DEFAULT_GAP, batch_size=DEFAULT_BATCH,
+                 probe_stride=DEFAULT_PROBE_STRIDE, probe_width=DEFAULT_PROBE_WIDTH,
+                 probe_window=DEFAULT_PROBE_WINDOW, on_progress=None):
+        self.fetch_batch = fetch_batch
+        self.gap = gap
+        self.batch_size = batch_size
+        self.probe_stride = probe_stride
+        self.probe_width = probe_width
+        self.probe_window = probe_window
+        self.on_progress = on_progress
+        self.outcomes = {}
+        self.span = 0
+        self.probes = 0
+        self.skipped_stretches = 0
+
+    def _fetch(self, rolls):
+        rolls = [p for p in rolls if p not in self.outcomes]
+        if rolls:
+            fetched = self.fetch_batch(rolls)
+            for p in rolls:
+                self.outcomes[p] = fetched[p]
+                if self.on_progress is not None:
+                    result, error = fetched[p]
+                    self.on_progress(p, result, error)
+
+    def _state(self, p):
+        # "hit", "empty" or "error"; errors don't count towards a gap
+        result, error = self.outcomes[p]
+        if error is not None:
+            return "error"
+        return "hit" if is_hit(result) else "empty"
+
+    def probe_range(self, start, end):
+        self.span += end - start + 1
+        cursor = start
+        empties = 0
+        stretch_start = start
+
+        while cursor <= end:
+            if empties <= self.gap:
+                # Dense scan inside (or at the edge of) a populated block
+                batch = list(range(cursor, min(end, cursor + self.batch_size - 1) + 1))
+                self._fetch(batch)
+                for p in batch:
+                    state = self._state(p)
+                    if state == "hit":
+                        empties = 0
+                    elif state == "empty":
+                        empties += 1
+                cursor = batch[-1] + 1
+                stretch_start = cursor
+                continue
+
+            # Dead stretch: sample ahead
+            samples = [cursor + self.probe_stride * k + j
+                       for k in range(1, self.probe_width + 1) for j in range(self.probe_window)]
+            samples = [p for p in samples if p <= end] or [end]
+            self.probes += 1
+            self._fetch(samples)
+            hits = [p for p in samples if self._state(p) == "hit"]
+            if not hits:
+                self.skipped_stretches += 1
+                cursor = samples[-1] + 1
+                continue
+
+            # The samples may have stepped over the sparse head of the block,
+            # so the backfill may reach back to where the stretch began
+            first_hit = hits[0]
+            self._backfill(first_hit, lower=stretch_start)
+            cursor = first_hit + 1
+            empties = 0
+
+        return self.results(start, end)
+
+    def _backfill(self, hit, lower):
+        # Walk down from a sampled hit to find where its block starts
+        empties = 0
+        top = hit - 1
+        while top >= lower and empties <= self.gap:
+            batch = list(range(top, max(lower, top - self.batch_size + 1) - 1, -1))
+            self._fetch(batch)
+            for p in batch:
+                state = self._state(p)
+                if state == "hit":
+                    empties = 0
+                elif state == "empty":
+                    empties += 1
+                    if empties > self.gap:
+                        break
+            top = batch[-1] - 1
+
+    def results(self, start=None, end=None):
+        # (p, result, error) for every fetched roll in ascending order
+        return [(p, *self.outcomes[p]) for p in sorted(self.outcomes)
+                if (start is None or p >= start) and (end is None or p <= end)]
+
+    def stats(self):
+        requested = len(self.outcomes)
+        hits = sum(1 for p in self.outcomes if self._state(p) == "hit")
+        return {
+            "span": self.span,
+            "requested": requested,
+            "saved": self.span - requested,
+            "saved_pct": 100 * (self.span - requested) / self.span if self.span else 0.0,
+            "hits": hits,
+            "probes": self.probes,
+            "skipped_stretches": self.skipped_stretches,
+        }
+
+
+def probe_rolls(spans, q=2, r=2025, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                cache=None, throttle=None, on_progress=None, url=None, **prober_options):
+    # Scrapes a list of (start, end) spans with one RangeProber. Single roll
+    # numbers are just spans of length one. Returns the prober so callers can
+    # read results() and stats().
+    throttle = throttle or AdaptiveThrottle(rate=rate, concurrency=concurrency)
+    kwargs = {"url": url} if url else {}
+    # One keep-alive session for every batch, so connections survive
+    # between the prober's small batches
+    session = make_session(max(concurrency, throttle.max_concurrency))
+
+    def fetch_batch(rolls):
+        outcomes = scrape_rolls(rolls, q=q, r=r, concurrency=concurrency, cache=cache,
+                                throttle=throttle, session=session, **kwargs)
+        return {p: (result, error) for p, result, error in outcomes}
+
+    prober = RangeProber(fetch_batch, on_progress=on_progress, **prober_options)
+    try:
+        for start, end in spans:
+            prober.probe_range(start, end)
+    finally:
+        session.close()
+    return prober
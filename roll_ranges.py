@@ -0,0 +1,23 @@
+# Roll number lists as typed into the dashboard and the CLIs: comma
+# separated numbers and ranges, "103683, 124861-124870". No dependencies, so
+# analysis can read them without loading the HTTP client.
+
+
+def parse_p_ranges(p_input):
+    # "103683, 124861-124870" -> [(103683, 103683), (124861, 124870)]
+    spans = []
+    for part in p_input.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = map(int, part.split('-'))
+            spans.append((start, end))
+        else:
+            spans.append((int(part), int(part)))
+    return spans
+
+
+def parse_p_input(p_input):
+    result = []
+    for start, end in parse_p_ranges(p_input):
+        result.extend(range(start, end + 1))
+    return result
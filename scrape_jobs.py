@@ -0,0 +1,195 @@
+import json
+import os
+import time
+import uuid
+
+import requests
+
+from results_store import save_results
+from roll_ranges import parse_p_input
+from scraper import DEFAULT_CONCURRENCY, DEFAULT_RATE, scrape_rolls
+from student_records import StudentRecord
+from throttle import is_transient
+
+JOBS_DIR = "jobs"
+MAX_ATTEMPTS = 3
+
+# Journal entry states
+DONE = "done"        # page parsed and has a roll number
+EMPTY = "empty"      # page parsed but no such roll for this session/year
+FAILED = "failed"    # permanent failure, not retried on resume
+ERROR = "error"      # transient failure, retried on resume
+
+FINISHED_STATES = (DONE, EMPTY, FAILED)
+
+
+def _is_permanent(error):
+    # Blocks and other transient errors are retried on resume
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return not is_transient(error)
+    return False
+
+
+class ScrapeJob:
+    # A scrape of a fixed roll list for one (q, r), checkpointed to
+    # jobs/<job_id>/journal.jsonl. Every finished roll is appended to the
+    # journal as soon as it arrives, so a crash or a Streamlit rerun loses at
+    # most the rolls that were in flight. Loading a job replays the journal;
+    # the last entry for a roll wins. Finished results are held in memory as
+    # compact StudentRecords.
+    def __init__(self, job_id, p_list, q=2, r=2025, jobs_dir=JOBS_DIR, meta=None):
+        self.job_id = job_id
+        self.p_list = list(p_list)
+        self.q = q
+        self.r = r
+        self.meta = meta or {}
+        self.dir = os.path.join(jobs_dir, job_id)
+        self.journal_path = os.path.join(self.dir, "journal.jsonl")
+        self.entries = {}
+
+    # ---------- creation / loading ----------
+    @classmethod
+    def create(cls, p_values, q=2, r=2025, job_id=None, jobs_dir=JOBS_DIR, meta=None):
+        p_list = parse_p_input(p_values) if isinstance(p_values, str) else list(p_values)
+        job_id = job_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        job = cls(job_id, p_list, q, r, jobs_dir, meta)
+        os.makedirs(job.dir, exist_ok=True)
+        with open(os.path.join(job.dir, "job.json"), "w", encoding="utf-8") as f:
+            json.dump({"job_id": job_id, "q": q, "r": r, "rolls": job.p_list,
+                       "created": time.time(), **job.meta}, f)
+        open(job.journal_path, "a").close()
+        return job
+
+    @classmethod
+    def load(cls, job_id, jobs_dir=JOBS_DIR):
+        with open(os.path.join(jobs_dir, job_id, "job.json"), encoding="utf-8") as f:
+            spec = json.load(f)
+        meta = {k: v for k, v in spec.items() if k not in ("job_id", "q", "r", "rolls", "created")}
+        job = cls(job_id, spec["rolls"], spec["q"], spec["r"], jobs_dir, meta)
+        job._replay()
+        return job
+
+    def _replay(self):
+        self.entries = {}
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                if "result" in entry:
+                    entry["result"] = StudentRecord.from_dict(entry["result"])
+                self.entries[entry["p"]] = entry
+
+    # ---------- progress ----------
+    def pending(self):
+        return [p for p in self.p_list
+                if self.entries.get(p, {}).get("state") not in FINISHED_STATES]
+
+    def counts(self):
+        # Journaled rolls that are no longer in the roll list don't count
+        counts = {DONE: 0, EMPTY: 0, FAILED: 0, ERROR: 0}
+        for p in set(self.p_list):
+            if p in self.entries:
+                counts[self.entries[p]["state"]] += 1
+        counts["pending"] = len(self.pending())
+        counts["total"] = len(self.p_list)
+        return counts
+
+    def is_complete(self):
+        return not self.pending()
+
+    def record(self, p, result, error, journal):
+        previous = self.entries.get(p, {})
+        attempts = previous.get("attempts", 0) + 1
+        if error is None:
+            state = DONE if result and result.get("Roll No") else EMPTY
+            entry = {"p": p, "state": state, "attempts": attempts}
+            if state == DONE:
+                entry["result"] = result
+        else:
+            permanent = _is_permanent(error) or attempts >= MAX_ATTEMPTS
+            entry = {"p": p, "state": FAILED if permanent else ERROR,
+                     "attempts": attempts, "error": str(error)}
+        journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        journal.flush()
+        if "result" in entry:
+            entry["result"] = StudentRecord.from_dict(result)
+        self.entries[p] = entry
+        return entry
+
+    # ---------- running ----------
+    def run(self, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, cache=None,
+            on_progress=None, url=None, throttle=None, warehouse=None):
+        # Scrapes every roll not yet finished. on_progress has the same
+        # signature as in scrape_rolls and is called after the roll has been
+        # journaled. With a ResultsWarehouse, finished results are streamed
+        # into it in batches, tagged with the job's institution from meta.
+        # Returns the number of rolls attempted.
+        todo = self.pending()
+        if not todo:
+            return 0
+
+        # Terminate a torn last line so the next entry starts cleanly
+        with open(self.journal_path, "rb+") as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+        writer = None
+        if warehouse is not None:
+            writer = warehouse.writer(self.q, self.r, self.meta.get("institution"), self.meta.get("name"))
+
+        with open(self.journal_path, "a", encoding="utf-8") as journal:
+
+            def checkpoint(done, total, p, result, error):
+                entry = self.record(p, result, error, journal)
+                if writer is not None and entry["state"] == DONE:
+                    writer.add(entry["result"])
+                if on_progress is not None:
+                    on_progress(done, total, p, result, error)
+
+            kwargs = {"url": url} if url else {}
+            scrape_rolls(todo, q=self.q, r=self.r, concurrency=concurrency, rate=rate,
+                         on_progress=checkpoint, cache=cache, throttle=throttle, **kwargs)
+            if writer is not None:
+                writer.flush()
+            journal.flush()
+            os.fsync(journal.fileno())
+        return len(todo)
+
+    # ---------- output ----------
+    def results(self, as_records=False):
+        # Parsed records in roll-list order, as dicts in the extract_result
+        # shape or, with as_records, the StudentRecords themselves
+        records = [self.entries[p]["result"] for p in self.p_list
+                   if self.entries.get(p, {}).get("state") == DONE]
+        return records if as_records else [record.to_dict() for record in records]
+
+    def compact(self, output=None, as_records=False):
+        # Rewrites the journal with one line per roll and, if output is given,
+        # writes the finished results there (JSON, or Parquet for .parquet).
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for p in self.p_list:
+                if p in self.entries:
+                    entry = self.entries[p]
+                    if "result" in entry:
+                        entry = {**entry, "result": entry["result"].to_dict()}
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.journal_path)
+
+        results = self.results(as_records=as_records)
+        if output:
+            save_results(results, output, q=self.q, r=self.r)
+        return results
+
+
+def list_jobs(jobs_dir=JOBS_DIR):
+    if not os.path.isdir(jobs_dir):
+        return []
+    return sorted((d for d in os.listdir(jobs_dir)
+                   if os.path.exists(os.path.join(jobs_dir, d, "job.json"))), reverse=True)
@@ -0,0 +1,300 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import perf_trace
+from roll_ranges import parse_p_input, parse_p_ranges  # noqa: F401 (re-exported)
+from throttle import AdaptiveThrottle, backoff_delay, is_transient
+
+RESULT_URL = "https://results.biserawalpindi.edu.pk/Result_Detail"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
+    "Referer": "https://results.biserawalpindi.edu.pk/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Connection": "keep-alive",
+}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0  # starting requests per second; adapts while scraping
+DEFAULT_RETRIES = 3  # per roll, with jittered exponential backoff
+REQUEST_TIMEOUT = 30
+
+
+# ========== HTTP Session ==========
+def make_session(pool_size=DEFAULT_CONCURRENCY):
+    # One keep-alive session shared by all workers; the pool must be at least
+    # as large as the number of workers or connections get thrown away.
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ========== Scraping Functions ==========
+def fetch_html(p, q, r, session=None, url=RESULT_URL):
+    params = {"p": p, "q": q, "r": r}
+    with perf_trace.span("fetch"):
+        if session is None:
+            response = requests.get(url, params=params, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        else:
+            response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    perf_trace.count("requests")
+    perf_trace.count("bytes downloaded", len(response.content))
+    response.raise_for_status()  # raises 403 if blocked
+    return response.text
+
+
+# ========== Result Page Parsers ==========
+# extract_result can use either backend; both return identical dicts.
+#   "bs4"  - BeautifulSoup over the pure-Python html.parser (the original)
+#   "lxml" - one pass over an lxml tree, roughly an order of magnitude faster
+INFO_FIELDS = [
+    ("Roll No", "ROLL NO"),
+    ("Student Name", "STUDENT NAME"),
+    ("Student Type", "STUDENT TYPE"),
+    ("Grand Total", "GRAND TOTAL"),
+    ("Status", "STATUS"),
+]
+INFO_PATTERNS = [(key, re.compile(rf"^{label}", re.IGNORECASE)) for key, label in INFO_FIELDS]
+# All labels in one regex; the named group tells which one matched
+INFO_LABEL_RE = re.compile(
+    "|".join(rf"(?P<f{i}>^{label})" for i, (_, label) in enumerate(INFO_FIELDS)), re.IGNORECASE)
+
+
+def _subject_entry(headers, values):
+    row_dict = dict(zip(headers, values))
+
+    if not row_dict.get("SUBJECT"):
+        return None
+
+    subject_entry = {
+        "Subject": row_dict.get("SUBJECT", ""),
+        "Theory-I": row_dict.get("THEORY-I", ""),
+        "Theory-II": row_dict.get("THEORY-II", ""),
+        "Practical": row_dict.get("PRACTICAL", ""),
+        "Total": row_dict.get("TOTAL", "")
+    }
+
+    if "PERCENTILE MARKS" in headers:
+        if row_dict.get("PERCENTILE MARKS"):
+            subject_entry["Percentile Marks"] = row_dict["PERCENTILE MARKS"]
+        if row_dict.get("RELATIVE GRADE"):
+            subject_entry["Relative Grade"] = row_dict["RELATIVE GRADE"]
+        if row_dict.get("REMARKS"):
+            subject_entry["Remarks"] = row_dict["REMARKS"]
+
+    return subject_entry
+
+
+def extract_result_bs4(html):
+    from bs4 import BeautifulSoup  # the fallback parser; lxml is the default
+    soup = BeautifulSoup(html, "html.parser")
+    info = {}
+
+    # Broken markup gives empty fields rather than an error, as in the lxml
+    # backend: a label with nothing after it, a table without rows
+    for key, pattern in INFO_PATTERNS:
+        field = soup.find(string=pattern)
+        value = field.find_next() if field else None
+        info[key] = value.get_text(strip=True) if value else ""
+
+    subject_table = soup.find("table")
+    subjects = []
+    rows = subject_table.find_all("tr") if subject_table else []
+
+    if rows:
+        headers = [th.get_text(strip=True).upper() for th in rows[0].find_all("th")]
+
+        for row in rows[1:]:
+            cells = row.find_all("td")
+            if len(cells) != len(headers):
+                continue
+
+            subject_entry = _subject_entry(headers, [td.get_text(strip=True) for td in cells])
+            if subject_entry:
+                subjects.append(subject_entry)
+
+    info["Subjects"] = subjects
+    return info
+
+
+def _lxml_text(element):
+    # Same as BeautifulSoup's get_text(strip=True)
+    return "".join(t.strip() for t in element.itertext())
+
+
+def extract_result_lxml(html):
+    root = lxml_html.document_fromstring(html) if html.strip() else None
+    info = {key: "" for key, _ in INFO_FIELDS}
+    subjects = []
+    if root is None:
+        info["Subjects"] = subjects
+        return info
+
+    # Single pass over the document in order: an element's text, then its
+    # descendants, then its tail, checking each text for the info labels. A
+    # label's value is the next element in document order, which is what
+    # BeautifulSoup's find_next() returns. Only the first label of each
+    # field counts, as with find().
+    elements = []
+    subject_table = None
+    targets = {}  # field -> position in `elements` of its value element
+
+    def label(text, target):
+        match = INFO_LABEL_RE.match(text) if text else None
+        if match:
+            key = INFO_FIELDS[int(match.lastgroup[1:])][0]
+            if key not in targets:
+                targets[key] = target
+
+    stack = [(root, False)]
+    while stack:
+        element, finished = stack.pop()
+        if finished:
+            # The element after this subtree is the next one appended
+            label(element.tail, len(elements))
+            continue
+        stack.append((element, True))
+        if isinstance(element.tag, str):
+            elements.append(element)
+            if subject_table is None and element.tag == "table":
+                subject_table = element
+            label(element.text, len(elements))
+            stack.extend((child, False) for child in reversed(element))
+
+    for key, target in targets.items():
+        if target < len(elements):
+            info[key] = _lxml_text(elements[target])
+
+    if subject_table is not None:
+        rows = list(subject_table.iter("tr"))
+        if rows:
+            headers = [_lxml_text(th).upper() for th in rows[0].iter("th")]
+            for row in rows[1:]:
+                cells = list(row.iter("td"))
+                if len(cells) != len(headers):
+                    continue
+
+                subject_entry = _subject_entry(headers, [_lxml_text(td) for td in cells])
+                if subject_entry:
+                    subjects.append(subject_entry)
+
+    info["Subjects"] = subjects
+    return info
+
+
+PARSER_BACKENDS = {"bs4": extract_result_bs4}
+try:
+    from lxml import html as lxml_html
+    PARSER_BACKENDS["lxml"] = extract_result_lxml
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "bs4"
+
+
+def extract_result(html, backend=None):
+    with perf_trace.span("parse"):
+        return PARSER_BACKENDS[backend or DEFAULT_PARSER](html)
+
+
+def _fetch_one(p, q, r, session, throttle, url, cache, retries):
+    if cache is not None:
+        cached = cache.get(p, q, r)
+        if cached is not None:
+            return cached
+    for attempt in range(retries + 1):
+        throttle.acquire()
+        try:
+            html = fetch_html(p, q, r, session=session, url=url)
+        except Exception as e:
+            throttle.release(e)
+            if attempt == retries or not is_transient(e):
+                raise
+            throttle.record_retry()
+            time.sleep(backoff_delay(attempt))
+            continue
+        throttle.release()
+        break
+    result = extract_result(html)
+    if cache is not None:
+        cache.put(p, q, r, html, result)
+    return result
+
+
+def scrape_rolls(p_list, q=2, r=2025, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 on_progress=None, url=RESULT_URL, cache=None, throttle=None,
+                 retries=DEFAULT_RETRIES, retry_passes=1, session=None):
+    # Fetches and parses every roll number on a thread pool over one pooled
+    # session. Returns a list of (p, result, error) in the same order as
+    # p_list; exactly one of result/error is None.
+    #
+    # on_progress(done, total, p, result, error) is called from the calling
+    # thread as each roll finishes, so it is safe to update Streamlit widgets
+    # from it.
+    #
+    # With a ResultCache, rolls already cached for (q, r) are answered locally
+    # and fresh pages are written back.
+    #
+    # Request pacing and the number of requests in flight are adapted by an
+    # AdaptiveThrottle (starting at `rate` and `concurrency`), which also
+    # trips a circuit breaker when the board starts blocking us. Rolls that
+    # still fail with a transient error are queued and retried in up to
+    # `retry_passes` later passes, once the breaker has let traffic through
+    # again.
+    #
+    # A caller-supplied session (e.g. with response hooks) is used as is and
+    # left open.
+    p_list = list(p_list)
+    total = len(p_list)
+    outcomes = [None] * total
+    if not total:
+        return outcomes
+
+    workers = max(1, min(concurrency, total))
+    throttle = throttle or AdaptiveThrottle(rate=rate, concurrency=workers)
+    own_session = session is None
+    if own_session:
+        session = make_session(max(workers, throttle.max_concurrency))
+    done = 0
+
+    try:
+        queue = list(range(total))
+        # Workers record fetch/parse spans into the caller's trace
+        fetch_one = perf_trace.bind(_fetch_one)
+        for attempt_pass in range(retry_passes + 1):
+            last_pass = attempt_pass == retry_passes
+            retry_later = []
+            with ThreadPoolExecutor(max_workers=max(workers, throttle.max_concurrency)) as pool:
+                futures = {
+                    pool.submit(fetch_one, p_list[i], q, r, session, throttle, url, cache, retries): i
+                    for i in queue
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    p = p_list[i]
+                    try:
+                        result, error = future.result(), None
+                    except Exception as e:
+                        result, error = None, e
+                    if error is not None and not last_pass and is_transient(error):
+                        retry_later.append(i)
+                        continue
+                    done += 1
+                    outcomes[i] = (p, result, error)
+                    if on_progress is not None:
+                        on_progress(done, total, p, result, error)
+            if not retry_later:
+                break
+            queue = retry_later
+    finally:
+        if own_session:
+            session.close()
+
+    return outcomes
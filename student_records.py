@@ -0,0 +1,249 @@
+import math
+import sys
+import threading
+from array import array
+
+# Compact in-memory form of a student's result. The JSON shape produced by
+# extract_result repeats the same keys and the same ~20 subject names in
+# every subject dict; here subjects, grades and remarks are small codes into
+# shared lookup tables and marks are packed into typed arrays:
+#
+#   codes        array('H'), 3 per subject: subject, relative grade, remarks
+#   marks        array('h'), 4 per subject: Theory-I, Theory-II, Practical, Total
+#   percentiles  array('f'), 1 per subject
+#
+# Anything that doesn't fit (a mark like "ABSENT", an unknown key) is kept
+# verbatim in `extra`, so to_dict() always gives back the original record.
+
+MARK_KEYS = ("Theory-I", "Theory-II", "Practical", "Total")
+SUBJECT_KEYS = ("Subject",) + MARK_KEYS + ("Percentile Marks", "Relative Grade", "Remarks")
+STUDENT_KEYS = ("Roll No", "Student Name", "Student Type", "Grand Total", "Status")
+_SUBJECT_KEY_SET = frozenset(SUBJECT_KEYS)
+
+NO_MARK = -1        # "" in the JSON
+NO_CODE = 0xFFFF    # key absent (grade/remarks) or subject missing
+ABSENT = object()   # marks a key of the original record that wasn't there
+
+
+class InternTable:
+    # value <-> small integer code, shared by every record in the process
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+SUBJECTS = InternTable()
+GRADES = InternTable()
+REMARKS = InternTable()
+
+
+def _pack_int(value, limit=32767):
+    # Canonical integer strings pack as ints; "" as NO_MARK; anything else None
+    if value == "":
+        return NO_MARK
+    if isinstance(value, str) and value.isdigit() and str(int(value)) == value and int(value) <= limit:
+        return int(value)
+    return None
+
+
+# Marks and percentiles repeat a few hundred distinct strings across every
+# student, so each is packed once
+_PACKED_MARKS = {}
+_PACKED_PERCENTILES = {}
+MEMO_LIMIT = 100_000
+
+
+def _pack_mark(value):
+    try:
+        return _PACKED_MARKS[value]
+    except KeyError:
+        packed = _pack_int(value)
+        if len(_PACKED_MARKS) < MEMO_LIMIT:
+            _PACKED_MARKS[value] = packed
+        return packed
+    except TypeError:  # unhashable, certainly not a mark
+        return None
+
+
+def _pack_percentile(value):
+    # Returns (float32 value, whether "%.2f" of it gives back the string)
+    try:
+        return _PACKED_PERCENTILES[value]
+    except KeyError:
+        try:
+            packed = array("f", [float(value)])[0]
+        except (TypeError, ValueError):
+            packed = math.nan
+        result = (packed, f"{packed:.2f}" == value)
+        if len(_PACKED_PERCENTILES) < MEMO_LIMIT:
+            _PACKED_PERCENTILES[value] = result
+        return result
+    except TypeError:
+        return math.nan, False
+
+
+class StudentRecord:
+    __slots__ = ("roll", "name", "student_type", "grand_total", "status",
+                 "codes", "marks", "percentiles", "extra")
+
+    def __init__(self):
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, record):
+        self = cls()
+        extra = {}
+
+        for key in STUDENT_KEYS + ("Subjects",):
+            if key not in record:
+                extra[key] = ABSENT
+        roll = _pack_int(record.get("Roll No", ""), limit=2**31 - 1)
+        self.roll = roll if roll is not None else NO_MARK
+        grand_total = _pack_int(record.get("Grand Total", ""))
+        self.grand_total = grand_total if grand_total is not None else NO_MARK
+        for key, value in (("Roll No", roll), ("Grand Total", grand_total)):
+            if value is None:
+                extra[key] = record[key]
+        self.name = record.get("Student Name", "")
+        self.student_type = record.get("Student Type", "")
+        self.status = record.get("Status", "")
+        if isinstance(self.student_type, str):
+            self.student_type = sys.intern(self.student_type)
+        if isinstance(self.status, str):
+            self.status = sys.intern(self.status)
+        for key in record:
+            if key not in STUDENT_KEYS and key != "Subjects":
+                extra[key] = record[key]
+
+        codes = array("H")
+        marks = array("h")
+        percentiles = array("f")
+        subject_code, grade_code, remarks_code = SUBJECTS.code, GRADES.code, REMARKS.code
+        for i, subject in enumerate(record.get("Subjects", [])):
+            get = subject.get
+            grade = get("Relative Grade")
+            remarks = get("Remarks")
+            codes.extend((subject_code(get("Subject", "")),
+                          NO_CODE if grade is None else grade_code(grade),
+                          NO_CODE if remarks is None else remarks_code(remarks)))
+            for key in MARK_KEYS:
+                value = get(key, ABSENT)
+                mark = _pack_mark(value)
+                if mark is None:
+                    extra[(i, key)] = value
+                    mark = NO_MARK
+                marks.append(mark)
+            percentile = get("Percentile Marks")
+            if percentile is None:
+                percentiles.append(math.nan)
+            else:
+                packed, exact = _pack_percentile(percentile)
+                percentiles.append(packed)
+                if not exact:
+                    extra[(i, "Percentile Marks")] = percentile
+            if not _SUBJECT_KEY_SET.issuperset(subject):
+                for key in subject:
+                    if key not in _SUBJECT_KEY_SET:
+                        extra[(i, key)] = subject[key]
+
+        self.codes = codes
+        self.marks = marks
+        self.percentiles = percentiles
+        self.extra = extra or None
+        return self
+
+    def __len__(self):
+        return len(self.marks) // len(MARK_KEYS)
+
+    def subject_names(self):
+        return [SUBJECTS[code] for code in self.codes[::3]]
+
+    def totals(self):
+        # Total per subject, None where it isn't a number
+        totals = self.marks[len(MARK_KEYS) - 1::len(MARK_KEYS)]
+        return [None if t == NO_MARK or (i, "Total") in (self.extra or ()) else t
+                for i, t in enumerate(totals)]
+
+    def to_dict(self):
+        extra = self.extra or {}
+        missing = object()
+
+        def text(key, packed):
+            value = extra.get(key, missing)
+            if value is not missing:
+                return value
+            return "" if packed == NO_MARK else str(packed)
+
+        record = {
+            "Roll No": text("Roll No", self.roll),
+            "Student Name": self.name,
+            "Student Type": self.student_type,
+            "Grand Total": text("Grand Total", self.grand_total),
+            "Status": self.status,
+        }
+        subjects = []
+        for i in range(len(self)):
+            subject_code, grade, remarks = self.codes[3 * i:3 * i + 3]
+            subject = {"Subject": SUBJECTS[subject_code]}
+            for j, key in enumerate(MARK_KEYS):
+                subject[key] = text((i, key), self.marks[4 * i + j])
+            percentile = self.percentiles[i]
+            value = extra.get((i, "Percentile Marks"), missing)
+            if value is not missing:
+                subject["Percentile Marks"] = value
+            elif not math.isnan(percentile):
+                subject["Percentile Marks"] = f"{percentile:.2f}"
+            if grade != NO_CODE:
+                subject["Relative Grade"] = GRADES[grade]
+            if remarks != NO_CODE:
+                subject["Remarks"] = REMARKS[remarks]
+            for key, value in extra.items():
+                if isinstance(key, tuple) and key[0] == i and key[1] not in SUBJECT_KEYS:
+                    subject[key[1]] = value
+            # Keys that were absent in the original record
+            for key in MARK_KEYS:
+                if extra.get((i, key)) is ABSENT:
+                    del subject[key]
+            subjects.append(subject)
+        record["Subjects"] = subjects
+
+        for key, value in extra.items():
+            if isinstance(key, str) and key not in STUDENT_KEYS and key != "Subjects":
+                record[key] = value
+        for key in STUDENT_KEYS + ("Subjects",):
+            if extra.get(key) is ABSENT:
+                del record[key]
+        return record
+
+    def __reduce__(self):
+        # Codes only mean something in this process; pickle the JSON shape
+        return (StudentRecord.from_dict, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"StudentRecord(roll={self.roll}, name={self.name!r}, subjects={len(self)})"
+
+
+def compact_records(records):
+    return [r if isinstance(r, StudentRecord) else StudentRecord.from_dict(r) for r in records]
+
+
+def to_dicts(records):
+    return [r.to_dict() if isinstance(r, StudentRecord) else r for r in records]
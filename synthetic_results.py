@@ -0,0 +1,294 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from results_store import concat_long_frames, to_long_frame, write_parquet
+
+# Synthetic results in the shape extract_result gives, at any scale, for
+# benchmarking the dashboard beyond the one real institution. Everything is
+# fitted from a sample results file:
+#
+#   - subject combinations, drawn with the frequencies seen in the sample
+#   - each part's marks (Theory-I, Theory-II, Practical), drawn from that
+#     part's distribution in the sample
+#   - how marks go together: a student ability shared by all their subjects
+#     and a subject effect shared by its parts, correlating the parts of a
+#     subject as in the sample
+#   - failing a part at the rate it is failed in the sample, always with
+#     that part's lowest marks, and the remarks, "RE-APPEAR" status and
+#     blank grand total that go with it. The weight of the shared ability is
+#     set so the share of RE-APPEAR students matches the sample too.
+#   - Percentile Marks against each subject's maximum, and the Relative
+#     Grade from the lowest percentile seen with each grade
+#
+#   python synthetic_results.py --students 100000 -o synthetic_100k.json
+#   python synthetic_results.py --students 500000 -o synthetic_500k.parquet --seed 7
+#
+# The same sample, seed and chunk size always give the same records.
+
+DEFAULT_SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results_107004.json")
+PARTS = [("Theory-I", "P-I"), ("Theory-II", "P-II"), ("Practical", "Practical")]
+CHUNK_STUDENTS = 20_000  # students generated at a time
+
+
+def _normal_cdf(x):
+    # Abramowitz & Stegun 7.1.26 (error below 1.5e-7), vectorized
+    z = np.abs(x) / math.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.where(x < 0, -erf, erf))
+
+
+def _gaussian_correlation(a, b):
+    # Spearman correlation of paired marks, as the correlation of the
+    # normal variables that would produce it
+    if len(a) < 3:
+        return 0.0
+    rs = pd.Series(a).rank().corr(pd.Series(b).rank())
+    return 0.0 if np.isnan(rs) else 2 * math.sin(math.pi * rs / 6)
+
+
+class ResultProfile:
+    # What the generator draws from, fitted once from sample records (the
+    # JSON list extract_result produces)
+    def __init__(self, records):
+        records = [r for r in records if r.get("Subjects")]
+        if not records:
+            raise ValueError("The sample has no students with subjects")
+
+        combos = Counter(tuple(s["Subject"] for s in r["Subjects"]) for r in records)
+        self.combos = list(combos)
+        self.combo_weights = np.array(list(combos.values()), dtype=np.float64)
+        self.combo_weights /= self.combo_weights.sum()
+        self.subjects = sorted({name for combo in self.combos for name in combo})
+
+        by_subject = {}
+        for r in records:
+            for s in r["Subjects"]:
+                by_subject.setdefault(s["Subject"], []).append(s)
+
+        # per subject: its maximum, and per part present the sorted marks
+        # and the share of students who failed it
+        self.max_marks = {}
+        self.parts = {}
+        for name, rows in by_subject.items():
+            maxima = Counter(round(int(s["Total"]) * 100 / float(s["Percentile Marks"]))
+                             for s in rows if s.get("Percentile Marks") and float(s["Percentile Marks"]) > 0)
+            self.max_marks[name] = maxima.most_common(1)[0][0] if maxima else max(int(s["Total"]) for s in rows)
+            parts = []
+            for key, tag in PARTS:
+                marks = [(int(s[key]), tag in s.get("Remarks", "").split()) for s in rows if s.get(key)]
+                if marks:
+                    values = np.sort(np.array([m for m, _ in marks], dtype=np.float64))
+                    parts.append((key, tag, values, sum(failed for _, failed in marks) / len(marks)))
+            self.parts[name] = parts
+
+        # lowest percentile seen with each grade, best grade first
+        lowest = {}
+        for rows in by_subject.values():
+            for s in rows:
+                if s.get("Relative Grade") and s.get("Percentile Marks"):
+                    p = float(s["Percentile Marks"])
+                    lowest[s["Relative Grade"]] = min(lowest.get(s["Relative Grade"], p), p)
+        ranked = sorted(lowest.items(), key=lambda item: -item[1])
+        self.grades = [grade for grade, _ in ranked]
+        self.grade_cutoffs = np.array([cutoff for _, cutoff in ranked][::-1])  # ascending
+
+        # between: share of a part's variance from the student's ability,
+        # within: from the student and the subject together
+        self.between, self.within = self._correlations(records)
+        self._calibrate(sum(r.get("Status") == "RE-APPEAR" for r in records) / len(records))
+
+        names = [r.get("Student Name", "").split() for r in records]
+        self.first_names = sorted({n[0] for n in names if n})
+        self.last_names = sorted({" ".join(n[1:]) for n in names if len(n) > 1})
+        self.student_type = Counter(r.get("Student Type", "REGULAR") for r in records).most_common(1)[0][0]
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_SAMPLE):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _correlations(self, records):
+        # Average correlation between two subjects' totals of the same
+        # student (used as is when the sample has no failures to calibrate
+        # on), and between two parts of the same subject
+        totals = pd.DataFrame([{s["Subject"]: int(s["Total"]) for s in r["Subjects"]} for r in records])
+        between = []
+        for i, a in enumerate(totals.columns):
+            for b in totals.columns[i + 1:]:
+                both = totals[[a, b]].dropna()
+                if len(both) >= 30:
+                    between.append(_gaussian_correlation(both[a], both[b]))
+        pairs = {}
+        for r in records:
+            for s in r["Subjects"]:
+                marks = [int(s[key]) for key, _ in PARTS if s.get(key)]
+                for i in range(len(marks)):
+                    for j in range(i + 1, len(marks)):
+                        pairs.setdefault((s["Subject"], i, j), []).append((marks[i], marks[j]))
+        within = [_gaussian_correlation(*zip(*pair)) for pair in pairs.values() if len(pair) >= 30]
+        between = min(max(float(np.mean(between)) if between else 0.0, 0.0), 0.95)
+        return between, min(max(float(np.mean(within)) if within else between, 0.0), 0.99)
+
+    def _calibrate(self, reappear_share, students=20_000, steps=12):
+        # The share of students who fail anything depends on how strongly
+        # ability ties their subjects together: correlated marks put the
+        # failed parts on fewer students. Bisects the ability share of a
+        # part's variance until a fixed draw fails as many students as the
+        # sample did.
+        if not 0 < reappear_share < 1:
+            return
+        lo, hi = 0.0, 0.99
+        for _ in range(steps):
+            self.between = (lo + hi) / 2
+            if _reappear_share(self, students) > reappear_share:
+                lo = self.between
+            else:
+                hi = self.between
+        self.between = (lo + hi) / 2
+
+    def grade(self, percentiles):
+        # Relative Grade for each percentile: the best grade whose lowest
+        # sample percentile it reaches
+        index = np.searchsorted(self.grade_cutoffs, percentiles, side="right") - 1
+        return np.array(self.grades[::-1], dtype=object)[np.maximum(index, 0)]
+
+
+def _draw_subject(profile, name, ability, rng):
+    # Parts, total and failed-part tags of one subject for every student in
+    # the chunk (taken or not; the caller picks the ones who took it)
+    n = len(ability)
+    within = max(profile.within, profile.between)
+    subject = math.sqrt(profile.between) * ability + math.sqrt(within - profile.between) * rng.standard_normal(n)
+    total = np.zeros(n, dtype=np.int64)
+    parts = {}
+    failed = []
+    for key, tag, values, fail_rate in profile.parts[name]:
+        u = _normal_cdf(subject + math.sqrt(1 - within) * rng.standard_normal(n))
+        marks = np.rint(np.interp(u, (np.arange(len(values)) + 0.5) / len(values), values)).astype(np.int64)
+        parts[key] = marks
+        total += marks
+        failed.append((tag, u < fail_rate))
+    percentile = np.round(total * 100 / profile.max_marks[name], 2)
+    return parts, total, percentile, profile.grade(percentile), failed
+
+
+def _reappear_share(profile, students, seed=0):
+    # Share of students failing at least one part in a draw of the profile
+    rng = np.random.default_rng(seed)
+    combo = rng.choice(len(profile.combos), size=students, p=profile.combo_weights)
+    ability = rng.standard_normal(students)
+    reappear = np.zeros(students, dtype=bool)
+    for name in profile.subjects:
+        taken = np.array([name in c for c in profile.combos])[combo]
+        for _, mask in _draw_subject(profile, name, ability, rng)[4]:
+            reappear |= mask & taken
+    return reappear.mean()
+
+
+def generate_results(profile, students, seed=None, first_roll=100001, chunk_students=CHUNK_STUDENTS):
+    # Yields the synthetic records one at a time, in roll number order
+    rng = np.random.default_rng(seed)
+    members = {name: np.array([name in combo for combo in profile.combos]) for name in profile.subjects}
+    for start in range(0, students, chunk_students):
+        n = min(chunk_students, students - start)
+        combo = rng.choice(len(profile.combos), size=n, p=profile.combo_weights)
+        ability = rng.standard_normal(n)
+        drawn = {}
+        for name in profile.subjects:
+            parts, total, percentile, grade, failed = _draw_subject(profile, name, ability, rng)
+            taken = members[name][combo]
+            fails = [(tag, (mask & taken).tolist()) for tag, mask in failed]
+            drawn[name] = ({key: marks.tolist() for key, marks in parts.items()}, total.tolist(),
+                           percentile.tolist(), grade.tolist(), fails)
+        first = rng.integers(len(profile.first_names), size=n).tolist()
+        last = rng.integers(len(profile.last_names), size=n).tolist() if profile.last_names else [None] * n
+
+        for i in range(n):
+            subjects = []
+            grand_total = 0
+            reappear = False
+            for name in profile.combos[combo[i]]:
+                parts, total, percentile, grade, fails = drawn[name]
+                entry = {"Subject": name}
+                for key, _ in PARTS:
+                    entry[key] = str(parts[key][i]) if key in parts else ""
+                entry["Total"] = str(total[i])
+                tags = [tag for tag, mask in fails if mask[i]]
+                if tags:
+                    # Failed subjects come without Percentile Marks and grade
+                    entry["Remarks"] = "Fail in " + " ".join(tags)
+                    reappear = True
+                else:
+                    entry["Percentile Marks"] = f"{percentile[i]:.2f}"
+                    entry["Relative Grade"] = grade[i]
+                    entry["Remarks"] = "Pass"
+                subjects.append(entry)
+                grand_total += total[i]
+            name = profile.first_names[first[i]]
+            if last[i] is not None:
+                name += " " + profile.last_names[last[i]]
+            yield {
+                "Roll No": str(first_roll + start + i),
+                "Student Name": name,
+                "Student Type": profile.student_type,
+                "Grand Total": "" if reappear else str(grand_total),
+                "Status": "RE-APPEAR" if reappear else "PASS",
+                "Subjects": subjects,
+            }
+
+
+def write_results(records, path, chunk_students=CHUNK_STUDENTS):
+    # Streams records to a JSON list, or to the Parquet store when path ends
+    # in .parquet, a chunk at a time; returns the number of students
+    count = 0
+    if path.endswith(".parquet"):
+        frames = []
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == chunk_students:
+                frames.append(to_long_frame(chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk or not frames:
+            frames.append(to_long_frame(chunk))
+            count += len(chunk)
+        write_parquet(concat_long_frames(frames), path)
+        return count
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def make_dataset(path, students, seed=None, sample=DEFAULT_SAMPLE, first_roll=100001):
+    profile = ResultProfile.from_file(sample)
+    return write_results(generate_results(profile, students, seed=seed, first_roll=first_roll), path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic results modeled on a sample results file")
+    parser.add_argument("--students", type=int, required=True)
+    parser.add_argument("-o", "--output", help="a .json or .parquet file; defaults to synthetic_<students>.json")
+    parser.add_argument("--sample", default=DEFAULT_SAMPLE, help="results JSON file the data is modeled on")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--first-roll", type=int, default=100001)
+    args = parser.parse_args()
+    output = args.output or f"synthetic_{args.students}.json"
+    start = time.perf_counter()
+    written = make_dataset(output, args.students, seed=args.seed, sample=args.sample, first_roll=args.first_roll)
+    print(f"Wrote {written} students to {output} ({os.path.getsize(output) / 1e6:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SAMPLE = os.path.join(ROOT, "results_107004.json")
+
+
+@pytest.fixture(scope="session")
+def sample_path():
+    return SAMPLE
+
+
+@pytest.fixture
+def sample_records():
+    with open(SAMPLE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def serve():
+    # serve(board) starts the mock result server for a MockBoard and returns
+    # its Result_Detail URL; every server is stopped after the test
+    from mock_server import start_server
+
+    servers = []
+
+    def start(board):
+        server, url = start_server(board)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
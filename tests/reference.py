@@ -0,0 +1,78 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# What the tests compare against: slow, obviously correct versions of the
+# optimized code, and a builder for small scraped records. Kept here rather
+# than imported from benchmarks/ so editing a benchmark can't change what
+# the tests accept.
+
+
+def student(roll, total, marks, status="PASS", name=None):
+    # A scraped record; marks: {subject: total}
+    return {
+        "Roll No": str(roll),
+        "Student Name": name or f"STUDENT {roll}",
+        "Student Type": "REGULAR",
+        "Grand Total": str(total),
+        "Status": status,
+        "Subjects": [{"Subject": subject, "Theory-I": "", "Theory-II": "", "Practical": "",
+                      "Total": str(mark), "Percentile Marks": "", "Relative Grade": "", "Remarks": ""}
+                     for subject, mark in marks.items()],
+    }
+
+
+def full_sort_top(engine, students, scores, n):
+    # Roll numbers of the top n of a RankingEngine subject by sorting
+    # everyone, all level with the n-th score included
+    order = np.argsort(-scores, kind="stable")
+    if len(order) > n:
+        order = order[scores[order] >= scores[order[n - 1]]]
+    return set(engine.rolls[students[order]].tolist())
+
+
+def legacy_prepare_analysis(data):
+    # The dashboard's prepare_analysis before it was vectorized, for scraped records
+    status_counts = {"PASS": 0, "RE-APPEAR": 0}
+    score_buckets = ['95+', '90-94', '85-89', '80-84', '75-79', '70-74', '60-69', '50-59', '40-49', '<40']
+    bucket_ranges = {
+        '95+': lambda x: x >= 95,
+        '90-94': lambda x: 90 <= x < 95,
+        '85-89': lambda x: 85 <= x < 90,
+        '80-84': lambda x: 80 <= x < 85,
+        '75-79': lambda x: 75 <= x < 80,
+        '70-74': lambda x: 70 <= x < 75,
+        '60-69': lambda x: 60 <= x < 70,
+        '50-59': lambda x: 50 <= x < 60,
+        '40-49': lambda x: 40 <= x < 50,
+        '<40': lambda x: x < 40
+    }
+    subject_bucket_counts = defaultdict(lambda: defaultdict(int))
+    subject_scores = defaultdict(list)
+
+    for student in data:
+        status = student.get("Status", "RE-APPEAR").strip().upper()
+        status_counts[status] += 1
+        for subject in student.get("Subjects", []):
+            subject_name = subject["Subject"]
+            try:
+                score = int(subject["Total"])
+            except ValueError:
+                continue
+            subject_scores[subject_name].append(score)
+            for bucket, rule in bucket_ranges.items():
+                if rule(score):
+                    subject_bucket_counts[subject_name][bucket] += 1
+                    break
+
+    for subject in subject_bucket_counts:
+        for bucket in score_buckets:
+            if bucket not in subject_bucket_counts[subject]:
+                subject_bucket_counts[subject][bucket] = 0
+
+    df_buckets = pd.DataFrame(subject_bucket_counts).fillna(0).astype(int).T
+    df_buckets = df_buckets[score_buckets] if all(b in df_buckets.columns for b in score_buckets) else df_buckets
+    df_avg = pd.DataFrame({subj: [sum(scores)/len(scores)] for subj, scores in subject_scores.items()},
+                          index=["Average"]).T.sort_values("Average", ascending=False)
+    return status_counts, df_buckets, df_avg, subject_scores
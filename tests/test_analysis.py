@@ -0,0 +1,115 @@
+import copy
+
+from analysis import AnalysisState, analyze
+from reference import legacy_prepare_analysis, student
+from results_store import from_long_frame, read_parquet, to_long_frame, write_parquet
+
+
+def same_results(a, b):
+    return (a[0] == b[0] and a[1].equals(b[1]) and a[2].equals(b[2])
+            and list(a[3].items()) == list(b[3].items()))
+
+
+def same_figures(a, b):
+    # same_results, ignoring the order subjects and scores were added in
+    return (a[0] == b[0] and a[1].sort_index().equals(b[1].sort_index())
+            and a[2].sort_index().round(9).equals(b[2].sort_index().round(9))
+            and {s: sorted(v) for s, v in a[3].items()} == {s: sorted(v) for s, v in b[3].items()})
+
+
+def check(records):
+    # analyze and AnalysisState both match the row loop the dashboard used to run
+    expected = legacy_prepare_analysis(copy.deepcopy(records))
+    assert same_results(analyze(records), expected)
+    assert same_results(AnalysisState.from_data(records).result(), expected)
+    return expected
+
+
+def test_sample_matches_row_loop(sample_records):
+    check(sample_records)
+
+
+def test_long_frame_matches_row_loop(sample_records):
+    expected = legacy_prepare_analysis(copy.deepcopy(sample_records))
+    assert same_results(analyze(to_long_frame(sample_records)), expected)
+
+
+def test_empty_dataset():
+    status_counts, df_buckets, df_avg, subject_scores = analyze([])
+    assert status_counts == {"PASS": 0, "RE-APPEAR": 0}
+    assert df_buckets.empty and df_avg.empty and not subject_scores
+    assert same_results(analyze(to_long_frame([])), analyze([]))
+
+
+def test_adjacent_duplicate_rolls_are_two_students():
+    records = [student(100001, 500, {"MATH": 80}), student(100001, 400, {"MATH": 60}, status="RE-APPEAR")]
+    status_counts, _, _, subject_scores = check(records)
+    assert status_counts == {"PASS": 1, "RE-APPEAR": 1}
+    assert subject_scores["MATH"] == [80, 60]
+
+
+def test_missing_rolls_are_separate_students():
+    records = [student("", 500, {"MATH": 80}), student("", 450, {"MATH": 70}), student(100003, 400, {"MATH": 60})]
+    status_counts, _, _, subject_scores = check(records)
+    assert status_counts == {"PASS": 3, "RE-APPEAR": 0}
+    assert subject_scores["MATH"] == [80, 70, 60]
+
+
+def test_missing_status_counts_as_reappear():
+    records = [student(100001, 500, {"MATH": 80}), student(100002, 300, {"MATH": 30})]
+    del records[1]["Status"]
+    status_counts, _, _, _ = check(records)
+    assert status_counts == {"PASS": 1, "RE-APPEAR": 1}
+
+
+def test_parquet_round_trip(tmp_path, sample_records):
+    records = sample_records + [student(100001, 500, {"MATH": 80}), student(100001, 400, {"MATH": 60}),
+                                student("", 450, {"MATH": 70})]
+    path = tmp_path / "results.parquet"
+    write_parquet(to_long_frame(records), path)
+    df = read_parquet(path)
+    assert same_results(analyze(df), analyze(records))
+    assert len(from_long_frame(df)) == len(records)
+
+
+def test_state_matches_full_analysis(sample_records):
+    records = sample_records + [student(100001, 500, {"MATH": 80}), student(100001, 400, {"MATH": 60}),
+                                student("", 450, {"MATH": 70})]
+    assert same_results(AnalysisState.from_data(records).result(), analyze(records))
+    assert same_results(AnalysisState.from_data(to_long_frame(records)).result(), analyze(records))
+    assert same_results(AnalysisState.from_data([]).result(), analyze([]))
+
+
+def test_state_updates_match_full_analysis(sample_records):
+    state = AnalysisState.from_data(sample_records)
+    moved = sample_records[:50]
+    for record in moved:
+        assert state.remove(int(record["Roll No"]))
+    assert same_figures(state.result(), analyze(sample_records[50:]))
+    for record in moved:
+        state.add(record)
+    assert same_figures(state.result(), analyze(sample_records))
+
+
+def test_state_refetch_replaces_student():
+    state = AnalysisState.from_data([student(100001, 500, {"MATH": 80, "PHYSICS": 70})])
+    state.add(student(100001, 300, {"MATH": 30}, status="RE-APPEAR"))
+    status_counts, df_buckets, _, subject_scores = state.result()
+    assert len(state) == 1
+    assert status_counts == {"PASS": 0, "RE-APPEAR": 1}
+    assert dict(subject_scores) == {"MATH": [30]}
+    assert list(df_buckets.index) == ["MATH"]
+
+
+def test_state_remove_and_unusual_statuses():
+    state = AnalysisState()
+    assert not state.remove(100001)
+    state.add(student(100001, 0, {}, status="ABSENT"))
+    state.add({"Roll No": "100002", "Status": "", "Subjects": []})
+    assert state.status_counts == {"PASS": 0, "RE-APPEAR": 1, "ABSENT": 1}
+    assert state.remove(100001)
+    assert state.status_counts == {"PASS": 0, "RE-APPEAR": 1}
+    # Students without a roll number get keys of their own
+    first = state.add(student("", 400, {"MATH": 40}))
+    second = state.add(student("", 410, {"MATH": 41}))
+    assert first != second and first < 0 and len(state) == 3
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from scraper import PARSER_BACKENDS, extract_result
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fixtures", "result_pages")
+with open(os.path.join(PAGES_DIR, "expected.json"), encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+EMPTY = {"Roll No": "", "Student Name": "", "Student Type": "", "Grand Total": "", "Status": "", "Subjects": []}
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_every_fixture_has_an_expected_result():
+    assert sorted(EXPECTED) == sorted(name for name in os.listdir(PAGES_DIR) if name.endswith(".html"))
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+@pytest.mark.parametrize("page", sorted(EXPECTED))
+def test_fixtures(backend, page):
+    assert PARSER_BACKENDS[backend](read_page(page)) == EXPECTED[page]
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_page_without_relative_grades(backend):
+    result = PARSER_BACKENDS[backend](read_page("103683_no_relative.html"))
+    assert result["Roll No"] == "103683"
+    assert all(set(subject) == {"Subject", "Theory-I", "Theory-II", "Practical", "Total"}
+               for subject in result["Subjects"])
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_not_found_page(backend):
+    assert PARSER_BACKENDS[backend](read_page("not_found.html")) == EMPTY
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_nested_markup_takes_first_label_in_document_order(backend):
+    result = PARSER_BACKENDS[backend](read_page("nested.html"))
+    assert result["Roll No"] == "124741"
+    assert result["Grand Total"] == "224"
+
+
+# Broken pages give empty fields, never an error: a label with nothing after
+# it reads as "", a table without rows as no subjects, and rows that don't
+# line up with the header are skipped
+MALFORMED = [
+    ("", EMPTY),
+    ("   ", EMPTY),
+    ("<<<>>>", EMPTY),
+    ("<html><body><b>ROLL NO</b></body></html>", EMPTY),
+    ("<div><b>ROLL NO</b><span>123", dict(EMPTY, **{"Roll No": "123"})),
+    ("<p>STATUS</p><p>PASS</p><table></table>", dict(EMPTY, Status="PASS")),
+    ("<table><tr><th>SUBJECT</th><th>TOTAL</th></tr><tr><td>MATH</td></tr>"
+     "<tr><td>URDU</td><td>70</td><td>x</td></tr><tr><td></td><td>5</td></tr>"
+     "<tr><td>ENGLISH</td><td>80</td></tr></table>",
+     dict(EMPTY, Subjects=[{"Subject": "ENGLISH", "Theory-I": "", "Theory-II": "", "Practical": "",
+                            "Total": "80"}])),
+    ("<p>ROLL NO<!-- note --></p>STATUS<!-- x --><b>RE-APPEAR</b>",
+     dict(EMPTY, **{"Roll No": "RE-APPEAR", "Status": "RE-APPEAR"})),
+]
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+@pytest.mark.parametrize("html, expected", MALFORMED)
+def test_malformed_markup(backend, html, expected):
+    assert PARSER_BACKENDS[backend](html) == expected
+
+
+def test_default_backend():
+    html = read_page("124741.html")
+    assert extract_result(html) == EXPECTED["124741.html"]
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from pdf_reports import MANIFEST_NAME, check_outputs, make_jobs, run_batch
+
+
+def write_json(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return path
+
+
+@pytest.fixture
+def same_name_files(tmp_path, sample_records):
+    return [write_json(str(tmp_path / "results" / year / "107004.json"), sample_records[start:start + 30])
+            for year, start in (("2023", 0), ("2024", 30))]
+
+
+def read_manifest(out_dir):
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_make_jobs_counts_a_file_once(same_name_files):
+    path = same_name_files[0]
+    jobs = make_jobs([path, os.path.join(os.path.dirname(path), ".", "107004.json")])
+    assert len(jobs) == 1 and jobs[0]["label"] == "107004"
+
+
+def test_same_labels_are_rejected(tmp_path, same_name_files):
+    out_dir = str(tmp_path / "reports")
+    jobs = make_jobs(same_name_files)
+    with pytest.raises(ValueError, match="2023.*2024.*107004.pdf"):
+        check_outputs(jobs, out_dir)
+    with pytest.raises(ValueError):
+        run_batch(jobs, out_dir, workers=1, assets_dir=str(tmp_path / "assets"))
+    assert not os.path.exists(out_dir)
+
+
+def test_manifest_is_keyed_by_full_path(tmp_path, same_name_files):
+    out_dir = str(tmp_path / "reports")
+    assets_dir = str(tmp_path / "assets")
+    first, second = same_name_files
+    teachers = {"107004": [{"name": "Ms. Amna", "subject": "PHYSICS"}]}
+
+    assert run_batch(make_jobs([first], teachers=teachers), out_dir, workers=1, assets_dir=assets_dir) == (2, 0)
+    assert list(read_manifest(out_dir)) == [os.path.abspath(first)]
+    assert os.path.exists(os.path.join(out_dir, "107004", "Ms._Amna-PHYSICS.pdf"))
+    assert run_batch(make_jobs([first], teachers=teachers), out_dir, workers=1, assets_dir=assets_dir) == (0, 2)
+
+    # The other 107004.json, in a later run, takes the PDFs over; the first
+    # file is then rebuilt rather than taken as unchanged
+    assert run_batch(make_jobs([second]), out_dir, workers=1, assets_dir=assets_dir) == (1, 0)
+    assert list(read_manifest(out_dir)) == [os.path.abspath(second)]
+    assert run_batch(make_jobs([first], teachers=teachers), out_dir, workers=1, assets_dir=assets_dir) == (2, 0)
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import perf_trace
+import scraper
+from mock_server import MockBoard
+
+
+def spans_of(trace):
+    return sorted(name for name, *_ in trace.spans)
+
+
+def test_nothing_recorded_without_a_trace():
+    assert not perf_trace.enabled()
+    with perf_trace.span("idle"):
+        perf_trace.count("idle")
+
+
+def test_sessions_record_side_by_side():
+    # Two threads (as two Streamlit sessions) record at the same time, each
+    # getting only its own spans
+    barrier = threading.Barrier(2)
+    traces = {}
+
+    def session(name):
+        trace = traces[name] = perf_trace.Trace()
+        with perf_trace.recording(trace):
+            barrier.wait()
+            for _ in range(3):
+                with perf_trace.span(name):
+                    perf_trace.count(name)
+            barrier.wait()
+
+    threads = [threading.Thread(target=session, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert spans_of(traces["a"]) == ["a"] * 3 and traces["a"].counters == {"a": 3}
+    assert spans_of(traces["b"]) == ["b"] * 3 and traces["b"].counters == {"b": 3}
+    assert not perf_trace.enabled()
+
+
+def test_one_trace_per_context():
+    first, second = perf_trace.Trace(), perf_trace.Trace()
+    with perf_trace.recording(first):
+        assert perf_trace.start(first)  # already recording: a no-op
+        with pytest.raises(perf_trace.TraceBusy):
+            with perf_trace.recording(second):
+                pass
+        perf_trace.stop(second)  # not the active one: ignored
+        assert perf_trace.enabled()
+    assert not perf_trace.enabled()
+
+
+def test_bind_carries_the_trace_into_pool_workers():
+    trace = perf_trace.Trace()
+
+    def work():
+        with perf_trace.span("work"):
+            pass
+
+    with perf_trace.recording(trace), ThreadPoolExecutor(2) as pool:
+        pool.submit(work).result()                   # a worker has no trace
+        pool.submit(perf_trace.bind(work)).result()
+    assert spans_of(trace) == ["work"]
+    assert perf_trace.bind(work) is work  # nothing recording
+
+
+def test_scrape_records_fetch_and_parse(sample_path, serve):
+    board = MockBoard.from_file(sample_path)
+    url = serve(board)
+    rolls = sorted(p for p, _, _ in board.records)[:5]
+    trace = perf_trace.Trace()
+    with perf_trace.recording(trace):
+        scraper.scrape_rolls(rolls, concurrency=3, rate=0, url=url)
+    assert spans_of(trace) == ["fetch"] * 5 + ["parse"] * 5
+    assert trace.counters["requests"] == 5
@@ -0,0 +1,74 @@
+import numpy as np
+
+from rankings import RANKING_COLUMNS, RankingEngine, competition_ranks
+from reference import full_sort_top, student
+from results_store import read_parquet, to_long_frame, write_parquet
+
+
+def test_top_subject_matches_full_sort(sample_records):
+    engine = RankingEngine.from_data(sample_records)
+    for subject in engine.subjects:
+        for n in (1, 5, 10):
+            table = engine.top_subject(subject, n)
+            assert set(table["Roll No"].tolist()) == full_sort_top(engine, *engine._subjects[subject], n)
+            assert (np.diff(table[subject].to_numpy(dtype=np.float64)) <= 0).all()
+
+
+def test_top_group_sums_the_subjects(sample_records):
+    engine = RankingEngine.from_data(sample_records)
+    group = sorted(engine.subjects, key=lambda s: -len(engine._subjects[s][0]))[:3]
+    table = engine.top_group(group, 10)
+    assert len(table) >= 10
+    assert (table[group].sum(axis=1) == table["Group Total"]).all()
+    assert (np.diff(table["Group Total"].to_numpy(dtype=np.float64)) <= 0).all()
+
+
+def test_ties():
+    records = [
+        student(100001, 500, {"MATH": 90, "PHYSICS": 70}),
+        student(100002, 520, {"MATH": 90, "PHYSICS": 60}),
+        student(100003, 480, {"MATH": 80, "PHYSICS": 70}),
+        student(100004, 500, {"MATH": 90, "PHYSICS": 50}),
+    ]
+    engine = RankingEngine.from_data(records)
+    table = engine.top_subject("MATH", 1)
+    # Everyone level with the first place, ordered by grand total then roll
+    assert table["Roll No"].tolist() == [100002, 100001, 100004]
+    assert table["Rank"].tolist() == [1, 1, 1]
+    assert len(engine.top_subject("MATH", 1, ties=False)) == 1
+    assert engine.top_subject("MATH", 4)["Rank"].tolist() == [1, 1, 1, 4]
+    assert list(competition_ranks([9, 7, 7, 5])) == [1, 2, 2, 4]
+
+
+def test_empty_dataset():
+    engine = RankingEngine.from_data([])
+    assert len(engine) == 0 and engine.subjects == []
+    assert engine.top_subject("MATH").empty
+    assert engine.top_group(["MATH", "PHYSICS"]).empty
+
+
+def test_duplicate_and_missing_rolls():
+    records = [
+        student(100001, 500, {"MATH": 90}),
+        student(100001, 400, {"MATH": 60}),  # same roll twice in a row
+        student("", 450, {"MATH": 70}),
+        student("", 300, {"MATH": 40}),
+    ]
+    engine = RankingEngine.from_data(records)
+    assert len(engine) == 4
+    assert engine.grand_totals.tolist() == [500, 400, 450, 300]
+    assert engine.top_subject("MATH", 4)["MATH"].tolist() == [90, 70, 60, 40]
+
+
+def test_parquet_round_trip(tmp_path, sample_records):
+    records = sample_records + [student(100001, 500, {"MATH": 90}), student(100001, 400, {"MATH": 60}),
+                                student("", 450, {"MATH": 70})]
+    df = to_long_frame(records, columns=RANKING_COLUMNS)
+    path = tmp_path / "results.parquet"
+    write_parquet(df, path)
+
+    before, after = RankingEngine(df), RankingEngine(read_parquet(path))
+    assert len(after) == len(records)
+    assert after.subjects == before.subjects
+    for subject in before.subjects:
+        assert after.top_subject(subject, 5).equals(before.top_subject(subject, 5))
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rankings import RANKING_COLUMNS, ScoreRanks, add_rank_columns
+from reference import student
+from results_store import read_parquet, to_long_frame, write_parquet
+
+RANK_COLUMNS = ["Subject Rank", "Subject Percentile", "Grand Total Rank", "Grand Total Percentile"]
+
+
+def reference_ranks(df):
+    # Subject rank and percentile of every row by pandas: competition rank
+    # from the top, percentile = 100 * (below + equal / 2) / students
+    totals = df["Total"].astype("float64")
+    groups = totals.groupby(df["Subject"], observed=True)
+    rank = groups.rank(method="min", ascending=False)
+    below = groups.rank(method="min") - 1
+    equal = groups.rank(method="max") - below
+    return rank, 100 * (below + equal / 2) / groups.transform("count")
+
+
+def check_rank_columns(df):
+    ranked = add_rank_columns(df)
+    rank, percentile = reference_ranks(df)
+    assert np.array_equal(ranked["Subject Rank"].to_numpy(dtype=np.float64, na_value=np.nan),
+                          rank.to_numpy(), equal_nan=True)
+    assert np.allclose(ranked["Subject Percentile"].to_numpy(dtype=np.float64, na_value=np.nan),
+                       percentile.round(2).to_numpy(), equal_nan=True)
+    return ranked
+
+
+def test_rank_columns_match_pandas(sample_records):
+    check_rank_columns(to_long_frame(sample_records, columns=RANKING_COLUMNS))
+
+
+def test_ties():
+    records = [
+        student(100001, 500, {"MATH": 90}),
+        student(100002, 520, {"MATH": 90}),
+        student(100003, 480, {"MATH": 80}),
+        student(100004, 500, {"MATH": 90}),
+    ]
+    ranked = check_rank_columns(to_long_frame(records, columns=RANKING_COLUMNS))
+    assert ranked["Grand Total Rank"].tolist() == [2, 1, 4, 2]
+    assert ranked["Grand Total Percentile"].tolist() == [50.0, 87.5, 12.5, 50.0]
+
+    ranks = ScoreRanks({"MATH": [90, 90, 80, 90]}, [500, 520, 480, 500])
+    assert ranks.rank("MATH", 90) == 1 and ranks.rank("MATH", 80) == 4
+    assert ranks.percentile("MATH", 90) == pytest.approx(62.5)
+    assert ranks.rank("Grand Total", 500) == 2
+    with pytest.raises(KeyError):
+        ranks.rank("PHYSICS", 50)
+
+
+def test_empty_dataset():
+    ranked = add_rank_columns(to_long_frame([], columns=RANKING_COLUMNS))
+    assert ranked.empty and all(column in ranked for column in RANK_COLUMNS)
+    assert ScoreRanks({}).students("MATH") == 0
+
+
+def test_duplicate_and_missing_rolls():
+    records = [
+        student(100001, 500, {"MATH": 90, "PHYSICS": 50}),
+        student(100001, 400, {"MATH": 60}),  # same roll twice in a row
+        student("", 450, {"MATH": 70}),
+        student("", 300, {"MATH": 40}),
+    ]
+    ranked = check_rank_columns(to_long_frame(records, columns=RANKING_COLUMNS))
+    # One grand total per student, repeated on each of their rows
+    assert ranked["Grand Total Rank"].tolist() == [1, 1, 3, 2, 4]
+
+
+def test_rank_columns_within_groups(sample_records):
+    df = to_long_frame(sample_records + sample_records, columns=RANKING_COLUMNS)
+    half = len(df) // 2
+    df["Institution"] = pd.Categorical(["A"] * half + ["B"] * half)
+    ranked = add_rank_columns(df, within="Institution")
+    alone = add_rank_columns(df.iloc[:half].reset_index(drop=True))
+    for column in RANK_COLUMNS:
+        assert ranked[f"Institution {column}"].iloc[:half].reset_index(drop=True).equals(alone[column])
+        assert ranked[f"Institution {column}"].iloc[half:].reset_index(drop=True).equals(alone[column])
+
+
+def test_parquet_round_trip(tmp_path, sample_records):
+    df = to_long_frame(sample_records, columns=RANKING_COLUMNS)
+    path = tmp_path / "results.parquet"
+    write_parquet(df, path)
+    assert add_rank_columns(read_parquet(path))[RANK_COLUMNS].equals(add_rank_columns(df)[RANK_COLUMNS])
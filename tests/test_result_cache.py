@@ -0,0 +1,113 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+HIT = {"Roll No": "100001", "Status": "PASS", "Subjects": []}
+MISS = {"Roll No": "", "Status": "", "Subjects": []}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    return clock
+
+
+def record(p):
+    return dict(HIT, **{"Roll No": str(p)})
+
+
+def test_hit_and_miss_counts(clock):
+    cache = ResultCache(":memory:")
+    assert cache.get(100001, 2, 2025) is None
+    cache.put(100001, 2, 2025, "<html>", HIT)
+    assert cache.get(100001, 2, 2025) == HIT
+    assert cache.get(100001, 1, 2025) is None  # other session
+    assert cache.get_html(100001, 2, 2025) == "<html>"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_miss_expires_before_hit(clock):
+    cache = ResultCache(":memory:", ttl=7200, miss_ttl=600)
+    cache.put(100001, 2, 2025, "<result>", HIT)
+    cache.put(100002, 2, 2025, "<not found>", MISS)
+    clock.now += 599
+    assert cache.get(100002, 2, 2025) == MISS
+    clock.now += 2
+    assert cache.get(100002, 2, 2025) is None
+    assert cache.get(100001, 2, 2025) == HIT
+    clock.now += 7200
+    assert cache.get(100001, 2, 2025) is None
+
+
+def test_zero_ttl_never_expires(clock):
+    cache = ResultCache(":memory:", ttl=0, miss_ttl=0)
+    cache.put(100001, 2, 2025, "", HIT)
+    cache.put(100002, 2, 2025, "", MISS)
+    clock.now += 10 * 365 * 86400
+    assert cache.get(100001, 2, 2025) == HIT
+    assert cache.get(100002, 2, 2025) == MISS
+    assert cache.purge_expired() == 0
+
+
+def test_eviction_removes_least_recently_read(clock):
+    cache = ResultCache(":memory:", max_entries=3)
+    for p in (1, 2, 3):
+        clock.now += 1
+        cache.put(p, 2, 2025, "", record(p))
+    clock.now += 1
+    cache.get(1, 2, 2025)  # 2 is now the least recently used
+    clock.now += 1
+    cache.put(4, 2, 2025, "", record(4))
+    assert [p for p in (1, 2, 3, 4) if cache.get(p, 2, 2025)] == [1, 3, 4]
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 3
+
+
+def test_eviction_by_size(clock):
+    cache = ResultCache(":memory:", max_bytes=2500)
+    for p in range(5):
+        clock.now += 1
+        cache.put(p, 2, 2025, "x" * 1000, record(p))
+    assert cache.stats()["bytes"] <= 2500
+    assert cache.get(4, 2, 2025) is not None and cache.get(0, 2, 2025) is None
+
+
+def test_replacing_an_entry_keeps_the_accounting(clock):
+    cache = ResultCache(":memory:")
+    cache.put(1, 2, 2025, "x" * 100, HIT)
+    cache.put(1, 2, 2025, "x" * 10, HIT)
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["bytes"] == 10 + len(result_cache.json.dumps(HIT))
+
+
+def test_purge_expired_deletes_only_expired_rows(clock):
+    cache = ResultCache(":memory:", ttl=7200, miss_ttl=600)
+    cache.put(1, 2, 2025, "", record(1))  # hit, will be past ttl
+    cache.put(2, 2, 2025, "", MISS)       # miss, will be past miss_ttl
+    clock.now += 7000
+    cache.put(3, 2, 2025, "", record(3))  # fresh hit
+    cache.put(4, 2, 2025, "", MISS)       # fresh miss
+    clock.now += 300
+    assert cache.purge_expired() == 2
+    assert cache.stats()["entries"] == 2
+    assert cache.get_html(1, 2, 2025) is None and cache.get_html(2, 2, 2025) is None
+    assert cache.get(3, 2, 2025) == record(3) and cache.get(4, 2, 2025) == MISS
+
+
+def test_entries_survive_reopening(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResultCache(path)
+    cache.put(1, 2, 2025, "<html>", HIT)
+    cache.close()
+    reopened = ResultCache(path)
+    assert reopened.get(1, 2, 2025) == HIT
+    assert reopened.stats()["entries"] == 1
@@ -0,0 +1,63 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from results_store import (STUDENT_INDEX, concat_long_frames, iter_json_records, read_json_chunks,
+                           read_json_stream, to_long_frame)
+
+
+def test_records_across_small_reads(sample_records):
+    records = sample_records[:5]
+    text = json.dumps(records, indent=1)
+    for read_size in (1, 7, 4096):
+        assert list(iter_json_records(io.StringIO(text), read_size=read_size)) == records
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "\n[\n]\n"])
+def test_empty_array(text):
+    assert list(iter_json_records(io.StringIO(text), read_size=2)) == []
+
+
+@pytest.mark.parametrize("text", ['{"Roll No": "1"}', '[{"a": 1} {"a": 2}]', '[{"a": 1},', '[{"a": 1'])
+def test_malformed_files(text):
+    with pytest.raises(ValueError):
+        list(iter_json_records(io.StringIO(text), read_size=3))
+
+
+def test_stream_matches_whole_file(tmp_path, sample_records):
+    path = tmp_path / "results.json"
+    path.write_text(json.dumps(sample_records), encoding="utf-8")
+    whole = to_long_frame(sample_records)
+    streamed = read_json_stream(path, chunk_students=100)
+    assert list(streamed.columns) == list(whole.columns)
+    for column in whole.columns:
+        assert streamed[column].astype(object).equals(whole[column].astype(object)), column
+
+
+def test_chunks_are_bounded(tmp_path, sample_records):
+    path = tmp_path / "results.json"
+    path.write_text(json.dumps(sample_records), encoding="utf-8")
+    chunks = list(read_json_chunks(path, chunk_students=100))
+    assert [chunk[STUDENT_INDEX].nunique() for chunk in chunks] == [100, 100, 100, 100, 35]
+
+
+def test_concat_keeps_categories_and_students_apart(tmp_path, sample_records):
+    # The same rolls in every chunk stay separate students
+    records = sample_records * 3
+    path = tmp_path / "results.json"
+    path.write_text(json.dumps(records), encoding="utf-8")
+    df = read_json_stream(path, chunk_students=100)
+    assert df[STUDENT_INDEX].nunique() == len(records)
+    assert df[STUDENT_INDEX].is_monotonic_increasing
+    for column in ("Subject", "Status", "Relative Grade"):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert len(concat_long_frames([])) == 0
+
+
+def test_binary_upload_is_left_open(sample_records):
+    upload = io.BytesIO(json.dumps(sample_records).encode("utf-8"))
+    df = read_json_stream(upload)
+    assert df[STUDENT_INDEX].nunique() == len(sample_records)
+    assert not upload.closed
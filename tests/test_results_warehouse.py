@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from results_store import to_long_frame
+from results_warehouse import ResultsWarehouse, institution_from_path
+from student_records import compact_records
+
+
+@pytest.fixture
+def warehouse(sample_records):
+    warehouse = ResultsWarehouse(":memory:")
+    warehouse.add(sample_records, 2, 2025, "107004")
+    yield warehouse
+    warehouse.close()
+
+
+def rolls_of(df):
+    return sorted(set(df["Roll No"].tolist()))
+
+
+def test_load_many_rolls(warehouse, sample_records):
+    # More rolls than SQLite takes bound parameters (999, or 32766 since
+    # 3.32), as numpy integers
+    every = sorted(int(s["Roll No"]) for s in sample_records)
+    wanted = np.arange(every[0], every[0] + 40000)
+    df = warehouse.load("107004", 2, 2025, rolls=wanted)
+    assert rolls_of(df) == [p for p in every if p < every[0] + 40000]
+    assert df.equals(warehouse.load("107004", 2, 2025, rolls=rolls_of(df)))
+
+
+def test_load_rolls_does_not_leak_between_calls(warehouse, sample_records):
+    every = sorted(int(s["Roll No"]) for s in sample_records)
+    assert rolls_of(warehouse.load(rolls=every[:3])) == every[:3]
+    assert rolls_of(warehouse.load(rolls=every[3:5])) == every[3:5]
+    assert len(warehouse.load(rolls=[])) == 0
+    assert rolls_of(warehouse.load()) == every
+
+
+@pytest.mark.parametrize("path, code", [
+    ("results_107004.json", "107004"),
+    (os.path.join("out", "107004.json"), "107004"),
+    ("results_107004_ad.json", None),
+    ("results.json", None),
+    ("results_107004.parquet", None),
+])
+def test_institution_from_path(path, code):
+    assert institution_from_path(path) == code
+
+
+def run_cli(root, *args):
+    return subprocess.run([sys.executable, os.path.join(root, "results_warehouse.py"), *args],
+                          capture_output=True, text=True)
+
+
+def test_import_needs_an_institution(tmp_path, sample_path):
+    root = os.path.dirname(sample_path)
+    db = str(tmp_path / "results.sqlite3")
+    unnamed = shutil.copy(sample_path, tmp_path / "export.json")
+    done = run_cli(root, "--db", db, "import", str(unnamed))
+    assert done.returncode == 2 and "--institution" in done.stderr
+
+    assert run_cli(root, "--db", db, "import", sample_path).returncode == 0
+    assert run_cli(root, "--db", db, "import", str(unnamed), "--institution", "999", "-r", "2024").returncode == 0
+    warehouse = ResultsWarehouse(db)
+    assert sorted((d["institution"], d["r"], d["students"]) for d in warehouse.datasets()) == [
+        ("107004", 2025, 435), ("999", 2024, 435)]
+    warehouse.close()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_load_matches_the_long_frame(sample_records, compact):
+    # Stored and loaded back, the records give the long frame results_store
+    # builds from them (the warehouse returns students in roll order)
+    records = sorted(sample_records, key=lambda s: int(s["Roll No"]))
+    warehouse = ResultsWarehouse(":memory:")
+    warehouse.add(compact_records(records) if compact else records, 2, 2025, "107004")
+    expected = to_long_frame(records, q=2, r=2025)
+    loaded = warehouse.load("107004", 2, 2025)
+    warehouse.close()
+    assert list(loaded["Institution"].unique()) == ["107004"]
+    # Category order follows first appearance, which differs
+    pd.testing.assert_frame_equal(loaded[expected.columns], expected, check_categorical=False)
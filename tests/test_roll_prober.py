@@ -0,0 +1,96 @@
+import pytest
+
+from mock_server import MockBoard
+from roll_prober import DEFAULT_GAP, RangeProber, probe_rolls
+
+
+def fake_board(rolls, errors=()):
+    # fetch_batch over a set of known rolls, without HTTP
+    fetched = []
+
+    def fetch_batch(batch):
+        fetched.extend(batch)
+        return {p: (None, RuntimeError("boom")) if p in errors
+                else ({"Roll No": str(p) if p in rolls else ""}, None) for p in batch}
+
+    return fetch_batch, fetched
+
+
+def found(prober):
+    return {p for p, result, error in prober.results() if result and result["Roll No"]}
+
+
+def test_finds_every_roll_of_the_sample(sample_records):
+    rolls = {int(s["Roll No"]) for s in sample_records}
+    fetch_batch, fetched = fake_board(rolls)
+    prober = RangeProber(fetch_batch)
+    prober.probe_range(min(rolls), max(rolls))
+    assert found(prober) == rolls and len(rolls) == 435
+    stats = prober.stats()
+    assert stats["span"] == 57238 and stats["requested"] == len(fetched) < stats["span"] // 10
+    assert stats["skipped_stretches"] > 0
+
+
+def test_probe_rolls_against_the_mock_board(sample_path, serve):
+    # Two blocks with dead stretches around them, over HTTP
+    board = MockBoard.from_file(sample_path)
+    url = serve(board)
+    spans = [(124000, 125500), (133000, 134500)]
+    rolls = {p for p, _, _ in board.records if any(start <= p <= end for start, end in spans)}
+    prober = probe_rolls(spans, concurrency=8, rate=0, url=url)
+    assert found(prober) == rolls
+    assert prober.stats()["requested"] == board.requests
+
+
+# Every offset of the block end against the batch boundary
+@pytest.mark.parametrize("block_end", range(115, 115 + 16))
+def test_roll_after_exactly_gap_misses(block_end):
+    # Scanning forward: the roll after `gap` empties is still part of the block
+    rolls = set(range(100, block_end + 1)) | {block_end + DEFAULT_GAP + 1}
+    prober = RangeProber(fake_board(rolls)[0])
+    prober.probe_range(100, 1000)
+    assert found(prober) == rolls
+
+
+@pytest.mark.parametrize("head", range(1, 20))
+def test_backfill_reaches_past_exactly_gap_misses(head):
+    # A sample lands inside the block; walking back from it must reach the
+    # head roll sitting `gap` empties below the rest of the block
+    block = set(range(500, 540))
+    lone = 500 - DEFAULT_GAP - 1
+    rolls = block | {lone, 100 + head}
+    fetch_batch, fetched = fake_board(rolls)
+    prober = RangeProber(fetch_batch)
+    prober.probe_range(100, 1000)
+    assert found(prober) == rolls
+    assert len(fetched) == len(set(fetched))  # nothing fetched twice
+
+
+def test_more_than_gap_misses_end_a_block():
+    fetch_batch, fetched = fake_board(set(range(100, 110)))
+    prober = RangeProber(fetch_batch, gap=4, batch_size=4, probe_stride=10, probe_width=2)
+    prober.probe_range(100, 199)
+    # Dense up to 115 (110-114 is the first run of more than 4 empties, the
+    # batch ends at 115), then pairs of samples 10 apart from 116 on
+    assert sorted(fetched)[:16] == list(range(100, 116))
+    assert sorted(fetched)[16:] == [126, 136, 147, 157, 168, 178, 189, 199]
+    assert prober.stats()["probes"] == 4 and prober.stats()["skipped_stretches"] == 4
+
+
+def test_stride_and_window():
+    fetch_batch, fetched = fake_board(set())
+    prober = RangeProber(fetch_batch, gap=0, batch_size=1, probe_stride=100, probe_width=3, probe_window=2)
+    prober.probe_range(0, 1000)
+    # Roll 0 is empty, so sampling starts from 1: three pairs of rolls 100
+    # apart per probe step, and the end of the range when the samples overrun it
+    assert sorted(fetched) == [0, 101, 102, 201, 202, 301, 302, 403, 404, 503, 504, 603, 604,
+                               705, 706, 805, 806, 905, 906, 1000]
+
+
+def test_errors_do_not_count_towards_a_gap():
+    rolls = {100, 100 + DEFAULT_GAP + 4}
+    errors = set(range(101, 105))
+    prober = RangeProber(fake_board(rolls, errors)[0])
+    prober.probe_range(100, 1000)
+    assert found(prober) == rolls
+    assert [p for p, _, error in prober.results() if error] == sorted(errors)
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from analysis import select_rolls
+from roll_ranges import parse_p_input, parse_p_ranges
+
+
+def test_parse_p_ranges():
+    assert parse_p_ranges("103683, 124861-124870") == [(103683, 103683), (124861, 124870)]
+    assert parse_p_ranges(" 5 ") == [(5, 5)]
+
+
+def test_parse_p_input():
+    assert parse_p_input("7,1-3, 10-10") == [7, 1, 2, 3, 10]
+    assert parse_p_input("3-1") == []
+
+
+@pytest.mark.parametrize("text", ["", "1,,2", "a-b", "1-2-3"])
+def test_malformed(text):
+    with pytest.raises(ValueError):
+        parse_p_ranges(text)
+
+
+def test_select_rolls():
+    rolls = np.array([100, 103, 105, 110, 200])
+    assert select_rolls("101-105, 200, 300", rolls) == {103, 105, 200}
+    assert select_rolls("  ", rolls) == set()
+    with pytest.raises(ValueError):
+        select_rolls("100-x", rolls)
+
+
+def test_analysis_does_not_load_the_http_client(sample_path):
+    code = ("import sys, numpy, analysis; analysis.select_rolls('1-5', numpy.arange(10)); "
+            "print(sorted(m for m in ('scraper', 'requests') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(sample_path)).stdout
+    assert output.strip() == "[]"
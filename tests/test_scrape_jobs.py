@@ -0,0 +1,129 @@
+import json
+import threading
+
+import pytest
+import requests
+
+import scraper
+from mock_server import MockBoard
+from scrape_jobs import DONE, EMPTY, ERROR, FAILED, MAX_ATTEMPTS, ScrapeJob
+
+BROKEN = 999999   # always a server error
+UNKNOWN = 999998  # no such roll: an empty page
+
+
+class RecordingBoard(MockBoard):
+    # Remembers every roll a page was rendered for
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.looked_up = []
+        self._seen_lock = threading.Lock()
+
+    def lookup(self, p, q, r):
+        with self._seen_lock:
+            self.looked_up.append(p)
+        return super().lookup(p, q, r)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(scraper, "backoff_delay", lambda attempt: 0)
+
+
+@pytest.fixture
+def board(sample_path):
+    with open(sample_path, encoding="utf-8") as f:
+        data = json.load(f)[:20]
+    return RecordingBoard({(int(s["Roll No"]), None, None): s for s in data}, error_rolls=[BROKEN])
+
+
+def rolls_of(board):
+    return sorted(p for p, _, _ in board.records)
+
+
+def run(job, url, **kwargs):
+    return job.run(concurrency=2, rate=0, url=url, **kwargs)
+
+
+def test_interrupted_job_resumes_without_refetching(tmp_path, board, serve):
+    url = serve(board)
+    rolls = rolls_of(board) + [UNKNOWN, BROKEN]
+    job = ScrapeJob.create(rolls, jobs_dir=tmp_path)
+
+    def interrupt(done, total, p, result, error):
+        if done == 8:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run(job, url, on_progress=interrupt)
+    with open(job.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"p": 1')  # torn line from the crash
+
+    resumed = ScrapeJob.load(job.job_id, jobs_dir=tmp_path)
+    done_before = {p for p, entry in resumed.entries.items() if entry["state"] == DONE}
+    assert len(resumed.entries) == 8
+    assert len(resumed.pending()) == len(rolls) - 8
+
+    board.looked_up.clear()
+    assert run(resumed, url) == len(rolls) - 8
+    assert not done_before & set(board.looked_up)
+    assert [record["Roll No"] for record in resumed.results()] == [str(p) for p in rolls_of(board)]
+    assert resumed.entries[UNKNOWN]["state"] == EMPTY
+    assert resumed.entries[BROKEN]["state"] in (ERROR, FAILED)
+
+
+def test_failed_rolls_stop_after_max_attempts(tmp_path, board, serve):
+    url = serve(board)
+    job = ScrapeJob.create([BROKEN], jobs_dir=tmp_path)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        assert run(ScrapeJob.load(job.job_id, jobs_dir=tmp_path), url) == 1
+        entry = ScrapeJob.load(job.job_id, jobs_dir=tmp_path).entries[BROKEN]
+        assert entry["attempts"] == attempt
+        assert entry["state"] == (FAILED if attempt == MAX_ATTEMPTS else ERROR)
+
+    errors = board.status_counts.get(500, 0)
+    finished = ScrapeJob.load(job.job_id, jobs_dir=tmp_path)
+    assert finished.is_complete()
+    assert run(finished, url) == 0
+    assert board.status_counts.get(500, 0) == errors
+
+
+def test_permanent_errors_fail_at_once(tmp_path):
+    job = ScrapeJob.create([1, 2, 3], jobs_dir=tmp_path)
+
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    with open(job.journal_path, "a", encoding="utf-8") as journal:
+        assert job.record(1, None, http_error(404), journal)["state"] == FAILED
+        assert job.record(2, None, http_error(403), journal)["state"] == ERROR  # blocked: retry later
+        assert job.record(3, None, requests.ConnectionError("reset"), journal)["state"] == ERROR
+    assert job.pending() == [2, 3]
+    assert job.counts() == {DONE: 0, EMPTY: 0, FAILED: 1, ERROR: 2, "pending": 2, "total": 3}
+
+
+def test_compact_keeps_latest_state_of_each_roll(tmp_path, board, serve):
+    url = serve(board)
+    rolls = rolls_of(board)[:5] + [UNKNOWN, BROKEN]
+    job = ScrapeJob.create(rolls, jobs_dir=tmp_path)
+    for _ in range(MAX_ATTEMPTS):
+        run(ScrapeJob.load(job.job_id, jobs_dir=tmp_path), url)
+    with open(job.journal_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == len(rolls) + MAX_ATTEMPTS - 1
+
+    job = ScrapeJob.load(job.job_id, jobs_dir=tmp_path)
+    output = tmp_path / "results.json"
+    results = job.compact(output=str(output))
+    with open(job.journal_path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["p"] for line in lines] == rolls
+    assert lines[-1]["state"] == FAILED and lines[-1]["attempts"] == MAX_ATTEMPTS
+    assert lines[-2]["state"] == EMPTY
+
+    reloaded = ScrapeJob.load(job.job_id, jobs_dir=tmp_path)
+    assert {p: e["state"] for p, e in reloaded.entries.items()} == {p: e["state"] for p, e in job.entries.items()}
+    assert reloaded.results() == results
+    with open(output, encoding="utf-8") as f:
+        assert json.load(f) == results
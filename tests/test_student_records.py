@@ -0,0 +1,76 @@
+import copy
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from student_records import GRADES, NO_CODE, REMARKS, SUBJECTS, StudentRecord, compact_records, to_dicts
+
+
+def test_round_trip_of_the_sample(sample_records):
+    # Key order included, so saved JSON files come out the same
+    for record in sample_records:
+        assert json.dumps(StudentRecord.from_dict(record).to_dict()) == json.dumps(record)
+
+
+def test_codes_are_interned(sample_records):
+    records = compact_records(sample_records)
+    subjects = {s["Subject"] for record in sample_records for s in record["Subjects"]}
+    assert {SUBJECTS[code] for r in records for code in r.codes[::3]} == subjects
+    # One code per distinct value, shared by every record
+    assert len({code for r in records for code in r.codes[::3]}) == len(subjects)
+    # Pages without relative grades store NO_CODE
+    for key, table, start in (("Relative Grade", GRADES, 1), ("Remarks", REMARKS, 2)):
+        values = {s.get(key) for record in sample_records for s in record["Subjects"]}
+        assert {None if code == NO_CODE else table[code] for r in records for code in r.codes[start::3]} == values
+    first = records[0]
+    assert first.subject_names() == [s["Subject"] for s in sample_records[0]["Subjects"]]
+    assert first.totals() == [int(s["Total"]) for s in sample_records[0]["Subjects"]]
+
+
+def test_missing_relative_grade(sample_records):
+    record = copy.deepcopy(sample_records[0])
+    for subject in record["Subjects"]:
+        del subject["Relative Grade"]
+    del record["Subjects"][0]["Remarks"]
+    result = StudentRecord.from_dict(record).to_dict()
+    assert result == record
+    assert all("Relative Grade" not in s for s in result["Subjects"])
+
+
+@pytest.mark.parametrize("change", [
+    lambda r: r["Subjects"][0].update({"Theory-I": "ABSENT", "Practical": "007"}),
+    lambda r: r["Subjects"][1].update({"Percentile Marks": "75.5", "Note": "recounted"}),
+    lambda r: r["Subjects"][2].pop("Theory-II"),
+    lambda r: r.update({"Roll No": "R-1", "Grand Total": "", "Center": "GKN"}),
+    lambda r: r.pop("Status"),
+    lambda r: r.update({"Subjects": []}),
+])
+def test_unusual_values_survive(sample_records, change):
+    record = copy.deepcopy(sample_records[0])
+    change(record)
+    assert StudentRecord.from_dict(record).to_dict() == record
+
+
+def test_compact_records_and_to_dicts(sample_records):
+    records = compact_records(sample_records[:10])
+    assert all(isinstance(r, StudentRecord) for r in records)
+    again = compact_records(records + sample_records[10:12])
+    assert again[:10] == records  # already compact: passed through
+    assert to_dicts(again) == sample_records[:12]
+    assert to_dicts(sample_records[:3]) == sample_records[:3]
+
+
+def test_pickle(sample_records):
+    records = compact_records(sample_records[:20])
+    restored = pickle.loads(pickle.dumps(records))
+    assert to_dicts(restored) == sample_records[:20]
+
+
+def test_records_cross_a_process_pool(sample_records):
+    # As batch_scrape hands them between processes
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        records = pool.submit(compact_records, sample_records[:20]).result()
+        assert all(isinstance(r, StudentRecord) for r in records)
+        assert pool.submit(to_dicts, records).result() == sample_records[:20]
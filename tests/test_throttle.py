@@ -0,0 +1,143 @@
+import json
+
+import pytest
+import requests
+
+import scraper
+import throttle as throttle_module
+from mock_server import MockBoard
+from throttle import BLOCK_STATUSES, AdaptiveThrottle, CircuitBreaker, is_block, is_transient
+
+
+class Clock:
+    # Stands in for the time module: monotonic() is set by the test and
+    # sleep() just moves it on
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle_module, "time", clock)
+    return clock
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def request(throttle, error=None):
+    throttle.acquire()
+    throttle.release(error)
+
+
+@pytest.mark.parametrize("status", [403, 429, 503])
+def test_block_statuses(status):
+    assert status in BLOCK_STATUSES
+    assert is_block(http_error(status)) and is_transient(http_error(status))
+
+
+def test_other_errors():
+    assert not is_block(http_error(500)) and is_transient(http_error(500))
+    assert not is_block(http_error(404)) and not is_transient(http_error(404))
+    assert is_transient(requests.ConnectionError()) and not is_block(requests.ConnectionError())
+
+
+def test_successes_raise_rate_and_concurrency(clock):
+    throttle = AdaptiveThrottle(rate=10, concurrency=4, increase=0.5, increase_every=10)
+    for _ in range(20):
+        request(throttle)
+    assert throttle.rate > 10
+    assert throttle.limit == 6
+    for _ in range(1000):
+        request(throttle)
+    assert throttle.rate == throttle.max_rate == 20
+    assert throttle.limit == throttle.max_concurrency == 8
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_blocks_halve_rate_and_concurrency(clock, status):
+    # A breaker that never opens, so only the AIMD side is exercised
+    throttle = AdaptiveThrottle(rate=16, concurrency=8, breaker=CircuitBreaker(threshold=2))
+    request(throttle, http_error(status))
+    assert (throttle.rate, throttle.limit) == (8, 4)
+    # More blocks from the same burst don't back off again
+    request(throttle, http_error(status))
+    assert (throttle.rate, throttle.limit) == (8, 4)
+    clock.now += 1.5
+    request(throttle, http_error(status))
+    assert (throttle.rate, throttle.limit) == (4, 2)
+    for _ in range(10):
+        clock.now += 1.5
+        request(throttle, http_error(status))
+    assert throttle.rate == throttle.min_rate and throttle.limit == 1
+    assert throttle.blocks == 13
+
+
+def test_server_errors_are_not_blocks(clock):
+    throttle = AdaptiveThrottle(rate=16, concurrency=8)
+    for _ in range(20):
+        request(throttle, http_error(500))
+    assert (throttle.rate, throttle.limit) == (16, 8)
+    assert throttle.errors == 20 and throttle.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_recovers(clock):
+    breaker = CircuitBreaker(threshold=0.5, window=10, cooldown=30)
+    for blocked in (0, 1, 0, 1):
+        breaker.record(blocked)
+    assert breaker.state == CircuitBreaker.CLOSED  # needs window // 2 outcomes
+    breaker.record(1)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+    assert breaker.wait_time() == 30
+
+    clock.now += 30
+    assert breaker.wait_time() == 0  # the probe goes out
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.wait_time() > 0   # everyone else waits for it
+    breaker.record(1)                # probe blocked: longer cooldown
+    assert breaker.state == CircuitBreaker.OPEN and breaker.cooldown == 60 and breaker.trips == 2
+
+    clock.now += 60
+    assert breaker.wait_time() == 0
+    breaker.record(0)                # probe got through
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.cooldown == 30
+    assert breaker.block_rate() == 0
+
+
+def test_throttle_waits_while_breaker_is_open(clock):
+    throttle = AdaptiveThrottle(rate=0, concurrency=4, breaker=CircuitBreaker(window=4, cooldown=5))
+    for _ in range(2):
+        request(throttle, http_error(429))
+    assert throttle.breaker.state == CircuitBreaker.OPEN
+    # Condition.wait doesn't go through the fake clock, so let the cooldown pass
+    clock.now += 5
+    request(throttle)
+    assert throttle.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_backs_off_under_a_rate_limited_board(monkeypatch, sample_path, serve):
+    # The mock blocks every request for a while once more than 40 arrive in
+    # a second; the scrape must slow down, trip the breaker and still finish
+    monkeypatch.setattr(scraper, "backoff_delay", lambda attempt: 0.05)
+    with open(sample_path, encoding="utf-8") as f:
+        data = json.load(f)[:150]
+    board = MockBoard({(int(s["Roll No"]), None, None): s for s in data}, rate_limit=40, block_for=0.3)
+    url = serve(board)
+    throttle = AdaptiveThrottle(rate=200, concurrency=8, breaker=CircuitBreaker(window=10, cooldown=0.3))
+
+    outcomes = scraper.scrape_rolls([int(s["Roll No"]) for s in data], url=url, throttle=throttle, retry_passes=5)
+    assert all(error is None for _, _, error in outcomes)
+    assert [result["Roll No"] for _, result, _ in outcomes] == [s["Roll No"] for s in data]
+    assert board.status_counts.get(403, 0) > 0 and throttle.blocks > 0
+    assert throttle.rate < 200
+    assert throttle.breaker.trips >= 1 and throttle.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from results_store import save_results
+from visual_report import MANIFEST_NAME, find_inputs, report_names, run_batch
+
+
+def write_json(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return str(path)
+
+
+@pytest.fixture
+def results_dir(tmp_path, sample_records):
+    # results/2023/107004.json, and results/2024/107004.json with the
+    # Parquet export beside it
+    root = tmp_path / "results"
+    write_json(str(root / "2023" / "107004.json"), sample_records[:40])
+    write_json(str(root / "2024" / "107004.json"), sample_records[40:100])
+    save_results(sample_records[40:100], str(root / "2024" / "107004.parquet"))
+    write_json(str(root / "2024" / "index.json"), {})
+    return root
+
+
+def test_find_inputs_keeps_same_names_in_other_directories(results_dir):
+    paths = find_inputs([str(results_dir / "2023"), str(results_dir / "2024")])
+    assert [os.path.relpath(p, results_dir) for p in paths] == [
+        os.path.join("2023", "107004.json"), os.path.join("2024", "107004.parquet")]
+    # The same file given twice is one input
+    assert len(find_inputs([str(results_dir / "2023" / "*.json"), str(results_dir / "2023")])) == 1
+
+
+def test_report_names(tmp_path):
+    a, b = str(tmp_path / "2023" / "107004.json"), str(tmp_path / "2024" / "107004.parquet")
+    assert report_names([a, b]) == {a: "2023/107004", b: "2024/107004"}
+    assert report_names([a]) == {a: "107004"}
+    c = str(tmp_path / "2023" / "107005.json")
+    assert report_names([a, c]) == {a: "107004", c: "107005"}
+    with pytest.raises(ValueError, match="107004"):
+        report_names([a, str(tmp_path / "2023" / "107004.parquet")])
+
+
+def test_run_batch_reports_each_directory(tmp_path, results_dir):
+    out_dir = str(tmp_path / "reports")
+    paths = find_inputs([str(results_dir / "2023"), str(results_dir / "2024")])
+    summaries, _, rebuilt = run_batch(paths, out_dir, workers=1)
+    assert sorted((s["name"], s["students"]) for s in summaries) == [("2023/107004", 40), ("2024/107004", 60)]
+    assert rebuilt == 2 * 5
+    for name in ("2023", "2024"):
+        assert os.path.exists(os.path.join(out_dir, name, "107004", "report.md"))
+    with open(os.path.join(out_dir, "index.md"), encoding="utf-8") as f:
+        index = f.read()
+    assert "(2023/107004/report.md)" in index and "(2024/107004/report.md)" in index
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+
+    # Nothing changed: both are settled from the manifest
+    summaries, _, rebuilt = run_batch(paths, out_dir, workers=1)
+    assert rebuilt == 0 and len(summaries) == 2
@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+# Status codes that mean "slow down" rather than "this roll is bad"
+BLOCK_STATUSES = (403, 429, 503)
+
+
+def is_block(error):
+    return (isinstance(error, requests.HTTPError) and error.response is not None
+            and error.response.status_code in BLOCK_STATUSES)
+
+
+def is_transient(error):
+    # Worth retrying: blocks, server errors, timeouts and dropped connections
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        code = error.response.status_code
+        return code in BLOCK_STATUSES or code == 408 or code >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    # Opens when the share of blocked responses among the last `window`
+    # requests reaches `threshold`. While open every worker waits; after
+    # `cooldown` seconds one probe request is let through (half-open) and its
+    # outcome decides whether to close again or reopen with a longer cooldown.
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold=0.5, window=20, cooldown=30.0, max_cooldown=600.0):
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.trips = 0
+        self.opened_at = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._probe_out = False
+
+    def block_rate(self):
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def record(self, blocked):
+        if self.state == self.HALF_OPEN:
+            self._probe_out = False
+            if blocked:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            else:
+                self.state = self.CLOSED
+                self.cooldown = self.base_cooldown
+                self._outcomes.clear()
+            return
+        self._outcomes.append(1 if blocked else 0)
+        if (self.state == self.CLOSED and len(self._outcomes) >= self.window // 2
+                and self.block_rate() >= self.threshold):
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    def wait_time(self):
+        # Seconds until the caller may send a request (0 = go now). Must be
+        # called under the owner's lock; claims the probe slot when half-open.
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_out:
+                return 0.5
+            self._probe_out = True
+        return 0.0
+
+
+class AdaptiveThrottle:
+    # AIMD control of both request rate and number of requests in flight.
+    # Every success nudges the rate up by `increase` req/s (and widens the
+    # concurrency limit every `increase_every` successes); every block halves
+    # both. Rate and concurrency can grow to max_rate / max_concurrency,
+    # twice their starting values unless given. The circuit breaker sits on
+    # top and stops all traffic when blocks dominate.
+    #
+    # Workers call acquire() before a request and release(error) after it.
+    # An optional budget (anything with a wait() method, such as the
+    # cross-process SharedBudget in batch_scrape.py) caps the rate further.
+    def __init__(self, rate=10.0, concurrency=8, min_rate=0.5, max_rate=None,
+                 max_concurrency=None, increase=0.5, increase_every=10, breaker=None,
+                 budget=None):
+        self.rate = float(rate) if rate else 0.0
+        self.min_rate = min_rate
+        self.max_rate = max_rate or (self.rate * 2 if self.rate else 0.0)
+        self.limit = max(1, concurrency)
+        self.max_concurrency = max(max_concurrency or self.limit * 2, self.limit)
+        self.increase = increase
+        self.increase_every = increase_every
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget
+        self.in_flight = 0
+        self.requests = 0
+        self.blocks = 0
+        self.errors = 0
+        self.retries = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._next_slot = time.monotonic()
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                delay = self.breaker.wait_time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                if self.in_flight < self.limit:
+                    break
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if self.rate:
+                self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+        if self.budget is not None:
+            self.budget.wait()
+
+    def release(self, error=None):
+        blocked = error is not None and is_block(error)
+        with self._cond:
+            self.in_flight -= 1
+            if blocked:
+                self.blocks += 1
+                self._successes = 0
+                # Requests already in flight tend to get blocked together;
+                # back off once per burst, not once per response
+                now = time.monotonic()
+                if now - self._last_decrease >= 1.0:
+                    self._last_decrease = now
+                    if self.rate:
+                        self.rate = max(self.min_rate, self.rate / 2)
+                    self.limit = max(1, self.limit // 2)
+            elif error is None:
+                self._successes += 1
+                if self.rate:
+                    self.rate = min(self.max_rate, self.rate + self.increase / max(1, self.limit))
+                if self._successes % self.increase_every == 0:
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+            else:
+                self.errors += 1
+            if error is None or blocked or self.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.breaker.record(blocked)
+            self._cond.notify_all()
+
+    def record_retry(self):
+        # Called by workers about to retry a request after a transient error
+        with self._cond:
+            self.retries += 1
+
+    def stats(self):
+        return {
+            "rate": round(self.rate, 2),
+            "concurrency": self.limit,
+            "requests": self.requests,
+            "blocks": self.blocks,
+            "errors": self.errors,
+            "retries": self.retries,
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+        }
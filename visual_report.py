@@ -1,15 +1,44 @@
+import argparse
+import glob
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+import time
 from collections import defaultdict
-
-# === Step 1: Load JSON Data ===
-with open("results_107004.json", "r") as f:
-    data = json.load(f)
-
-# === Step 2: Prepare Analysis ===
-status_counts = {"PASS": 0, "RE-APPEAR": 0}
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from memo_cache import ArtifactManifest, content_hash, file_hash  # noqa: E402
+from results_store import from_long_frame, read_parquet  # noqa: E402
+
+# Markdown result reports with their charts, for one or many institutions.
+# Each results file (one institution) gets a folder with the charts and
+# report.md; an index.md links them all. Institutions are rendered in a
+# process pool on the Agg backend, each worker drawing into the same four
+# figures, cleared between institutions, instead of creating new ones.
+#
+# Reruns are incremental: manifest.json in the output directory records the
+# hash of each results file and of the data behind each chart and report,
+# so unchanged institutions aren't even loaded and, in a changed one, only
+# the artifacts whose data changed are redrawn.
+#
+#   python visual_report.py results/ -o visual_reports
+#   python visual_report.py "results/*.json" --workers 8
+
+DEFAULT_OUT_DIR = "visual_reports"
+MANIFEST_NAME = "manifest.json"
+REPORT_VERSION = 1  # bump when the charts or report.md change look
+STAGES = ["check", "load", "analyze", "charts", "markdown"]
+ANALYSIS_PARTS = ("status_counts", "df_buckets", "df_avg")
+
+# === Analysis ===
 score_buckets = ['90+', '80-89', '70-79', '60-69', '50-59', '40-49', '<40']
 bucket_ranges = {
     '90+': lambda x: x >= 90,
@@ -21,71 +50,146 @@ bucket_ranges = {
     '<40': lambda x: x < 40
 }
 
-subject_bucket_counts = defaultdict(lambda: defaultdict(int))
-subject_scores = defaultdict(list)
 
-for student in data:
-    status = student.get("Status", "RE-APPEAR").strip().upper()
-    status_counts[status] += 1
+def load_results(path):
+    # A results JSON file (list of student dicts) or a Parquet export
+    if path.endswith(".parquet"):
+        return from_long_frame(read_parquet(path))
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def analyze_results(data):
+    # Returns (status_counts, df_buckets, df_avg)
+    status_counts = {"PASS": 0, "RE-APPEAR": 0}
+    subject_bucket_counts = defaultdict(lambda: defaultdict(int))
+    subject_scores = defaultdict(list)
+
+    for student in data:
+        status = (student.get("Status") or "RE-APPEAR").strip().upper()
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+        for subject in student.get("Subjects", []):
+            subject_name = subject["Subject"]
+            try:
+                score = int(subject["Total"])
+            except (TypeError, ValueError):
+                continue
 
-    for subject in student.get("Subjects", []):
-        subject_name = subject["Subject"]
-        try:
-            score = int(subject["Total"])
-        except:
-            continue
+            subject_scores[subject_name].append(score)
 
-        subject_scores[subject_name].append(score)
+            for bucket, rule in bucket_ranges.items():
+                if rule(score):
+                    subject_bucket_counts[subject_name][bucket] += 1
+                    break
 
-        for bucket, rule in bucket_ranges.items():
-            if rule(score):
-                subject_bucket_counts[subject_name][bucket] += 1
-                break
+    df_buckets = (pd.DataFrame(subject_bucket_counts).reindex(score_buckets).fillna(0).astype(int).T
+                  if subject_bucket_counts else pd.DataFrame(columns=score_buckets))
+    df_avg = pd.DataFrame({subj: [sum(scores) / len(scores)] for subj, scores in subject_scores.items()},
+                          index=["Average"]).T
+    if not df_avg.empty:
+        df_avg = df_avg.sort_values("Average", ascending=False)
+    return status_counts, df_buckets, df_avg
 
-df_buckets = pd.DataFrame(subject_bucket_counts).fillna(0).astype(int).T[score_buckets]
-df_avg = pd.DataFrame({subj: [sum(scores)/len(scores)] for subj, scores in subject_scores.items()},
-                      index=["Average"]).T.sort_values("Average", ascending=False)
 
-# === Step 3: Generate Charts ===
+# === Charts ===
 sns.set(style="whitegrid")
 
-# 1. Stacked Bar Chart with darker for 90+ and lighter for <40
-blues = sns.color_palette("Blues", n_colors=len(score_buckets))[::-1]  # Reverse for darker → lighter
-df_buckets.plot(kind='bar', stacked=True, color=blues, figsize=(14, 8))
-plt.title("Subject-wise Distribution of Marks")
-plt.xlabel("Subjects")
-plt.ylabel("Number of Students")
-plt.xticks(rotation=45, ha="right")
-plt.legend(title="Score Range", bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.savefig("subject_score_distribution.png")
-plt.close()
-
-# 2. Pie Chart: Pass vs Reappear
-plt.figure(figsize=(6, 6))
-plt.pie(status_counts.values(), labels=status_counts.keys(), autopct='%1.1f%%',
-        colors=['#0d47a1', '#90caf9'], startangle=140)
-plt.title("Overall Result: Pass vs Reappear")
-plt.tight_layout()
-plt.savefig("pass_vs_reappear.png")
-plt.close()
-
-# 4. Heatmap of Performance
-plt.figure(figsize=(12, 8))
-sns.heatmap(df_buckets, annot=True, fmt="d", cmap="Blues")
-plt.title("Score Range Heatmap by Subject")
-plt.tight_layout()
-plt.savefig("subject_score_heatmap.png")
-plt.close()
-
-# === Step 4: Generate Markdown Report ===
-pass_count = status_counts["PASS"]
-reappear_count = status_counts["RE-APPEAR"]
-total = pass_count + reappear_count
-pass_percent = 100 * pass_count / total
-reappear_percent = 100 * reappear_count / total
-
-report_md = f"""
+_templates = {}
+
+
+def _template(name, figsize):
+    # This worker's figure for a chart, cleared for reuse
+    fig = _templates.get(name)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _templates[name] = fig
+    else:
+        fig.clear()
+    return fig
+
+
+def draw_distribution(ax, df_buckets):
+    # Stacked bars, darker for 90+ and lighter for <40
+    blues = sns.color_palette("Blues", n_colors=len(score_buckets))[::-1]
+    df_buckets.plot(kind='bar', stacked=True, color=blues, ax=ax)
+    ax.set_title("Subject-wise Distribution of Marks")
+    ax.set_xlabel("Subjects")
+    ax.set_ylabel("Number of Students")
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.legend(title="Score Range", bbox_to_anchor=(1.05, 1), loc='upper left')
+
+
+def draw_pass_pie(ax, status_counts):
+    ax.pie(status_counts.values(), labels=status_counts.keys(), autopct='%1.1f%%',
+           colors=['#0d47a1', '#90caf9'], startangle=140)
+    ax.set_title("Overall Result: Pass vs Reappear")
+
+
+def draw_averages(ax, df_avg):
+    blues = sns.color_palette("Blues", n_colors=max(len(df_avg), 1))[::-1]
+    ax.bar(df_avg.index, df_avg["Average"], color=blues)
+    for i, v in enumerate(df_avg["Average"]):
+        ax.text(i, v + 0.5, f"{v:.1f}", ha='center', va='bottom', fontweight='bold')
+    ax.set_title("Average Scores by Subject")
+    ax.set_ylabel("Average Score")
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+
+
+def draw_heatmap(ax, df_buckets):
+    sns.heatmap(df_buckets, annot=True, fmt="d", cmap="Blues", ax=ax)
+    ax.set_title("Score Range Heatmap by Subject")
+
+
+# file name -> (draw function, figure size, the part of the analysis drawn)
+CHARTS = {
+    "subject_score_distribution.png": (draw_distribution, (14, 8), "df_buckets"),
+    "pass_vs_reappear.png": (draw_pass_pie, (6, 6), "status_counts"),
+    "average_scores.png": (draw_averages, (14, 8), "df_avg"),
+    "subject_score_heatmap.png": (draw_heatmap, (12, 8), "df_buckets"),
+}
+
+
+def render_chart(name, folder, data):
+    draw, figsize, _ = CHARTS[name]
+    fig = _template(name, figsize)
+    draw(fig.add_subplot(), data)
+    fig.tight_layout()
+    fig.savefig(os.path.join(folder, name))
+
+
+# === Markdown ===
+def key_insights(status_counts, df_buckets, df_avg):
+    pass_count = status_counts["PASS"]
+    total = sum(status_counts.values())
+    pass_percent = 100 * pass_count / total if total else 0
+    lines = []
+    if len(df_avg) >= 2:
+        lines.append(f"- Subjects like **{df_avg.index[0]}** and **{df_avg.index[1]}** "
+                     f"have higher average scores.")
+    if not df_buckets.empty and df_buckets['<40'].any():
+        weakest = df_buckets['<40'].sort_values(ascending=False)
+        weakest = [subject for subject, count in weakest.items() if count][:3]
+        lines.append(f"- Most students below 40 in {', '.join(f'**{s}**' for s in weakest)}, "
+                     f"indicating difficulty or low performance.")
+    lines.append(f"- Overall, **{pass_percent:.1f}%** of students passed while "
+                 f"**{100 - pass_percent:.1f}%** need to reappear.")
+    return "\n".join(lines)
+
+
+def render_markdown(folder, status_counts, df_buckets, df_avg):
+    pass_count = status_counts["PASS"]
+    reappear_count = sum(status_counts.values()) - pass_count
+    total = pass_count + reappear_count
+    pass_percent = 100 * pass_count / total if total else 0
+    reappear_percent = 100 - pass_percent if total else 0
+
+    report_md = f"""
 # Examination Report Summary
 
 This report presents an analysis of the students' results, focusing on subject-wise performance, overall pass/reappear rates, and other key visual insights.
@@ -96,9 +200,9 @@ This report presents an analysis of the students' results, focusing on subject-w
 
 ![Pass vs Reappear](pass_vs_reappear.png)
 
-- **Pass**: {pass_count} students  
-- **Reappear**: {reappear_count} students  
-- **Pass Percentage**: {pass_percent:.1f}%  
+- **Pass**: {pass_count} students
+- **Reappear**: {reappear_count} students
+- **Pass Percentage**: {pass_percent:.1f}%
 - **Reappear Percentage**: {reappear_percent:.1f}%
 
 ---
@@ -129,13 +233,216 @@ This heatmap provides a tabular view of how students performed across score brac
 
 ### 📝 Key Insights
 
-- Subjects like **General Science** and **Education** have higher average scores.
-- A few subjects have more students scoring below 40, indicating difficulty or low performance.
-- Overall, **{pass_percent:.1f}%** of students passed while **{reappear_percent:.1f}%** need to reappear.
+{key_insights(status_counts, df_buckets, df_avg)}
 """
-
-# Save Markdown
-with open("report.md", "w", encoding="utf-8") as f:
-    f.write(report_md)
-
-print("✅ Report generated successfully: report.md")
+    with open(os.path.join(folder, "report.md"), "w", encoding="utf-8") as f:
+        f.write(report_md)
+
+
+# === Batch ===
+def _digest(value):
+    # Content hash of an analysis part; a DataFrame's index (the subjects)
+    # counts too
+    if isinstance(value, pd.DataFrame):
+        return content_hash(value.reset_index())
+    return content_hash([value])
+
+
+def artifact_keys(parts):
+    # Key of each artifact: what it shows plus how it is drawn
+    digests = {part: _digest(value) for part, value in parts.items()}
+    keys = {name: content_hash([REPORT_VERSION, name, draw.__name__, figsize, digests[part]])
+            for name, (draw, figsize, part) in CHARTS.items()}
+    keys["report.md"] = content_hash([REPORT_VERSION, "report.md"] + [digests[p] for p in ANALYSIS_PARTS])
+    return keys
+
+
+def input_key(path):
+    # Key of a whole institution: its results file and the report settings
+    settings = [(name, draw.__name__, figsize, part) for name, (draw, figsize, part) in CHARTS.items()]
+    return content_hash([REPORT_VERSION, file_hash(path), settings])
+
+
+def build_report(path, out_dir, key=None, previous=None, name=None):
+    # Runs in a pool worker. Redraws the artifacts whose key differs from
+    # the previous manifest entry (or whose file is missing). Returns the
+    # new manifest entry (with the summary for the index), the seconds spent
+    # in each stage and the artifacts rebuilt. The report goes in
+    # out_dir/name, by default the file's name without extension.
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    folder = os.path.join(out_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    old_keys = (previous or {}).get("artifacts", {})
+    timings = {}
+
+    start = time.perf_counter()
+    data = load_results(path)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analysis = analyze_results(data)
+    parts = dict(zip(ANALYSIS_PARTS, analysis))
+    keys = artifact_keys(parts)
+    dirty = [artifact for artifact, artifact_key in keys.items()
+             if old_keys.get(artifact) != artifact_key or not os.path.exists(os.path.join(folder, artifact))]
+    timings["analyze"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for chart in CHARTS:
+        if chart in dirty:
+            render_chart(chart, folder, parts[CHARTS[chart][2]])
+    timings["charts"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if "report.md" in dirty:
+        render_markdown(folder, *analysis)
+    timings["markdown"] = time.perf_counter() - start
+
+    status_counts = parts["status_counts"]
+    summary = {"name": name, "students": sum(status_counts.values()), "pass": status_counts["PASS"]}
+    entry = {"key": key or input_key(path), "summary": summary, "artifacts": keys}
+    return entry, timings, dirty
+
+
+# Files a results directory holds that aren't an institution's results:
+# batch_scrape.py's index and the manifests of these reports
+NOT_RESULTS = {"index.json", MANIFEST_NAME}
+
+
+def find_inputs(patterns):
+    # Results files from directories (their .json and .parquet files),
+    # glob patterns and plain paths. Of 107004.json and the 107004.parquet
+    # that results_store.py writes beside it only the Parquet file is used;
+    # files of the same name in other directories are separate inputs.
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [p for ext in ("*.json", "*.parquet") for p in glob.glob(os.path.join(pattern, ext))]
+        else:
+            matches = glob.glob(pattern)
+        paths.extend(sorted(p for p in matches if os.path.basename(p) not in NOT_RESULTS))
+    by_stem = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.abspath(path))[0]
+        if stem not in by_stem or path.endswith(".parquet") and not by_stem[stem].endswith(".parquet"):
+            by_stem[stem] = path
+    return list(by_stem.values())
+
+
+def report_names(paths):
+    # Report name (and folder) of each input: its path relative to the
+    # directory holding all the inputs, without the extension. Files from
+    # one directory keep their bare names; results/2023/107004.json and
+    # results/2024/107004.json become 2023/107004 and 2024/107004.
+    if not paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    names = {}
+    owners = {}
+    for path in paths:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].replace(os.sep, "/")
+        other = owners.setdefault(name, path)
+        if os.path.abspath(other) != os.path.abspath(path):
+            raise ValueError(f"{other} and {path} would both be reported as {name}")
+        names[path] = name
+    return names
+
+
+def write_index(out_dir, summaries):
+    lines = ["# Examination Reports", "",
+             "| Institution | Students | Passed | Pass % |", "| --- | ---: | ---: | ---: |"]
+    for s in sorted(summaries, key=lambda s: s["name"]):
+        share = 100 * s["pass"] / s["students"] if s["students"] else 0
+        lines.append(f"| [{s['name']}]({s['name']}/report.md) | {s['students']} | {s['pass']} | {share:.1f}% |")
+    with open(os.path.join(out_dir, "index.md"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def run_batch(paths, out_dir=DEFAULT_OUT_DIR, workers=None, on_done=None, force=False):
+    # Builds every report whose results file or settings changed since the
+    # last run (all of them with force), in a process pool unless
+    # workers == 1, then the index and manifest. on_done(path, summary,
+    # rebuilt, error) is called as each finishes; rebuilt lists the
+    # artifacts redrawn. Returns (summaries, summed stage timings, number of
+    # artifacts rebuilt).
+    names = report_names(paths)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = ArtifactManifest(os.path.join(out_dir, MANIFEST_NAME))
+    summaries = []
+    totals = dict.fromkeys(STAGES, 0.0)
+    rebuilt = 0
+
+    def finish(path, result, error):
+        nonlocal rebuilt
+        if result:
+            entry, timings, dirty = result
+            manifest.set(os.path.abspath(path), entry)
+            summaries.append(entry["summary"])
+            rebuilt += len(dirty)
+            for stage, seconds in timings.items():
+                totals[stage] += seconds
+        if on_done:
+            on_done(path, result and result[0]["summary"], result and result[2], error)
+
+    # Unchanged institutions are settled here, from the file hash alone.
+    # The manifest is keyed by the input's full path, so results files of
+    # the same name in different directories keep their own entries.
+    jobs = []
+    for path in paths:
+        start = time.perf_counter()
+        name = names[path]
+        key = input_key(path)
+        previous = manifest.get(os.path.abspath(path))
+        artifacts = [os.path.join(out_dir, name, a) for a in (previous or {}).get("artifacts", {})]
+        fresh = not force and artifacts and manifest.is_fresh(os.path.abspath(path), key, artifacts)
+        totals["check"] += time.perf_counter() - start
+        if fresh:
+            finish(path, (previous, {}, []), None)
+        else:
+            jobs.append((path, key, None if force else previous, name))
+
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                finish(job[0], build_report(job[0], out_dir, *job[1:]), None)
+            except Exception as e:
+                finish(job[0], None, e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(build_report, job[0], out_dir, *job[1:]): job[0] for job in jobs}
+            for future in as_completed(futures):
+                error = future.exception()
+                finish(futures[future], None if error else future.result(), error)
+
+    write_index(out_dir, summaries)
+    manifest.save()
+    return summaries, totals, rebuilt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write markdown result reports with charts")
+    parser.add_argument("inputs", nargs="*", default=["results_107004.json"],
+                        help="results files, directories or glob patterns (default results_107004.json)")
+    parser.add_argument("-o", "--out", default=DEFAULT_OUT_DIR, help=f"output directory (default {DEFAULT_OUT_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, ignoring the manifest")
+    args = parser.parse_args()
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        parser.error("no results files found")
+
+    def on_done(path, summary, rebuilt, error):
+        if error:
+            print(f"{path}: FAILED ({error})")
+        elif rebuilt:
+            print(f"{path}: {summary['students']} students, rebuilt {', '.join(rebuilt)}")
+
+    start = time.perf_counter()
+    summaries, totals, rebuilt = run_batch(paths, args.out, args.workers, on_done, args.force)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(summaries)} reports in {elapsed:.1f}s ({60 * len(summaries) / elapsed:.0f} reports/minute), "
+          f"{rebuilt} artifacts rebuilt, index: {os.path.join(args.out, 'index.md')}")
+    for stage in STAGES:
+        mean = totals[stage] / len(summaries) if summaries else 0
+        print(f"  {stage:>8}: {totals[stage]:.2f}s total, {mean * 1000:.0f} ms per report")